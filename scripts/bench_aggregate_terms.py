@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+搜索词聚合效果测试
+模拟同一搜索词按广告活动 / 广告组 / 日期重复出现的报表，统计聚合前后下游（统计筛选、语义判断）需要处理的行数与预估 token 数
+使用方式: python scripts/bench_aggregate_terms.py [唯一搜索词数 [每个词平均重复次数]]
+"""
+
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+# 添加 src 目录到 Python 路径
+app_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if app_dir not in sys.path:
+    sys.path.insert(0, app_dir)
+
+from utils.report.aggregate import aggregate_by_term, estimate_tokens  # noqa: E402
+from utils.report.table import KeywordTable  # noqa: E402
+
+WORDS = [
+    "wireless", "earbuds", "bluetooth", "headphones", "running", "sport", "kids",
+    "noise", "cancelling", "case", "charger", "waterproof", "cheap", "best", "for", "with",
+]
+CAMPAIGNS = [f"SP-Auto-{i}" for i in range(4)] + [f"SP-Manual-{i}" for i in range(4)]
+AD_GROUPS = ["default", "broad", "phrase", "exact"]
+
+
+def make_table(unique_terms: int, repeat: float, seed: int = 42) -> KeywordTable:
+    """生成含重复搜索词的报表：每个词随机出现在多个广告活动/广告组/日期中，部分重复带大小写或空白差异"""
+    rnd = random.Random(seed)
+    terms = list({" ".join(rnd.choice(WORDS) for _ in range(rnd.randint(2, 5))) for _ in range(unique_terms * 3)})
+    terms = terms[:unique_terms]
+    rows = int(len(terms) * repeat)
+    search_term = []
+    for _ in range(rows):
+        term = rnd.choice(terms)
+        if rnd.random() < 0.1:
+            term = term.title()
+        search_term.append(term)
+    clicks = np.array([rnd.randint(0, 20) for _ in range(rows)], dtype=np.int64)
+    return KeywordTable(
+        search_term=np.array(search_term, dtype=object),
+        clicks=clicks,
+        spend=np.round(clicks * 0.8, 2),
+        orders=np.array([rnd.randint(0, 1) for _ in range(rows)], dtype=np.int64),
+        campaign=np.array([rnd.choice(CAMPAIGNS) for _ in range(rows)], dtype=object),
+        ad_group=np.array([rnd.choice(AD_GROUPS) for _ in range(rows)], dtype=object),
+    )
+
+
+def main():
+    unique_terms = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    repeat = float(sys.argv[2]) if len(sys.argv) > 2 else 8.0
+    table = make_table(unique_terms, repeat)
+
+    t0 = time.perf_counter()
+    aggregated, _ = aggregate_by_term(table)
+    t_agg = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    _, breakdown = aggregate_by_term(table, keep_breakdown=True)
+    t_breakdown = time.perf_counter() - t0
+
+    rows_before, rows_after = len(table), len(aggregated)
+    tokens_before = estimate_tokens(table.search_term.tolist())
+    tokens_after = estimate_tokens(aggregated.search_term.tolist())
+    assert int(aggregated.clicks.sum()) == int(table.clicks.sum()), "点击数合计不一致"
+    print(f"rows:   {rows_before:>10} -> {rows_after:>10}  ({rows_after / rows_before:.1%})")
+    print(f"tokens: {tokens_before:>10} -> {tokens_after:>10}  ({tokens_after / tokens_before:.1%})")
+    print(f"aggregate: {t_agg:.3f}s, with campaign breakdown: {t_breakdown:.3f}s ({len(breakdown)} terms)")
+
+
+if __name__ == "__main__":
+    main()
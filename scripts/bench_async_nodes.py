@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+异步大模型节点并发压测
+用固定延迟的模拟模型替换 LLMClient 底层的 ChatOpenAI（同步 stream 用 time.sleep，异步 astream 用 asyncio.sleep，
+与真实 HTTP 调用的阻塞特性一致），同时发起 N 个关键词收割工作流（拓词 → 竞争度打分）：
+- sync: 只注册同步拓词节点（原实现），节点在默认线程池中执行，并发数受线程池大小限制
+- async: 注册同步 + 异步节点，graph.ainvoke 走异步版本
+并验证取消运行时进行中的模型请求被中断
+使用方式: python scripts/bench_async_nodes.py [并发运行数] [模型延迟秒数]
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import time
+
+# 添加 src 目录到 Python 路径
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+app_dir = os.path.join(project_dir, "src")
+if app_dir not in sys.path:
+    sys.path.insert(0, app_dir)
+os.environ.setdefault("COZE_WORKSPACE_PATH", project_dir)
+# 模拟模型不发出请求，只需通过 LLMClient 的配置校验
+for name in ("COZE_WORKLOAD_IDENTITY_API_KEY", "COZE_INTEGRATION_BASE_URL", "COZE_INTEGRATION_MODEL_BASE_URL"):
+    os.environ.setdefault(name, "http://localhost" if name.endswith("URL") else "bench")
+# 进程内大模型并发上限放到运行数之上，只观察线程池 / 事件循环本身的差异
+os.environ.setdefault("LLM_MAX_CONCURRENCY", "64")
+
+from coze_coding_dev_sdk import LLMClient  # noqa: E402
+from langchain_core.messages import AIMessageChunk  # noqa: E402
+from langgraph.graph import END, StateGraph  # noqa: E402
+
+from graphs.keyword_harvest_graph import (  # noqa: E402
+    KeywordHarvestGlobalState,
+    create_keyword_harvest_graph,
+)
+from graphs.nodes.competition_score_node import competition_score_node  # noqa: E402
+from graphs.nodes.expand_keywords_node import expand_keywords_node  # noqa: E402
+from graphs.state import KeywordHarvestInput, KeywordHarvestOutput  # noqa: E402
+
+# 未配置 cozeloop 工作空间时每次调用都会打印告警
+logging.getLogger("cozeloop._noop").setLevel(logging.ERROR)
+
+LATENCY = 1.0
+OUTPUT = "wireless earbuds for running\nbluetooth earbuds with charging case\nsweatproof earbuds for gym"
+# 异步请求被取消的次数
+cancelled_requests = 0
+
+
+class FakeChatModel:
+    """固定延迟返回的模拟模型"""
+
+    def _chunk(self) -> AIMessageChunk:
+        return AIMessageChunk(content=OUTPUT, response_metadata={"finish_reason": "stop"})
+
+    def stream(self, messages):
+        time.sleep(LATENCY)
+        yield self._chunk()
+
+    async def astream(self, messages):
+        global cancelled_requests
+        try:
+            await asyncio.sleep(LATENCY)
+        except asyncio.CancelledError:
+            cancelled_requests += 1
+            raise
+        yield self._chunk()
+
+
+def legacy_graph():
+    """只注册同步拓词节点的关键词收割工作流"""
+    builder = StateGraph(KeywordHarvestGlobalState, input_schema=KeywordHarvestInput, output_schema=KeywordHarvestOutput)
+    builder.add_node("expand_keywords", expand_keywords_node, metadata={"llm_cfg": "config/expand_keywords_llm_cfg.json"})
+    builder.add_node("competition_score", competition_score_node)
+    builder.set_entry_point("expand_keywords")
+    builder.add_edge("expand_keywords", "competition_score")
+    builder.add_edge("competition_score", END)
+    return builder.compile()
+
+
+async def run_concurrently(graph, runs: int) -> float:
+    payload = {"product_description": "Wireless Earbuds Bluetooth 5.3", "seed_keywords": "wireless earbuds"}
+    t0 = time.perf_counter()
+    results = await asyncio.gather(*(graph.ainvoke(payload) for _ in range(runs)))
+    elapsed = time.perf_counter() - t0
+    assert all(len(r["keyword_recommend"]) == 3 for r in results), "运行结果不完整"
+    return elapsed
+
+
+async def cancel_in_flight(graph) -> None:
+    """发起一次运行，模型请求进行中时取消任务"""
+    task = asyncio.create_task(graph.ainvoke({"product_description": "x", "seed_keywords": "y"}))
+    await asyncio.sleep(LATENCY / 4)
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+
+async def main():
+    global LATENCY
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    LATENCY = float(sys.argv[2]) if len(sys.argv) > 2 else LATENCY
+    LLMClient._create_llm = lambda self, llm_config, **kwargs: FakeChatModel()
+
+    async_graph = create_keyword_harvest_graph().compile()
+    sync_elapsed = await run_concurrently(legacy_graph(), runs)
+    async_elapsed = await run_concurrently(async_graph, runs)
+    print(f"runs={runs}  llm_latency={LATENCY:.1f}s  default_executor_workers={min(32, (os.cpu_count() or 1) + 4)}  "
+          f"LLM_MAX_CONCURRENCY={os.environ['LLM_MAX_CONCURRENCY']}")
+    print(f"  sync nodes : {sync_elapsed:.2f}s  ({sync_elapsed / LATENCY:.1f}x latency)")
+    print(f"  async nodes: {async_elapsed:.2f}s  ({async_elapsed / LATENCY:.1f}x latency)")
+
+    await cancel_in_flight(async_graph)
+    print(f"  cancelled in-flight LLM requests: {cancelled_requests}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
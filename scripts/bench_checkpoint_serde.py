@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+检查点序列化基准测试
+用 100k 行报表跑完流量清洗分支的非大模型节点，按 Postgres 检查点的存储方式（每个通道值单独序列化为一个 blob）
+对比 langgraph 默认序列化与 msgpack+zstd 的写入体积、序列化 / 反序列化耗时
+使用方式: python scripts/bench_checkpoint_serde.py [行数]
+"""
+
+import os
+import random
+import sys
+import time
+from typing import Any, Dict
+
+# 添加 src 目录到 Python 路径
+app_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if app_dir not in sys.path:
+    sys.path.insert(0, app_dir)
+
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer  # noqa: E402
+
+from graphs.state import AggregateTermsInput, DataPreprocessInput, MergeNegativesInput, StatsFilterInput  # noqa: E402
+from graphs.nodes.aggregate_terms_node import aggregate_terms_node  # noqa: E402
+from graphs.nodes.data_preprocess_node import data_preprocess_node  # noqa: E402
+from graphs.nodes.merge_negatives_node import merge_negatives_node  # noqa: E402
+from graphs.nodes.stats_filter_node import stats_filter_node  # noqa: E402
+from storage.memory.serializer import get_checkpoint_serde  # noqa: E402
+from utils.report.table import KeywordTable  # noqa: E402
+
+WORDS = [
+    "wireless", "earbuds", "bluetooth", "headphones", "running", "sport", "kids",
+    "noise", "cancelling", "case", "charger", "waterproof", "cheap", "best", "for", "with",
+]
+
+
+def make_report(rows: int, seed: int = 42) -> str:
+    """生成带表头的 TSV 报表，搜索词平均重复 4 次"""
+    rnd = random.Random(seed)
+    terms = [" ".join(rnd.choice(WORDS) for _ in range(rnd.randint(2, 6))) + f" {i}" for i in range(max(1, rows // 4))]
+    lines = ["Campaign Name\tCustomer Search Term\tImpressions\tClicks\tSpend\t7 Day Total Orders"]
+    for _ in range(rows):
+        clicks = rnd.randint(0, 15)
+        lines.append(f"SP-{rnd.randint(1, 8)}\t{rnd.choice(terms)}\t{clicks * 30}\t{clicks}\t{clicks * 0.6:.2f}\t{int(rnd.random() < 0.3)}")
+    return "\n".join(lines)
+
+
+def build_channels(text: str) -> Dict[str, Any]:
+    """流量清洗分支结束时的通道值（语义判断用固定输出代替）"""
+    data = data_preprocess_node(DataPreprocessInput(report_text=text), {}, None).data
+    aggregated = aggregate_terms_node(AggregateTermsInput(data=data), {}, None)
+    filtered = stats_filter_node(StatsFilterInput(data=aggregated.data), {}, None)
+    semantic_bad = "\n".join(f"{t}|品类不符" for t in filtered.remaining_keywords.search_term.tolist()[::20])
+    merged = merge_negatives_node(MergeNegativesInput(bad_keywords=filtered.bad_keywords, semantic_bad=semantic_bad), {}, None)
+    return {
+        "report_text": text,
+        "product_info": "wireless earbuds for running",
+        "data": aggregated.data,
+        "aggregate_stats": aggregated.aggregate_stats,
+        "bad_keywords": filtered.bad_keywords,
+        "remaining_keywords": filtered.remaining_keywords,
+        "semantic_bad": semantic_bad,
+        "final_negative_list": merged.final_negative_list,
+    }
+
+
+def as_records(channels: Dict[str, Any]) -> Dict[str, Any]:
+    """旧的 List[Dict] 状态形态"""
+    return {k: v.to_records() if isinstance(v, KeywordTable) else v for k, v in channels.items()}
+
+
+def measure(serde, channels: Dict[str, Any]):
+    """逐通道序列化再反序列化，返回 (总字节数, 写耗时, 读耗时)，各取 3 次最小值"""
+    best_write = best_read = float("inf")
+    size = 0
+    for _ in range(3):
+        t0 = time.perf_counter()
+        blobs = [serde.dumps_typed(v) for v in channels.values()]
+        t1 = time.perf_counter()
+        for blob in blobs:
+            serde.loads_typed(blob)
+        t2 = time.perf_counter()
+        best_write, best_read = min(best_write, t1 - t0), min(best_read, t2 - t1)
+        size = sum(len(b[1]) for b in blobs)
+    return size, best_write, best_read
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    channels = build_channels(make_report(rows))
+    cases = [
+        ("default, List[Dict] state", JsonPlusSerializer(), as_records(channels)),
+        ("default, KeywordTable state", JsonPlusSerializer(), channels),
+        ("msgpack+zstd, KeywordTable", get_checkpoint_serde("msgpack+zstd"), channels),
+    ]
+    print(f"rows={rows}")
+    print(f"{'serializer':>28} | {'size(MB)':>8} | {'write(ms)':>9} | {'read(ms)':>8}")
+    for name, serde, values in cases:
+        size, t_write, t_read = measure(serde, values)
+        print(f"{name:>28} | {size / 2**20:>8.2f} | {t_write * 1e3:>9.1f} | {t_read * 1e3:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
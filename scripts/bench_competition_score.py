@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+关键词竞争度打分性能测试
+生成 N 个长尾关键词与一份含 M 个搜索词的历史索引（其中部分关键词有历史），对比：
+- legacy: 原逐行字符串判断（只看词数与子串 "for" / "with"）
+- batch: 一次分词 + 历史索引关联 + 规则表整列求值（config/competition_score_rules.json）
+使用方式: python scripts/bench_competition_score.py [关键词数] [历史词数]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+# 添加 src 目录到 Python 路径
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+app_dir = os.path.join(project_dir, "src")
+if app_dir not in sys.path:
+    sys.path.insert(0, app_dir)
+os.environ.setdefault("COZE_WORKSPACE_PATH", project_dir)
+
+from utils.report.history import KeywordHistory  # noqa: E402
+from utils.report.scoring import KeywordScorer, load_score_config  # noqa: E402
+from utils.report.table import KeywordTable  # noqa: E402
+
+WORDS = [
+    "wireless", "earbuds", "bluetooth", "headphones", "running", "gym", "kids", "case", "charging", "waterproof",
+    "noise", "cancelling", "sport", "women", "men", "iphone", "android", "cheap", "best", "mic", "format",
+]
+FILLERS = ["for", "with", ""]
+
+
+def make_keywords(count: int, seed: int = 7) -> list:
+    rng = np.random.default_rng(seed)
+    sizes = rng.integers(1, 6, count)
+    picks = rng.integers(0, len(WORDS), (count, 5))
+    fillers = rng.integers(0, len(FILLERS), count)
+    keywords = []
+    for i in range(count):
+        words = [WORDS[j] for j in picks[i, :sizes[i]]]
+        if FILLERS[fillers[i]] and len(words) > 1:
+            words.insert(1, FILLERS[fillers[i]])
+        keywords.append(" ".join(words) + f" v{i % 5000}")
+    return keywords
+
+
+def legacy_score(lines: list) -> list:
+    """原 competition_score_node 的逐行判断"""
+    res = []
+    for line in lines:
+        kw = line.strip()
+        if not kw:
+            continue
+        cnt = len(kw.split())
+        if cnt >= 3 and ("for" in kw.lower() or "with" in kw.lower()):
+            res.append({"keyword": kw, "match_type": "Exact", "competition": "低竞争·蓝海", "bid": "高"})
+        elif cnt <= 2:
+            res.append({"keyword": kw, "match_type": "Broad", "competition": "高竞争·红海", "bid": "低"})
+        else:
+            res.append({"keyword": kw, "match_type": "Phrase", "competition": "中等竞争", "bid": "中"})
+    return res
+
+
+def make_history(keywords: list, size: int) -> KeywordHistory:
+    """历史索引：size 个随机搜索词 + 约一半的待打分关键词"""
+    rng = np.random.default_rng(11)
+    terms = [f"history term {i}" for i in range(size)] + keywords[::2]
+    n = len(terms)
+    clicks = rng.integers(0, 200, n)
+    history = KeywordHistory()
+    history.ingest(KeywordTable.from_records([
+        {"search_term": t, "clicks": int(c), "spend": float(c) * rng.uniform(0.3, 2.5), "orders": int(c * rng.uniform(0, 0.2))}
+        for t, c in zip(terms, clicks)
+    ]))
+    return history
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    history_size = int(sys.argv[2]) if len(sys.argv) > 2 else 200_000
+    keywords = make_keywords(count)
+    history = make_history(keywords, history_size)
+    scorer = KeywordScorer(load_score_config(), history)
+
+    t0 = time.perf_counter()
+    legacy = legacy_score(keywords)
+    legacy_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    scored = scorer.score(keywords)
+    batch_s = time.perf_counter() - t0
+
+    with_history = sum("history_clicks" in item for item in scored)
+    changed = sum(a["competition"] != b["competition"] for a, b in zip(legacy, scored))
+    print(f"keywords={count}  history_terms={len(history)}  with_history={with_history}")
+    print(f"  legacy per-line : {legacy_s * 1000:8.1f} ms  ({legacy_s / count * 1e6:.2f} us/keyword)")
+    print(f"  batch + history : {batch_s * 1000:8.1f} ms  ({batch_s / count * 1e6:.2f} us/keyword)")
+    print(f"  competition level changed vs legacy: {changed} ({changed / count:.1%})")
+
+
+if __name__ == "__main__":
+    main()
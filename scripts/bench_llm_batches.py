@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+大模型分批并发调用测试
+用固定延迟、按比例随机失败的模拟调用代替真实大模型，验证总耗时约为 批次数 / 并发数 × 单次延迟，
+失败批次重试后结果仍按原顺序合并
+使用方式: python scripts/bench_llm_batches.py [关键词数 [批次大小 [单次延迟秒]]]
+"""
+
+import os
+import random
+import sys
+import threading
+import time
+
+# 添加 src 目录到 Python 路径
+app_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if app_dir not in sys.path:
+    sys.path.insert(0, app_dir)
+
+import utils.llm.batch as batch_mod  # noqa: E402
+from utils.llm.batch import run_batches, split_batches  # noqa: E402
+
+FAILURE_RATE = 0.1
+
+
+def main():
+    terms = [f"term {i}" for i in range(int(sys.argv[1]) if len(sys.argv) > 1 else 4000)]
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    latency = float(sys.argv[3]) if len(sys.argv) > 3 else 0.2
+    batch_mod.RETRY_BACKOFF_SECONDS = 0.01
+    rnd = random.Random(0)
+    lock = threading.Lock()
+
+    def fake_llm(batch):
+        time.sleep(latency)
+        with lock:
+            fail = rnd.random() < FAILURE_RATE
+        if fail:
+            raise TimeoutError("simulated timeout")
+        return "\n".join(f"{term} | 不相关" for term in batch[::50])
+
+    batches = split_batches(terms, batch_size)
+    expected = "\n".join(f"{term} | 不相关" for b in batches for term in b[::50])
+    for concurrency in (1, 2, 4, 8):
+        t0 = time.perf_counter()
+        results = run_batches(batches, fake_llm, concurrency=concurrency, retries=3)
+        elapsed = time.perf_counter() - t0
+        merged = "\n".join(r for r in results if r)
+        ideal = len(batches) / concurrency * latency
+        print(f"batches={len(batches)} concurrency={concurrency}: {elapsed:.2f}s (ideal {ideal:.2f}s), ordered={merged == expected}")
+
+
+if __name__ == "__main__":
+    main()
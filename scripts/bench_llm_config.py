@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+大模型节点配置加载开销测试
+对比每次调用的配置加载开销：
+- legacy: 每次打开 config/*_llm_cfg.json、json.load 并重新编译用户提示词 Jinja2 模板、计算提示词版本
+- cached: 进程内按路径缓存（utils.llm.llm_config），每次只 stat 一次文件
+并验证修改配置文件后缓存会重新加载
+使用方式: python scripts/bench_llm_config.py [调用次数]
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# 添加 src 目录到 Python 路径
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+app_dir = os.path.join(project_dir, "src")
+if app_dir not in sys.path:
+    sys.path.insert(0, app_dir)
+os.environ.setdefault("COZE_WORKSPACE_PATH", project_dir)
+
+from jinja2 import Template  # noqa: E402
+
+from utils.llm.llm_config import load_llm_config, load_llm_config_file, prompt_version  # noqa: E402
+
+CONFIG_FILES = ["config/semantic_judge_llm_cfg.json", "config/expand_keywords_llm_cfg.json"]
+
+
+def legacy_load(cfg_file: str):
+    """原节点中的加载方式"""
+    with open(cfg_file, "r", encoding="utf-8") as fd:
+        cfg = json.load(fd)
+    up = cfg.get("up", "")
+    return cfg, Template(up), prompt_version(cfg.get("sp", ""), up, cfg.get("prompt_version", ""))
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    for name in CONFIG_FILES:
+        cfg_file = os.path.join(project_dir, name)
+        config = {"metadata": {"llm_cfg": name}}
+
+        t0 = time.perf_counter()
+        for _ in range(calls):
+            legacy_load(cfg_file)
+        legacy_s = time.perf_counter() - t0
+
+        load_llm_config(config)
+        t0 = time.perf_counter()
+        for _ in range(calls):
+            load_llm_config(config)
+        cached_s = time.perf_counter() - t0
+
+        print(f"{name}  calls={calls}")
+        print(f"  legacy (open + json.load + Template) : {legacy_s / calls * 1e6:9.1f} us/call")
+        print(f"  cached (stat + lookup)               : {cached_s / calls * 1e6:9.1f} us/call  ({legacy_s / cached_s:.0f}x)")
+
+    # 热更新：修改配置文件后下一次调用拿到新提示词
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "llm_cfg.json")
+        shutil.copy(os.path.join(project_dir, CONFIG_FILES[0]), path)
+        before = load_llm_config_file(path)
+        with open(path, "r", encoding="utf-8") as fd:
+            cfg = json.load(fd)
+        cfg["sp"] = cfg.get("sp", "") + "\n（已更新）"
+        with open(path, "w", encoding="utf-8") as fd:
+            json.dump(cfg, fd, ensure_ascii=False)
+        after = load_llm_config_file(path)
+        print(f"hot reload: version {before.version} -> {after.version}, reloaded={after is not before}")
+
+
+if __name__ == "__main__":
+    main()
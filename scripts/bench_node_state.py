@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+流量清洗分支状态类型基准测试
+对比 List[Dict] 状态（旧实现）与列式 KeywordTable 状态在每个节点上的耗时与内存峰值，
+以及检查点序列化（langgraph JsonPlusSerializer）的耗时与体积
+每个节点的测量包含 langgraph 在节点边界上做的事：用上游输出构造本节点的输入模型（pydantic 校验），再执行节点
+使用方式: python scripts/bench_node_state.py [行数]
+"""
+
+import os
+import random
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+from pydantic import BaseModel, Field
+
+# 添加 src 目录到 Python 路径
+app_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if app_dir not in sys.path:
+    sys.path.insert(0, app_dir)
+
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer  # noqa: E402
+
+from graphs.state import (  # noqa: E402
+    AggregateTermsInput,
+    DataPreprocessInput,
+    MergeNegativesInput,
+    MergeResultInput,
+    StatsFilterInput,
+)
+from graphs.nodes.aggregate_terms_node import aggregate_terms_node  # noqa: E402
+from graphs.nodes.data_preprocess_node import data_preprocess_node  # noqa: E402
+from graphs.nodes.merge_negatives_node import merge_negatives_node  # noqa: E402
+from graphs.nodes.merge_result_node import merge_result_node  # noqa: E402
+from graphs.nodes.stats_filter_node import stats_filter_node  # noqa: E402
+from utils.report.aggregate import aggregate_by_term  # noqa: E402
+from utils.report.reader import read_report  # noqa: E402
+from utils.report.table import KeywordTable  # noqa: E402
+
+WORDS = [
+    "wireless", "earbuds", "bluetooth", "headphones", "running", "sport", "kids",
+    "noise", "cancelling", "case", "charger", "waterproof", "cheap", "best", "for", "with",
+]
+
+
+# ==================== 旧实现：List[Dict] 状态 ====================
+
+class LegacyData(BaseModel):
+    data: List[Dict[str, Any]] = Field(default=[])
+
+
+class LegacyFilterOutput(BaseModel):
+    bad_keywords: List[Dict[str, Any]] = Field(default=[])
+    remaining_keywords: List[Dict[str, Any]] = Field(default=[])
+
+
+class LegacyMergeInput(BaseModel):
+    bad_keywords: List[Dict[str, Any]] = Field(default=[])
+    semantic_bad: str = Field(default="")
+
+
+class LegacyNegatives(BaseModel):
+    final_negative_list: List[Dict[str, Any]] = Field(default=[])
+
+
+class LegacyResult(BaseModel):
+    negative_keywords: List[Dict[str, Any]] = Field(default=[])
+
+
+def legacy_data_preprocess(state: DataPreprocessInput) -> LegacyData:
+    return LegacyData(data=read_report(state.report_text).to_records())
+
+
+def legacy_aggregate(state: LegacyData) -> LegacyData:
+    aggregated, _ = aggregate_by_term(KeywordTable.from_records(state.data))
+    return LegacyData(data=aggregated.to_records())
+
+
+def legacy_stats_filter(state: LegacyData) -> LegacyFilterOutput:
+    bad, normal = [], []
+    for row in state.data:
+        st, cli, spe, ords = str(row.get("search_term", "")), int(row.get("clicks", 0)), float(row.get("spend", 0.0)), int(row.get("orders", 0))
+        reason = None
+        if ords == 0:
+            if cli > 10:
+                reason = "高点击无转化"
+            elif spe > 10.0:
+                reason = "高花费无转化"
+        if reason:
+            bad.append({**row, "search_term": st, "clicks": cli, "spend": spe, "orders": ords, "reason": reason})
+        else:
+            normal.append({**row, "search_term": st, "clicks": cli, "spend": spe, "orders": ords})
+    return LegacyFilterOutput(bad_keywords=bad, remaining_keywords=normal)
+
+
+def legacy_merge_negatives(state: LegacyMergeInput) -> LegacyNegatives:
+    semantic = []
+    for line in state.semantic_bad.strip().split("\n"):
+        line = line.strip()
+        if not line:
+            continue
+        parts = line.split("|")
+        semantic.append({"search_term": parts[0].strip(), "clicks": 0, "spend": 0.0, "orders": 0,
+                         "reason": parts[1].strip() if len(parts) > 1 else "语义不相关"})
+    return LegacyNegatives(final_negative_list=state.bad_keywords + semantic)
+
+
+def legacy_merge_result(state: LegacyNegatives) -> LegacyResult:
+    return LegacyResult(negative_keywords=state.final_negative_list)
+
+
+# ==================== 测量 ====================
+
+def make_report(rows: int, seed: int = 42) -> str:
+    """生成带表头的 TSV 报表，搜索词平均重复 4 次"""
+    rnd = random.Random(seed)
+    terms = [" ".join(rnd.choice(WORDS) for _ in range(rnd.randint(2, 6))) + f" {i}" for i in range(max(1, rows // 4))]
+    lines = ["Campaign Name\tCustomer Search Term\tImpressions\tClicks\tSpend\t7 Day Total Orders"]
+    for _ in range(rows):
+        clicks = rnd.randint(0, 15)
+        lines.append(f"SP-{rnd.randint(1, 8)}\t{rnd.choice(terms)}\t{clicks * 30}\t{clicks}\t{clicks * 0.6:.2f}\t{int(rnd.random() < 0.3)}")
+    return "\n".join(lines)
+
+
+def measure(func: Callable[[], Any]):
+    """耗时与内存峰值分两次测量，避免 tracemalloc 的开销计入耗时"""
+    t0 = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - t0
+    del result
+    tracemalloc.start()
+    result = func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def semantic_bad_for(remaining_terms: List[str]) -> str:
+    """模拟大模型输出：约 5% 的剩余词判为不相关"""
+    return "\n".join(f"{t}|品类不符" for t in remaining_terms[::20])
+
+
+def run_legacy(text: str) -> Dict[str, Any]:
+    results = {}
+    out, *results["data_preprocess"] = measure(lambda: legacy_data_preprocess(DataPreprocessInput(report_text=text)))
+    data = out.data
+    out, *results["aggregate_terms"] = measure(lambda: legacy_aggregate(LegacyData(data=data)))
+    data = out.data
+    out, *results["stats_filter"] = measure(lambda: legacy_stats_filter(LegacyData(data=data)))
+    bad, semantic_bad = out.bad_keywords, semantic_bad_for([r["search_term"] for r in out.remaining_keywords])
+    out, *results["merge_negatives"] = measure(lambda: legacy_merge_negatives(LegacyMergeInput(bad_keywords=bad, semantic_bad=semantic_bad)))
+    final = out.final_negative_list
+    out, *results["merge_result"] = measure(lambda: legacy_merge_result(LegacyNegatives(final_negative_list=final)))
+    results["checkpoint"] = measure_checkpoint(data)
+    return results
+
+
+def run_table(text: str) -> Dict[str, Any]:
+    results = {}
+    out, *results["data_preprocess"] = measure(lambda: data_preprocess_node(DataPreprocessInput(report_text=text), {}, None))
+    data = out.data
+    out, *results["aggregate_terms"] = measure(lambda: aggregate_terms_node(AggregateTermsInput(data=data), {}, None))
+    data = out.data
+    out, *results["stats_filter"] = measure(lambda: stats_filter_node(StatsFilterInput(data=data), {}, None))
+    bad, semantic_bad = out.bad_keywords, semantic_bad_for(out.remaining_keywords.search_term.tolist())
+    out, *results["merge_negatives"] = measure(lambda: merge_negatives_node(MergeNegativesInput(bad_keywords=bad, semantic_bad=semantic_bad), {}, None))
+    final = out.final_negative_list
+    out, *results["merge_result"] = measure(lambda: merge_result_node(MergeResultInput(final_negative_list=final), {}, None))
+    results["checkpoint"] = measure_checkpoint(data)
+    return results
+
+
+def measure_checkpoint(data: Any):
+    """检查点序列化 data 字段：返回 (字节数, 序列化+反序列化耗时, 内存峰值)"""
+    serde = JsonPlusSerializer()
+
+    def roundtrip():
+        blob = serde.dumps_typed(data)
+        serde.loads_typed(blob)
+        return blob
+
+    blob, elapsed, peak = measure(roundtrip)
+    return len(blob[1]), elapsed, peak
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    text = make_report(rows)
+    legacy = run_legacy(text)
+    table = run_table(text)
+    print(f"rows={rows}")
+    print(f"{'node':>16} | {'dict(s)':>8} {'peak(MB)':>9} | {'table(s)':>8} {'peak(MB)':>9} | {'speedup':>7}")
+    for node in ("data_preprocess", "aggregate_terms", "stats_filter", "merge_negatives", "merge_result"):
+        t_old, m_old = legacy[node]
+        t_new, m_new = table[node]
+        print(f"{node:>16} | {t_old:>8.3f} {m_old / 2**20:>9.1f} | {t_new:>8.3f} {m_new / 2**20:>9.1f} | {t_old / max(t_new, 1e-9):>6.1f}x")
+    size_old, t_old, _ = legacy["checkpoint"]
+    size_new, t_new, _ = table["checkpoint"]
+    print(f"{'checkpoint(data)':>16} | {t_old:>8.3f} {size_old / 2**20:>7.1f}MB | {t_new:>8.3f} {size_new / 2**20:>7.1f}MB | {t_old / max(t_new, 1e-9):>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
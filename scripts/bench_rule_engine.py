@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+统计筛选规则引擎性能测试
+对不同行数的关键词表执行一组 ACOS / CTR / CVR / CPC 规则，观察耗时是否随行数线性增长，
+并与逐行 Python 判断对比
+使用方式: python scripts/bench_rule_engine.py [最大行数]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+# 添加 src 目录到 Python 路径
+app_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if app_dir not in sys.path:
+    sys.path.insert(0, app_dir)
+
+from utils.report.rules import apply_rules, resolve_rule_set  # noqa: E402
+from utils.report.table import KeywordTable  # noqa: E402
+
+RULES = [
+    {"when": "orders == 0 and clicks > 10", "reason": "高点击无转化"},
+    {"when": "orders == 0 and spend > avg_price / 2", "reason": "高花费无转化"},
+    {"when": "orders > 0 and acos > target_acos", "reason": "ACOS 超标"},
+    {"when": "impressions > 1000 and ctr < min_ctr", "reason": "点击率过低"},
+    {"when": "clicks >= 20 and cvr < 0.02 and cpc > 1.5", "reason": "转化率低且单次点击贵"},
+]
+PARAMS = {"avg_price": 20.0, "target_acos": 0.35, "min_ctr": 0.002}
+
+
+def make_table(rows: int, seed: int = 42) -> KeywordTable:
+    """生成随机关键词表（搜索词列不参与规则计算，用占位字符串）"""
+    rng = np.random.default_rng(seed)
+    clicks = rng.integers(0, 40, rows)
+    orders = rng.binomial(clicks, 0.12)
+    return KeywordTable(
+        search_term=np.full(rows, "term", dtype=object),
+        clicks=clicks,
+        spend=np.round(clicks * rng.uniform(0.3, 2.5, rows), 2),
+        orders=orders,
+        impressions=clicks * rng.integers(10, 2000, rows),
+        sales=np.round(orders * rng.uniform(10, 40, rows), 2),
+    )
+
+
+def row_by_row(table: KeywordTable) -> list:
+    """逐行 if 判断的等价实现，作为对照"""
+    reasons = []
+    columns = zip(
+        table.clicks.tolist(), table.spend.tolist(), table.orders.tolist(),
+        table.impressions.tolist(), table.sales.tolist(),
+    )
+    for clicks, spend, orders, impressions, sales in columns:
+        acos = spend / sales if sales else (float("inf") if spend else float("nan"))
+        ctr = clicks / impressions if impressions else (float("inf") if clicks else float("nan"))
+        cvr = orders / clicks if clicks else float("nan")
+        cpc = spend / clicks if clicks else float("nan")
+        if orders == 0 and clicks > 10:
+            reasons.append("高点击无转化")
+        elif orders == 0 and spend > PARAMS["avg_price"] / 2:
+            reasons.append("高花费无转化")
+        elif orders > 0 and acos > PARAMS["target_acos"]:
+            reasons.append("ACOS 超标")
+        elif impressions > 1000 and ctr < PARAMS["min_ctr"]:
+            reasons.append("点击率过低")
+        elif clicks >= 20 and cvr < 0.02 and cpc > 1.5:
+            reasons.append("转化率低且单次点击贵")
+        else:
+            reasons.append(None)
+    return reasons
+
+
+def main():
+    max_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 4_000_000
+    rule_set = resolve_rule_set({}, rules=RULES, params=PARAMS)
+
+    rows = 250_000
+    while rows <= max_rows:
+        table = make_table(rows)
+        elapsed = float("inf")
+        for _ in range(3):
+            t0 = time.perf_counter()
+            reasons = apply_rules(table, rule_set)
+            elapsed = min(elapsed, time.perf_counter() - t0)
+        line = f"rows={rows:>9}  rules: {elapsed:.3f}s  ({elapsed / rows * 1e9:.0f} ns/row, {np.not_equal(reasons, None).mean():.1%} matched)"
+        if rows <= 1_000_000:
+            t0 = time.perf_counter()
+            expected = row_by_row(table)
+            line += f"  row-by-row: {time.perf_counter() - t0:.3f}s"
+            assert reasons.tolist() == expected, "规则引擎与逐行判断结果不一致"
+        print(line)
+        rows *= 2
+
+
+if __name__ == "__main__":
+    main()
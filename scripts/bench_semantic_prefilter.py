@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+语义判断本地预筛测试
+生成与产品信息相关 / 属性冲突 / 品类错配三类搜索词，统计 n-gram 覆盖度预筛的耗时、各段词数、
+各类词落入自动保留段的比例，以及按每批调用耗时折算的节省 token 与时间
+使用方式: python scripts/bench_semantic_prefilter.py [搜索词数 [单批大模型耗时秒]]
+"""
+
+import os
+import random
+import sys
+import time
+
+# 添加 src 目录到 Python 路径
+app_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if app_dir not in sys.path:
+    sys.path.insert(0, app_dir)
+
+from utils.report.similarity import DEFAULT_KEEP_THRESHOLD, prefilter_stats, prefilter_terms  # noqa: E402
+
+PRODUCT = "Wireless Bluetooth Earbuds with Noise Cancelling, IPX7 Waterproof Sport Headphones for Running and Gym, 40H Playtime"
+RELEVANT = ["wireless", "bluetooth", "earbuds", "headphones", "noise", "cancelling", "waterproof", "sport", "running", "gym", "for"]
+CONFLICT = ["wired", "corded", "over ear", "kids", "usb c"]
+UNRELATED = ["dog", "toys", "kitchen", "knife", "set", "yoga", "mat", "phone", "case", "charger"]
+BATCH_SIZE = 200
+
+
+def make_terms(count: int, seed: int = 42):
+    """60% 相关词，25% 相关词中混入冲突属性，15% 无关词"""
+    rnd = random.Random(seed)
+    terms, kinds = [], []
+    for _ in range(count):
+        r = rnd.random()
+        words = rnd.sample(RELEVANT, rnd.randint(2, 4))
+        if r < 0.6:
+            kind = "relevant"
+        elif r < 0.85:
+            kind = "conflict"
+            words[rnd.randrange(len(words))] = rnd.choice(CONFLICT)
+        else:
+            kind = "unrelated"
+            words = rnd.sample(UNRELATED, rnd.randint(2, 3))
+        terms.append(" ".join(words))
+        kinds.append(kind)
+    return terms, kinds
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    batch_seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 20.0
+    terms, kinds = make_terms(count)
+
+    t0 = time.perf_counter()
+    result = prefilter_terms(PRODUCT, terms, keep_threshold=DEFAULT_KEEP_THRESHOLD)
+    elapsed = time.perf_counter() - t0
+    stats = prefilter_stats(terms, result)
+    print(f"terms={count} prefilter: {elapsed:.3f}s  {stats}")
+    for kind in ("relevant", "conflict", "unrelated"):
+        kept = [k for k, keep in zip(kinds, result.keep.tolist()) if keep and k == kind]
+        total = kinds.count(kind)
+        print(f"  {kind:>9}: {len(kept) / total:.1%} auto-kept")
+    saved_batches = (stats["auto_kept"] + stats["auto_rejected"]) / BATCH_SIZE
+    print(f"saved: {stats['tokens_saved']} input tokens, ~{saved_batches:.0f} LLM batches (~{saved_batches * batch_seconds:.0f}s of LLM time)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+转化率显著性性能测试
+生成点击数长尾分布的关键词（部分词转化率低于基线），对比固定阈值规则与 bayes / binomial 模式的否定结果与耗时
+使用方式: python scripts/bench_significance.py [关键词数]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+# 添加 src 目录到 Python 路径
+app_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if app_dir not in sys.path:
+    sys.path.insert(0, app_dir)
+
+from utils.report.rules import apply_rules, resolve_rule_set  # noqa: E402
+from utils.report.significance import account_baseline  # noqa: E402
+from utils.report.table import KeywordTable  # noqa: E402
+
+
+def make_table(rows: int, seed: int = 42):
+    """点击数服从对数正态分布；20% 的词真实转化率为基线的 1/4，其余等于基线"""
+    rng = np.random.default_rng(seed)
+    clicks = np.minimum(rng.lognormal(1.0, 1.5, rows).astype(np.int64), 50_000)
+    weak = rng.random(rows) < 0.2
+    orders = rng.binomial(clicks, np.where(weak, 0.03, 0.12))
+    table = KeywordTable(
+        search_term=np.full(rows, "term", dtype=object),
+        clicks=clicks,
+        spend=np.round(clicks * 0.8, 2),
+        orders=orders,
+    )
+    return table, weak
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    table, weak = make_table(rows)
+    print(f"terms={rows}  baseline cvr={account_baseline(table.orders, table.clicks):.4f}  truly weak={weak.mean():.1%}")
+    for mode in ("rules", "bayes", "binomial"):
+        rule_set = resolve_rule_set({}, mode=mode)
+        t0 = time.perf_counter()
+        negated = np.not_equal(apply_rules(table, rule_set), None)
+        elapsed = time.perf_counter() - t0
+        precision = (negated & weak).sum() / max(negated.sum(), 1)
+        recall = (negated & weak).sum() / max(weak.sum(), 1)
+        print(f"{mode:>8}: {elapsed:.3f}s  negated={negated.mean():.2%}  precision={precision:.1%}  recall={recall:.1%}")
+
+
+if __name__ == "__main__":
+    main()
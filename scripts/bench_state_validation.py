@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+节点边界校验开销微基准
+langgraph 在每个超步（superstep）上：用通道值构造节点输入模型、节点构造输出模型、条件边构造全局状态模型
+对比完整校验（strict_validation）与受信任内部状态（TrustedModel 按引用构造）在不同列表长度下的每超步开销
+使用方式: python scripts/bench_state_validation.py [列表长度 ...]
+"""
+
+import os
+import sys
+import timeit
+
+import numpy as np
+
+# 添加 src 目录到 Python 路径
+app_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if app_dir not in sys.path:
+    sys.path.insert(0, app_dir)
+
+from graphs.graph import AdOptimizeGlobalState  # noqa: E402
+from graphs.state import CompetitionScoreOutput, MergeResultInput, strict_validation  # noqa: E402
+from utils.report.table import KeywordTable  # noqa: E402
+
+
+def make_channels(size: int) -> dict:
+    """构造 size 行的通道值：否定词列式表 + 关键词建议列表"""
+    negatives = KeywordTable(
+        search_term=np.array([f"term {i}" for i in range(size)], dtype=object),
+        clicks=np.arange(size, dtype=np.int64),
+        spend=np.ones(size),
+        orders=np.zeros(size, dtype=np.int64),
+        reason=np.full(size, "高点击无转化", dtype=object),
+    )
+    recommend = [
+        {"keyword": f"keyword {i}", "match_type": "精准", "competition": "中", "bid": "$0.8", "reason": "长尾词"}
+        for i in range(size)
+    ]
+    return {
+        "report_text": "",
+        "product_info": "wireless earbuds",
+        "data": negatives,
+        "final_negative_list": negatives,
+        "keyword_recommend": recommend,
+        "campaign_breakdown": {f"term {i}": [{"campaign": "A", "clicks": 1}] for i in range(size)},
+    }
+
+
+def superstep(channels: dict) -> None:
+    """一个超步的边界开销：输入模型、输出模型、条件边全局状态"""
+    MergeResultInput(final_negative_list=channels["final_negative_list"], keyword_recommend=channels["keyword_recommend"])
+    CompetitionScoreOutput(keyword_recommend=channels["keyword_recommend"])
+    AdOptimizeGlobalState(**channels)
+
+
+def per_call(func, repeat: int = 5) -> float:
+    """多次运行取最小值，返回单次耗时（秒）"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def main():
+    sizes = [int(v) for v in sys.argv[1:]] or [100, 1_000, 10_000, 100_000]
+    print(f"{'list size':>10} | {'validated(ms)':>13} | {'trusted(ms)':>11} | {'saved':>6}")
+    for size in sizes:
+        channels = make_channels(size)
+        with strict_validation():
+            t_strict = per_call(lambda: superstep(channels))
+        t_trusted = per_call(lambda: superstep(channels))
+        print(f"{size:>10} | {t_strict * 1e3:>13.3f} | {t_trusted * 1e3:>11.3f} | {1 - t_trusted / t_strict:>6.1%}")
+
+
+if __name__ == "__main__":
+    main()
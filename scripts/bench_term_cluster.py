@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+近重复搜索词聚类性能测试
+按搜索意图生成带词形、词序、虚词变体的搜索词，观察聚类耗时是否随词数线性增长，并输出簇数与压缩比
+使用方式: python scripts/bench_term_cluster.py [最大词数]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+# 添加 src 目录到 Python 路径
+app_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if app_dir not in sys.path:
+    sys.path.insert(0, app_dir)
+
+from utils.report.cluster import cluster_stats, cluster_terms  # noqa: E402
+
+# (原形, 变体) 词表：每个搜索词由若干概念组成，每个概念随机取一种词形
+CONCEPTS = [
+    ("wireless",), ("earbuds", "earbud"), ("running", "runner", "runners"), ("headphones", "headphone"),
+    ("bluetooth",), ("sport", "sports"), ("kids", "kid"), ("case", "cases"), ("charger", "chargers", "charging"),
+    ("waterproof",), ("gym",), ("battery", "batteries"), ("noise",), ("cancelling",), ("workout", "workouts"),
+    ("ear",), ("hook", "hooks"), ("cheap",), ("best",), ("women",), ("men",), ("iphone",), ("android",),
+]
+CONCEPTS += [(f"brand{i}",) for i in range(2000)]
+FILLERS = ["for", "with", "the"]
+
+
+def make_terms(count: int, variants: int = 8, seed: int = 42) -> list:
+    """
+    生成搜索词：先生成 count / variants 个搜索意图（2~4 个概念），每个搜索词随机取一个意图，
+    再随机取词形、打乱词序、部分插入虚词
+    """
+    rng = np.random.default_rng(seed)
+    intents = max(1, count // variants)
+    sizes = rng.integers(2, 5, intents)
+    concepts = rng.integers(0, len(CONCEPTS), (intents, 4))
+    picks = rng.integers(0, intents, count)
+    forms = rng.integers(0, 3, (count, 4))
+    fillers = rng.integers(0, len(FILLERS) * 2, count)
+    terms = []
+    for intent, form, filler in zip(picks.tolist(), forms.tolist(), fillers.tolist()):
+        size = sizes[intent]
+        words = [CONCEPTS[c][f % len(CONCEPTS[c])] for c, f in zip(concepts[intent, :size].tolist(), form[:size])]
+        rng.shuffle(words)
+        if filler < len(FILLERS):
+            words.insert(len(words) - 1, FILLERS[filler])
+        terms.append(" ".join(words))
+    return terms
+
+
+def main():
+    max_terms = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    count = 125_000
+    while count <= max_terms:
+        terms = make_terms(count)
+        t0 = time.perf_counter()
+        _, representatives = cluster_terms(terms)
+        elapsed = time.perf_counter() - t0
+        stats = cluster_stats(len(terms), len(representatives))
+        print(
+            f"terms={count:>9}  cluster: {elapsed:.3f}s  ({elapsed / count * 1e6:.2f} us/term)  "
+            f"clusters={stats['clusters']}  compression_ratio={stats['compression_ratio']}"
+        )
+        count *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -14,15 +14,20 @@ from langgraph.graph import StateGraph, END
 from langchain_core.runnables import RunnableConfig
 from langgraph.runtime import Runtime
 from coze_coding_utils.runtime_ctx.context import Context
+from utils.report.table import KeywordTable
 
 # 导入状态定义
 from graphs.state import (
+    TrustedModel,
+    AdOptimizeFields,
     AdOptimizeInput,
     AdOptimizeOutput,
     DispatchInput,
     DispatchOutput,
     DataPreprocessInput,
     DataPreprocessOutput,
+    AggregateTermsInput,
+    AggregateTermsOutput,
     StatsFilterInput,
     StatsFilterOutput,
     SemanticJudgeInput,
@@ -34,34 +39,43 @@ from graphs.state import (
     CompetitionScoreInput,
     CompetitionScoreOutput,
     MergeResultInput,
-    MergeResultOutput
+    MergeResultOutput,
+    TrafficCleanStreamInput,
+    TrafficCleanStreamOutput
 )
 
 # 导入节点函数
 from graphs.nodes.dispatch_node import dispatch_node
 from graphs.nodes.data_preprocess_node import data_preprocess_node
+from graphs.nodes.aggregate_terms_node import aggregate_terms_node
 from graphs.nodes.stats_filter_node import stats_filter_node
-from graphs.nodes.semantic_judge_node import semantic_judge_node
+from graphs.nodes.ngram_mining_node import ngram_mining_node
+from graphs.nodes.semantic_judge_node import semantic_judge_node, asemantic_judge_node
 from graphs.nodes.merge_negatives_node import merge_negatives_node
-from graphs.nodes.expand_keywords_node import expand_keywords_node
+from graphs.nodes.expand_keywords_node import expand_keywords_node, aexpand_keywords_node
 from graphs.nodes.competition_score_node import competition_score_node
 from graphs.nodes.merge_result_node import merge_result_node
+from graphs.nodes.traffic_clean_stream_node import traffic_clean_stream_node
+from graphs.runnable import sync_async_node
 
 
 # 定义全局状态
-class AdOptimizeGlobalState(BaseModel):
-    """亚马逊广告优化工作流的全局状态"""
-    # 输入
-    report_text: str = Field(default="", description="广告报表文本")
-    product_info: str = Field(default="", description="产品信息")
-    seed_keywords: str = Field(default="", description="种子关键词")
-    
+class AdOptimizeGlobalState(AdOptimizeFields, TrustedModel):
+    """亚马逊广告优化工作流的全局状态（输入参数见 AdOptimizeFields）"""
     # 流量清洗分支中间状态
-    data: List[Dict[str, Any]] = Field(default=[], description="结构化关键词列表")
-    bad_keywords: List[Dict[str, Any]] = Field(default=[], description="统计否定词")
-    remaining_keywords: List[Dict[str, Any]] = Field(default=[], description="剩余待判断的词")
+    data: KeywordTable = Field(default_factory=KeywordTable.empty, description="结构化关键词列表")
+    campaign_breakdown: Dict[str, List[Dict[str, Any]]] = Field(default={}, description="搜索词 -> 各广告活动/广告组明细")
+    aggregate_stats: Dict[str, Any] = Field(default={}, description="搜索词聚合前后的行数与预估 token 数（流式模式下为各分块之和）")
+    bad_keywords: KeywordTable = Field(default_factory=KeywordTable.empty, description="统计否定词")
+    remaining_keywords: KeywordTable = Field(default_factory=KeywordTable.empty, description="剩余待判断的词")
     semantic_bad: str = Field(default="", description="语义不相关词")
-    final_negative_list: List[Dict[str, Any]] = Field(default=[], description="最终否定词列表")
+    semantic_cache_stats: Dict[str, Any] = Field(default={}, description="语义判断结果缓存命中统计（去重词数、内存/数据库命中数、未命中数、命中率、重试后仍失败的批次数与未判断的搜索词数）")
+    semantic_prefilter_stats: Dict[str, Any] = Field(default={}, description="语义判断本地预筛统计（自动保留/否定/送入大模型的词数、节省的 token 数与预估耗时）")
+    semantic_cluster_stats: Dict[str, Any] = Field(default={}, description="语义判断近重复词聚类统计（词数、簇数与压缩比）")
+    ngram_negative_candidates: List[Dict[str, Any]] = Field(default=[], description="n-gram 花费挖掘出的词组否定候选（词组、词数、覆盖搜索词数、累计点击/花费/订单、原因与示例搜索词），流式模式下为空")
+    ngram_mining_stats: Dict[str, Any] = Field(default={}, description="n-gram 花费挖掘统计（搜索词数、n-gram 数、命中规则数、候选数）")
+    negative_merge_stats: Dict[str, Any] = Field(default={}, description="否定词合并统计（统计/语义否定词数、重复数、词组数及其覆盖的否定词数、最终否定词数）")
+    final_negative_list: KeywordTable = Field(default_factory=KeywordTable.empty, description="最终否定词列表")
     
     # 关键词收割分支中间状态
     longtail_keywords: str = Field(default="", description="长尾关键词列表")
@@ -70,6 +84,12 @@ class AdOptimizeGlobalState(BaseModel):
     # 最终输出
     negative_keywords: List[Dict[str, Any]] = Field(default=[], description="否定关键词列表（止血）")
     recommend_keywords: List[Dict[str, Any]] = Field(default=[], description="新增关键词建议（拓词）")
+    recommend_check_stats: Dict[str, Any] = Field(default={}, description="推荐词交叉校验统计（推荐词数、与否定词冲突数、报表中已有数、剔除数）")
+
+
+def route_traffic_clean(state: AdOptimizeGlobalState) -> str:
+    """流量清洗分支路由：流式模式走分块节点，否则走逐节点链路"""
+    return "traffic_clean_stream" if state.streaming else "data_preprocess"
 
 
 def create_ad_optimize_graph() -> StateGraph:
@@ -88,21 +108,33 @@ def create_ad_optimize_graph() -> StateGraph:
     
     # ==================== 流量清洗分支节点 ====================
     builder.add_node("data_preprocess", data_preprocess_node)
+    builder.add_node("aggregate_terms", aggregate_terms_node)
     builder.add_node("stats_filter", stats_filter_node)
+    builder.add_node("ngram_mining", ngram_mining_node)
     builder.add_node(
         "semantic_judge",
-        semantic_judge_node,
+        sync_async_node(semantic_judge_node, asemantic_judge_node),
+        input_schema=SemanticJudgeInput,
         metadata={
             "type": "agent",
             "llm_cfg": "config/semantic_judge_llm_cfg.json"
         }
     )
     builder.add_node("merge_negatives", merge_negatives_node)
+    builder.add_node(
+        "traffic_clean_stream",
+        traffic_clean_stream_node,
+        metadata={
+            "type": "agent",
+            "llm_cfg": "config/semantic_judge_llm_cfg.json"
+        }
+    )
     
     # ==================== 关键词收割分支节点 ====================
     builder.add_node(
         "expand_keywords",
-        expand_keywords_node,
+        sync_async_node(expand_keywords_node, aexpand_keywords_node),
+        input_schema=ExpandKeywordsInput,
         metadata={
             "type": "agent",
             "llm_cfg": "config/expand_keywords_llm_cfg.json"
@@ -117,12 +149,15 @@ def create_ad_optimize_graph() -> StateGraph:
     builder.set_entry_point("dispatch")
     
     # ==================== 从分发节点触发两个并行分支 ====================
-    builder.add_edge("dispatch", "data_preprocess")
+    # 流量清洗分支根据 streaming 选择逐节点链路或分块流式节点
+    builder.add_conditional_edges("dispatch", route_traffic_clean, ["data_preprocess", "traffic_clean_stream"])
     builder.add_edge("dispatch", "expand_keywords")
     
     # ==================== 流量清洗分支链路 ====================
-    builder.add_edge("data_preprocess", "stats_filter")
-    builder.add_edge("stats_filter", "semantic_judge")
+    builder.add_edge("data_preprocess", "aggregate_terms")
+    builder.add_edge("aggregate_terms", "stats_filter")
+    builder.add_edge("stats_filter", "ngram_mining")
+    builder.add_edge("ngram_mining", "semantic_judge")
     builder.add_edge("semantic_judge", "merge_negatives")
     
     # ==================== 关键词收割分支链路 ====================
@@ -131,6 +166,7 @@ def create_ad_optimize_graph() -> StateGraph:
     # ==================== 汇聚两个分支 ====================
     # merge_negatives 和 competition_score 都完成后，执行 merge_result
     builder.add_edge(["merge_negatives", "competition_score"], "merge_result")
+    builder.add_edge(["traffic_clean_stream", "competition_score"], "merge_result")
     
     # ==================== 结束 ====================
     builder.add_edge("merge_result", END)
@@ -10,6 +10,7 @@ from langgraph.runtime import Runtime
 from coze_coding_utils.runtime_ctx.context import Context
 
 from graphs.state import (
+    TrustedModel,
     KeywordHarvestInput,
     KeywordHarvestOutput,
     ExpandKeywordsInput,
@@ -18,15 +19,19 @@ from graphs.state import (
     CompetitionScoreOutput
 )
 
-from graphs.nodes.expand_keywords_node import expand_keywords_node
+from graphs.nodes.expand_keywords_node import expand_keywords_node, aexpand_keywords_node
 from graphs.nodes.competition_score_node import competition_score_node
+from graphs.runnable import sync_async_node
 
 
 # 定义工作流B的全局状态
-class KeywordHarvestGlobalState(BaseModel):
+class KeywordHarvestGlobalState(TrustedModel):
     """工作流B的全局状态"""
     product_description: str = Field(default="", description="产品描述")
     seed_keywords: str = Field(default="", description="种子关键词")
+    bypass_expand_cache: bool = Field(default=False, description="跳过拓词结果缓存，强制调用大模型（新结果仍写入缓存）")
+    shop_id: str = Field(default="", description="店铺 ID，按店铺 / ASIN 查询搜索词历史，为空时不关联历史")
+    asin: str = Field(default="", description="ASIN，按店铺 / ASIN 查询搜索词历史")
     longtail_keywords: str = Field(default="", description="长尾关键词列表")
     keyword_recommend: List[Dict[str, Any]] = Field(default=[], description="关键词投放建议")
 
@@ -45,7 +50,8 @@ def create_keyword_harvest_graph() -> StateGraph:
     # 添加节点
     builder.add_node(
         "expand_keywords",
-        expand_keywords_node,
+        sync_async_node(expand_keywords_node, aexpand_keywords_node),
+        input_schema=ExpandKeywordsInput,
         metadata={
             "type": "agent",
             "llm_cfg": "config/expand_keywords_llm_cfg.json"
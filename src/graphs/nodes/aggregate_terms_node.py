@@ -0,0 +1,44 @@
+"""
+搜索词聚合节点
+同一搜索词按广告活动、广告组、日期在报表中重复出现，聚合后下游每个词只筛选、判断一次
+给出 shop_id 时聚合结果同时累加进该店铺 / ASIN 的搜索词历史索引，供之后运行的拓词打分关联历史点击、转化率与点击成本
+（总工作流中竞争度打分与本节点并行，本次报表不影响本次打分）
+"""
+import logging
+from typing import Dict, Any
+from langchain_core.runnables import RunnableConfig
+from langgraph.runtime import Runtime
+from coze_coding_utils.runtime_ctx.context import Context
+from graphs.state import AggregateTermsInput, AggregateTermsOutput
+from utils.report.aggregate import aggregate_by_term, aggregate_stats
+from utils.report.history import get_keyword_history
+
+logger = logging.getLogger(__name__)
+
+
+def aggregate_terms_node(
+    state: AggregateTermsInput,
+    config: RunnableConfig,
+    runtime: Runtime[Context]
+) -> AggregateTermsOutput:
+    """
+    title: 搜索词聚合
+    desc: 按归一化后的搜索词（大小写、全半角、空白统一）聚合点击数、花费、订单数等指标，可选保留每个搜索词在各广告活动/广告组下的明细
+    """
+    table = state.data
+    aggregated, breakdown = aggregate_by_term(table, keep_breakdown=state.keep_campaign_breakdown)
+    history = get_keyword_history(state.shop_id, state.asin)
+    if history is not None:
+        history.ingest(aggregated)
+
+    stats: Dict[str, Any] = aggregate_stats(table, aggregated)
+    logger.info(
+        f"搜索词聚合: 行数 {stats['rows_before']} -> {stats['rows_after']}, "
+        f"预估 token {stats['tokens_before']} -> {stats['tokens_after']}"
+    )
+
+    return AggregateTermsOutput(
+        data=aggregated,
+        campaign_breakdown=breakdown or {},
+        aggregate_stats=stats
+    )
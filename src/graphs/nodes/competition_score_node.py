@@ -1,12 +1,15 @@
 """
 竞争度打分节点
 为关键词打分并给出投放建议
+关键词一次性分词得到整列特征（词数、是否含场景词），再关联历史报表中的点击、转化率与点击成本，
+按 config/competition_score_rules.json 中的规则表整列求值（见 utils.report.scoring）；拓词节点在流式模式下用同一打分器逐行打分
 """
 from typing import List, Dict, Any
 from langchain_core.runnables import RunnableConfig
 from langgraph.runtime import Runtime
 from coze_coding_utils.runtime_ctx.context import Context
 from graphs.state import CompetitionScoreInput, CompetitionScoreOutput
+from utils.report.scoring import KeywordScorer
 
 
 def competition_score_node(
@@ -16,56 +19,10 @@ def competition_score_node(
 ) -> CompetitionScoreOutput:
     """
     title: 关键词竞争度分级
-    desc: 根据关键词长度和特征判断竞争度，给出匹配类型、出价建议等投放策略
+    desc: 根据关键词的词数、场景词与历史报表中的点击、转化率、点击成本，按可配置的规则表判断竞争度，给出匹配类型、出价建议等投放策略
     """
     text: str = state.longtail_keywords
     lines: List[str] = text.strip().split("\n")
-    
-    res: List[Dict[str, Any]] = []
-    
-    for line in lines:
-        kw = line.strip()
-        if not kw:
-            continue
-        
-        # 移除可能的序号前缀
-        if kw[0].isdigit():
-            kw = kw.split(".", 1)[-1].strip()
-            kw = kw.split(")", 1)[-1].strip()
-        
-        if not kw:
-            continue
-        
-        words = kw.split()
-        cnt = len(words)
-        
-        typ = "Exact"
-        level = "中等"
-        bid = "中"
-        reason = ""
-        
-        if cnt >= 3 and ("for" in kw.lower() or "with" in kw.lower()):
-            level = "低竞争·蓝海"
-            typ = "Exact"
-            bid = "高"
-            reason = "长词+场景精准，转化高"
-        elif cnt <= 2:
-            level = "高竞争·红海"
-            typ = "Broad"
-            bid = "低"
-            reason = "大词，竞争激烈"
-        else:
-            level = "中等竞争"
-            typ = "Phrase"
-            bid = "中"
-            reason = "可测试"
-        
-        res.append({
-            "keyword": kw,
-            "match_type": typ,
-            "competition": level,
-            "bid": bid,
-            "reason": reason
-        })
-    
+
+    res: List[Dict[str, Any]] = KeywordScorer.load(shop_id=state.shop_id, asin=state.asin).score(lines)
     return CompetitionScoreOutput(keyword_recommend=res)
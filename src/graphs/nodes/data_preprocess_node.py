@@ -2,11 +2,12 @@
 数据预处理节点
 将用户粘贴的报表文本转换为结构化JSON
 """
-from typing import List, Dict, Any
 from langchain_core.runnables import RunnableConfig
 from langgraph.runtime import Runtime
 from coze_coding_utils.runtime_ctx.context import Context
 from graphs.state import DataPreprocessInput, DataPreprocessOutput
+from utils.report.reader import read_report, read_report_lines
+from utils.report.source import open_report_lines
 
 
 def data_preprocess_node(
@@ -16,35 +17,14 @@ def data_preprocess_node(
 ) -> DataPreprocessOutput:
     """
     title: 数据预处理
-    desc: 将用户粘贴的广告报表文本解析为结构化的关键词列表，提取搜索词、点击数、花费、订单数等信息
+    desc: 将用户粘贴的广告报表文本（或对象存储 key / 本地路径 / URL 指向的报表文件）解析为结构化的关键词列表，提取搜索词、点击数、花费、订单数等信息；支持带表头的亚马逊搜索词报告（Tab/逗号分隔，含本地化列名），额外保留展示量、销售额、广告活动、广告组
     """
-    # 获取输入文本
-    text = state.report_text
-    lines: List[str] = text.strip().split("\n")
-    data: List[Dict[str, Any]] = []
+    if state.report_key or state.report_file is not None:
+        # 报表文件内存映射后逐行读取，不整体读入字符串
+        with open_report_lines(report_file=state.report_file, report_key=state.report_key) as lines:
+            table = read_report_lines(lines)
+    else:
+        # 带表头的报告按列名映射流式读取；无表头时按 "搜索词 点击数 花费 订单数" 列式批量解析，跳过无法解析的行
+        table = read_report(state.report_text)
     
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
-            
-        parts = line.split()
-        if len(parts) >= 4:
-            # 假设格式: 搜索词 点击数 花费 订单数
-            search_term = " ".join(parts[:-3])
-            try:
-                clicks = int(parts[-3])
-                spend = float(parts[-2])
-                orders = int(parts[-1])
-                
-                data.append({
-                    "search_term": search_term,
-                    "clicks": clicks,
-                    "spend": spend,
-                    "orders": orders
-                })
-            except (ValueError, IndexError):
-                # 跳过无法解析的行
-                continue
-    
-    return DataPreprocessOutput(data=data)
+    return DataPreprocessOutput(data=table)
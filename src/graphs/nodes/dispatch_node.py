@@ -17,8 +17,5 @@ def dispatch_node(
     title: 分发节点
     desc: 初始化并行分支的输入数据，确保两个分支都能正确接收到所需参数
     """
-    return DispatchOutput(
-        report_text=state.report_text,
-        product_info=state.product_info,
-        seed_keywords=state.seed_keywords
-    )
+    # 两者字段相同（AdOptimizeFields），按字段逐个透传
+    return DispatchOutput(**dict(state))
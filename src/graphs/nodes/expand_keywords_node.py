@@ -1,17 +1,192 @@
 """
 LLM场景拓词节点
 根据产品描述和种子关键词生成高转化长尾词
+种子分组后并发调用大模型，结果走拓词缓存；流式运行时逐行发出打分后的关键词；提供同步 / 异步两个版本
 """
-import os
-import json
-from typing import List, Dict, Any
-from jinja2 import Template
+import asyncio
+import math
+import logging
+import re
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from langchain_core.runnables import RunnableConfig
-from langchain_core.messages import SystemMessage, HumanMessage
+from langchain_core.messages import BaseMessage, SystemMessage, HumanMessage
 from langgraph.runtime import Runtime
 from coze_coding_utils.runtime_ctx.context import Context
 from coze_coding_dev_sdk import LLMClient
 from graphs.state import ExpandKeywordsInput, ExpandKeywordsOutput
+from utils.events import KEYWORD_RECOMMEND_EVENT, emit, has_listener
+from utils.llm.async_client import ainvoke
+from utils.llm.batch import (
+    DEFAULT_CONCURRENCY,
+    DEFAULT_RETRIES,
+    TruncatedError,
+    arun_batches,
+    is_truncated,
+    message_text,
+    run_batches,
+)
+from utils.llm.expand_cache import ExpandKey, expand_key, get_expand_cache
+from utils.llm.llm_config import load_llm_config
+from utils.llm.streaming import LineSplitter, invoke_streaming
+from utils.report.aggregate import normalize_term
+from utils.report.cluster import dedupe_terms, term_signature
+from utils.report.scoring import KeywordScorer
+
+logger = logging.getLogger(__name__)
+
+# 种子关键词之间的分隔符（中英文逗号、顿号、分号、换行）
+_SEED_SEPARATORS = re.compile(r"[,，、;；\n]+")
+DEFAULT_SEEDS_PER_CALL = 3
+DEFAULT_MAX_CALLS = 16
+
+
+def split_seeds(seed_keywords: str) -> List[str]:
+    """拆分种子关键词，归一化后重复的只保留第一个"""
+    seeds: Dict[str, str] = {}
+    for seed in _SEED_SEPARATORS.split(seed_keywords):
+        seed = seed.strip()
+        if seed:
+            seeds.setdefault(normalize_term(seed), seed)
+    return list(seeds.values())
+
+
+def group_seeds(seeds: List[str], seeds_per_call: int, max_calls: int) -> List[List[str]]:
+    """种子分组：每组 seeds_per_call 个，组数超过 max_calls 时增大每组种子数"""
+    if not seeds:
+        return [[]]
+    size = max(1, seeds_per_call, math.ceil(len(seeds) / max(1, max_calls)))
+    return [seeds[i:i + size] for i in range(0, len(seeds), size)]
+
+
+class _Expansion:
+    """一次拓词的配置、种子分组与单组调用的前后处理（同步 / 异步节点共用）"""
+
+    def __init__(self, state: ExpandKeywordsInput, config: RunnableConfig):
+        # 读取LLM配置（进程内缓存，文件修改后自动重新加载）
+        llm_cfg = load_llm_config(config)
+        _cfg = llm_cfg.raw
+        llm_config = llm_cfg.llm
+        self.sp: str = llm_cfg.sp
+        self.up_tpl = llm_cfg.up_tpl
+        self.version = llm_cfg.version
+        self.llm_params = {
+            "model": llm_config.get("model", "doubao-seed-1-8-251228"),
+            "temperature": llm_config.get("temperature", 0.7),
+            "max_completion_tokens": llm_config.get("max_completion_tokens", 4096),
+        }
+        # {"seeds_per_call": 每次调用的种子数, "max_calls": 每次拓词最多调用次数（组数上限）, "concurrency": 同时进行的调用数, "retries": 失败重试次数}
+        self.fan_out_cfg: Dict[str, Any] = _cfg.get("fan_out", {})
+
+        self.product_info: str = state.product_info
+        self.bypass_cache: bool = state.bypass_expand_cache
+        self.groups = group_seeds(
+            split_seeds(state.seed_keywords),
+            self.fan_out_cfg.get("seeds_per_call", DEFAULT_SEEDS_PER_CALL),
+            self.fan_out_cfg.get("max_calls", DEFAULT_MAX_CALLS),
+        )
+        # 只有一组时该组沿用原始种子文本（与拆分前的提示词、缓存键一致）；截断后拆出的半组仍按种子拼接
+        self.single = (self.groups[0], state.seed_keywords) if len(self.groups) == 1 else None
+        self.cache = get_expand_cache()
+
+        # 流式模式：已发出的关键词签名（各组并发调用共享，与 merge 的近重复去重规则一致）
+        self.streaming = has_listener()
+        self.scorer = KeywordScorer.load(shop_id=state.shop_id, asin=state.asin) if self.streaming else None
+        self._emitted: set = set()
+        self._stems: Dict[str, str] = {}
+        self._emit_lock = threading.Lock()
+
+    @property
+    def concurrency(self) -> int:
+        return self.fan_out_cfg.get("concurrency", DEFAULT_CONCURRENCY)
+
+    @property
+    def retries(self) -> int:
+        return self.fan_out_cfg.get("retries", DEFAULT_RETRIES)
+
+    def seed_text(self, group: List[str]) -> str:
+        if self.single is not None and group == self.single[0]:
+            return self.single[1]
+        return ", ".join(group)
+
+    def emit_keywords(self, lines: List[str]) -> None:
+        """为尚未发出过（按签名去重）的关键词打分并发出"""
+        if not self.streaming:
+            return
+        fresh = []
+        with self._emit_lock:
+            for item in self.scorer.score(lines):
+                signature = term_signature(item["keyword"], self._stems)
+                if signature not in self._emitted:
+                    self._emitted.add(signature)
+                    fresh.append(item)
+        if fresh:
+            emit(KEYWORD_RECOMMEND_EVENT, node_name="expand_keywords", keywords=fresh)
+
+    def group_listener(self) -> Tuple[Optional[Callable[[str], None]], Callable[[Any], None]]:
+        """
+        单组调用的流式处理，返回 (on_chunk, close)：on_chunk 接收模型输出片段，每凑齐一行就打分发出；
+        close 在响应结束后处理最后一行（输出被截断时最后一行不完整，丢弃）。没有监听器时 on_chunk 为 None
+        """
+        if not self.streaming:
+            return None, lambda response: None
+        splitter = LineSplitter()
+
+        def close(response: Any) -> None:
+            lines = splitter.close()
+            if not is_truncated(response):
+                self.emit_keywords(lines)
+
+        return lambda text: self.emit_keywords(splitter.feed(text)), close
+
+    def messages(self, seed_text: str) -> List[BaseMessage]:
+        # 渲染用户提示词
+        user_prompt = self.up_tpl.render({
+            "product_description": self.product_info,  # 使用 product_info 作为产品描述
+            "seed_keywords": seed_text
+        })
+        return [
+            SystemMessage(content=self.sp),
+            HumanMessage(content=user_prompt)
+        ]
+
+    def key(self, seed_text: str) -> ExpandKey:
+        return expand_key(
+            self.product_info, seed_text, self.llm_params["model"], self.llm_params["temperature"], self.version
+        )
+
+    def cached(self, seed_text: str) -> Optional[str]:
+        """查询拓词缓存，bypass_expand_cache 为真或未命中时返回 None"""
+        if self.bypass_cache:
+            return None
+        cached, tier = self.cache.get(self.key(seed_text))
+        if cached is not None:
+            logger.info(f"Expand keywords cache hit ({tier}), skipping LLM call")
+        return cached
+
+    def store(self, seed_text: str, result_text: str) -> None:
+        """写入拓词缓存；空结果不缓存，下次重新调用大模型"""
+        if result_text.strip():
+            self.cache.put(self.key(seed_text), result_text)
+
+    @staticmethod
+    def result_text(response: Any) -> str:
+        """
+        安全提取响应内容
+        输出达到 max_completion_tokens 被截断时抛出 TruncatedError（partial 为去掉不完整最后一行的输出），
+        多个种子的组被对半拆分重试，单个种子的组保留 partial，避免半个关键词进入打分
+        """
+        result_text = message_text(response)
+        if is_truncated(response):
+            partial = result_text.rstrip().rsplit("\n", 1)[0] if "\n" in result_text.strip() else ""
+            raise TruncatedError(partial)
+        return result_text
+
+    @staticmethod
+    def merge(results: List[Optional[str]]) -> str:
+        """合并各组输出，去掉完全重复与近重复（只差词形、词序、虚词）的关键词"""
+        lines = [line.strip() for text in results if text for line in text.split("\n")]
+        return "\n".join(dedupe_terms([line for line in lines if line]))
 
 
 def expand_keywords_node(
@@ -24,60 +199,49 @@ def expand_keywords_node(
     desc: 基于产品描述和种子关键词，生成亚马逊真实买家会搜的长尾词，覆盖痛点、场景、使用人群、功能属性等维度
     integrations: 大语言模型
     """
-    ctx = runtime.context
-    
-    # 读取LLM配置
-    cfg_file = os.path.join(os.getenv("COZE_WORKSPACE_PATH", ""), config.get("metadata", {}).get("llm_cfg", ""))
-    if not cfg_file or not os.path.exists(cfg_file):
-        llm_config = {}
-        sp = ""
-        up = ""
-    else:
-        with open(cfg_file, 'r', encoding='utf-8') as fd:
-            _cfg = json.load(fd)
-        llm_config = _cfg.get("config", {})
-        sp = _cfg.get("sp", "")
-        up = _cfg.get("up", "")
-    
-    # 获取输入数据
-    product_info: str = state.product_info
-    seed_keywords: str = state.seed_keywords
-    
-    # 渲染用户提示词
-    up_tpl = Template(up)
-    user_prompt = up_tpl.render({
-        "product_description": product_info,  # 使用 product_info 作为产品描述
-        "seed_keywords": seed_keywords
-    })
-    
-    # 构建消息
-    messages = [
-        SystemMessage(content=sp),
-        HumanMessage(content=user_prompt)
-    ]
-    
-    # 调用LLM
-    client = LLMClient(ctx=ctx)
-    response = client.invoke(
-        messages=messages,
-        model=llm_config.get("model", "doubao-seed-1-8-251228"),
-        temperature=llm_config.get("temperature", 0.7),
-        max_completion_tokens=llm_config.get("max_completion_tokens", 4096)
-    )
-    
-    # 安全提取响应内容
-    content = response.content
-    if isinstance(content, str):
-        result_text = content
-    elif isinstance(content, list):
-        text_parts = []
-        for item in content:
-            if isinstance(item, dict) and item.get("type") == "text":
-                text_parts.append(item.get("text", ""))
-            elif isinstance(item, str):
-                text_parts.append(item)
-        result_text = " ".join(text_parts)
-    else:
-        result_text = str(content)
-    
-    return ExpandKeywordsOutput(longtail_keywords=result_text)
+    expansion = _Expansion(state, config)
+    client = LLMClient(ctx=runtime.context)
+
+    def expand(group: List[str]) -> str:
+        seed_text = expansion.seed_text(group)
+        cached = expansion.cached(seed_text)
+        if cached is not None:
+            expansion.emit_keywords(cached.split("\n"))
+            return cached
+        # 调用LLM
+        on_chunk, close = expansion.group_listener()
+        response = invoke_streaming(client, expansion.messages(seed_text), on_chunk, **expansion.llm_params)
+        close(response)
+        result_text = expansion.result_text(response)
+        expansion.store(seed_text, result_text)
+        return result_text
+
+    results = run_batches(expansion.groups, expand, concurrency=expansion.concurrency, retries=expansion.retries)
+    return ExpandKeywordsOutput(longtail_keywords=expansion.merge(results))
+
+
+async def aexpand_keywords_node(
+    state: ExpandKeywordsInput,
+    config: RunnableConfig,
+    runtime: Runtime[Context]
+) -> ExpandKeywordsOutput:
+    """expand_keywords_node 的异步版本：各组大模型调用为协程，任务取消时中断进行中的请求"""
+    expansion = await asyncio.to_thread(_Expansion, state, config)
+    client = LLMClient(ctx=runtime.context)
+
+    async def aexpand(group: List[str]) -> str:
+        seed_text = expansion.seed_text(group)
+        # 持久层读写是阻塞 IO，放到线程中执行
+        cached = await asyncio.to_thread(expansion.cached, seed_text)
+        if cached is not None:
+            expansion.emit_keywords(cached.split("\n"))
+            return cached
+        on_chunk, close = expansion.group_listener()
+        response = await ainvoke(client, expansion.messages(seed_text), on_chunk=on_chunk, **expansion.llm_params)
+        close(response)
+        result_text = expansion.result_text(response)
+        await asyncio.to_thread(expansion.store, seed_text, result_text)
+        return result_text
+
+    results = await arun_batches(expansion.groups, aexpand, concurrency=expansion.concurrency, retries=expansion.retries)
+    return ExpandKeywordsOutput(longtail_keywords=expansion.merge(results))
@@ -1,12 +1,18 @@
 """
 合并否定词节点
-合并统计否定词和语义否定词
+合并统计否定词和语义否定词：按归一化搜索词去重，语义否定词从报表补全指标，
+再把能由少量词组覆盖的否定词合并为词组否定（见 utils.report.negatives），其余保留为精确否定
 """
-from typing import List, Dict, Any
+from typing import List
+import numpy as np
 from langchain_core.runnables import RunnableConfig
 from langgraph.runtime import Runtime
 from coze_coding_utils.runtime_ctx.context import Context
 from graphs.state import MergeNegativesInput, MergeNegativesOutput
+from utils.llm.verdict_cache import parse_verdict_lines
+from utils.report.aggregate import normalize_term
+from utils.report.negatives import collapse_phrases, dedupe_negatives, report_metrics
+from utils.report.table import KeywordTable
 
 
 def merge_negatives_node(
@@ -16,43 +22,47 @@ def merge_negatives_node(
 ) -> MergeNegativesOutput:
     """
     title: 合并否定词
-    desc: 将统计规则筛选出的否定词与语义判断出的不相关词合并，生成最终的否定关键词列表
+    desc: 将统计规则筛选出的否定词与语义判断出的不相关词去重合并，覆盖多个否定词且不影响有转化搜索词的词组合并为词组否定，生成最终的否定关键词列表
     """
-    bad_keywords: List[Dict[str, Any]] = state.bad_keywords
+    bad_keywords: KeywordTable = state.bad_keywords
     semantic_bad: str = state.semantic_bad
+    report: KeywordTable = state.data
     
     # 解析语义否定词
-    semantic_list: List[Dict[str, Any]] = []
+    parsed = parse_verdict_lines(semantic_bad) if semantic_bad else []
+    semantic_terms: List[str] = [term for term, _ in parsed]
+    semantic_reasons: List[str] = [reason for _, reason in parsed]
     
-    if semantic_bad:
-        semantic_lines = semantic_bad.strip().split("\n")
-        for line in semantic_lines:
-            line = line.strip()
-            if not line:
-                continue
-            
-            if "|" in line:
-                parts = line.split("|")
-                st = parts[0].strip()
-                reason = parts[1].strip() if len(parts) > 1 else "语义不相关"
-                semantic_list.append({
-                    "search_term": st,
-                    "clicks": 0,
-                    "spend": 0.0,
-                    "orders": 0,
-                    "reason": reason
-                })
-            elif line:
-                # 如果没有分隔符，整行作为搜索词
-                semantic_list.append({
-                    "search_term": line,
-                    "clicks": 0,
-                    "spend": 0.0,
-                    "orders": 0,
-                    "reason": "语义不相关"
-                })
+    n = len(semantic_terms)
+    semantic_columns = {
+        "clicks": np.zeros(n, dtype=np.int64),
+        "spend": np.zeros(n, dtype=np.float64),
+        "orders": np.zeros(n, dtype=np.int64),
+    }
+    if n and len(report):
+        # 语义否定词来自报表，按搜索词查回其指标
+        semantic_columns.update(report_metrics([normalize_term(term) for term in semantic_terms], report))
+    semantic_table = KeywordTable(
+        search_term=np.array(semantic_terms, dtype=object),
+        reason=np.array(semantic_reasons, dtype=object),
+        **semantic_columns
+    )
     
-    # 合并两个列表
-    final_list = bad_keywords + semantic_list
+    # 合并两个列表（语义否定词缺少的报表列填默认值），同一个词保留统计否定词的一行
+    merged = KeywordTable.concat([bad_keywords, semantic_table])
+    deduped, terms = dedupe_negatives(merged)
     
-    return MergeNegativesOutput(final_negative_list=final_list)
+    # 词组合并需要整份报表判断词组是否会否定有转化的搜索词，没有报表时只去重
+    min_cover = state.negative_phrase_min_cover if len(report) else 0
+    converting = [normalize_term(term) for term in report.search_term[report.orders > 0].tolist()]
+    final_list, phrase_stats = collapse_phrases(deduped, terms, converting, min_cover)
+    
+    stats = {
+        "statistical": len(bad_keywords),
+        "semantic": n,
+        "duplicates": len(merged) - len(deduped),
+        **phrase_stats,
+        "exact": len(deduped) - phrase_stats["phrase_covered"],
+        "final": len(final_list),
+    }
+    return MergeNegativesOutput(final_negative_list=final_list, negative_merge_stats=stats)
@@ -1,12 +1,15 @@
 """
 汇聚节点
 合并流量清洗和关键词收割两个分支的结果
+推荐词用本次运行的否定词与报表搜索词交叉校验（倒排索引，见 utils.report.term_index）：
+与否定词冲突的按 recommend_conflict_action 标记或剔除，报表中已有的附带其报表表现
 """
 from typing import List, Dict, Any
 from langchain_core.runnables import RunnableConfig
 from langgraph.runtime import Runtime
 from coze_coding_utils.runtime_ctx.context import Context
 from graphs.state import MergeResultInput, MergeResultOutput
+from utils.report.term_index import DEFAULT_CONFLICT_ACTION, cross_check
 
 
 def merge_result_node(
@@ -16,14 +19,20 @@ def merge_result_node(
 ) -> MergeResultOutput:
     """
     title: 结果汇聚
-    desc: 合并流量清洗分支的否定关键词和关键词收割分支的新增关键词建议，输出最终的广告优化方案
+    desc: 合并流量清洗分支的否定关键词和关键词收割分支的新增关键词建议，剔除或标记与否定词冲突的推荐词，并为报表中已有的推荐词附上报表表现，输出最终的广告优化方案
     """
-    # 获取两个分支的结果
-    final_negative_list: List[Dict[str, Any]] = state.final_negative_list
-    keyword_recommend: List[Dict[str, Any]] = state.keyword_recommend
+    # 获取两个分支的结果；否定词列式表只在输出边界转换为 List[Dict]
+    final_negative_list: List[Dict[str, Any]] = state.final_negative_list.to_records()
+    keyword_recommend, check_stats = cross_check(
+        state.keyword_recommend,
+        state.final_negative_list,
+        state.data,
+        action=state.recommend_conflict_action or DEFAULT_CONFLICT_ACTION
+    )
     
     # 返回合并后的结果
     return MergeResultOutput(
         negative_keywords=final_negative_list,
-        recommend_keywords=keyword_recommend
+        recommend_keywords=keyword_recommend,
+        recommend_check_stats=check_stats
     )
@@ -0,0 +1,27 @@
+"""
+n-gram 花费挖掘节点
+按 1-gram、2-gram、3-gram 汇总整份报表的点击、花费与订单，找出分散在大量低点击搜索词中、累计花费却没有转化的词组，
+作为词组否定候选（规则见 config/ngram_mining_rules.json）
+"""
+import logging
+from langchain_core.runnables import RunnableConfig
+from langgraph.runtime import Runtime
+from coze_coding_utils.runtime_ctx.context import Context
+from graphs.state import NgramMiningInput, NgramMiningOutput
+from utils.report.mining import load_mining_config, mine_ngrams
+
+logger = logging.getLogger(__name__)
+
+
+def ngram_mining_node(
+    state: NgramMiningInput,
+    config: RunnableConfig,
+    runtime: Runtime[Context]
+) -> NgramMiningOutput:
+    """
+    title: n-gram 花费挖掘
+    desc: 将搜索词拆成 1~3 个连续词的词组，按词组汇总整份报表的点击、花费与订单，标记有花费无转化的词组作为词组否定候选
+    """
+    candidates, stats = mine_ngrams(state.data, load_mining_config())
+    logger.info(f"N-gram mining: {stats}")
+    return NgramMiningOutput(ngram_negative_candidates=candidates, ngram_mining_stats=stats)
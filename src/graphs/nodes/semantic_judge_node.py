@@ -1,17 +1,266 @@
 """
 LLM语义相关性判断节点
 判断剩余词是否与产品无关（品类错配、属性冲突）
+剩余词经本地预筛、近重复聚类与结果缓存后，未命中的词分批并发调用大模型；提供同步 / 异步两个版本
 """
-import os
-import json
-from typing import List, Dict, Any
-from jinja2 import Template
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from langchain_core.runnables import RunnableConfig
-from langchain_core.messages import SystemMessage, HumanMessage
+from langchain_core.messages import BaseMessage, SystemMessage, HumanMessage
 from langgraph.runtime import Runtime
 from coze_coding_utils.runtime_ctx.context import Context
 from coze_coding_dev_sdk import LLMClient
 from graphs.state import SemanticJudgeInput, SemanticJudgeOutput
+from utils.events import NEGATIVE_KEYWORD_EVENT, emit, has_listener
+from utils.llm.async_client import ainvoke
+from utils.llm.batch import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_CONCURRENCY,
+    DEFAULT_RETRIES,
+    TruncatedError,
+    arun_batches,
+    is_truncated,
+    message_text,
+    run_batches,
+)
+from utils.llm.budget import pack_batches, prompt_tokens, token_budget
+from utils.llm.llm_config import load_llm_config
+from utils.llm.streaming import invoke_streaming
+from utils.llm.verdict_cache import (
+    Verdict,
+    VerdictKey,
+    VerdictLineParser,
+    cache_stats,
+    get_verdict_cache,
+    parse_verdict_lines,
+    product_hash,
+)
+from utils.report.aggregate import normalize_term
+from utils.report.cluster import cluster_stats, cluster_terms
+from utils.report.similarity import (
+    DEFAULT_KEEP_THRESHOLD,
+    PREFILTER_REJECT_REASON,
+    prefilter_stats,
+    prefilter_terms,
+)
+from utils.report.table import KeywordTable
+
+logger = logging.getLogger(__name__)
+
+
+class _Judgement:
+    """
+    一次语义判断的准备与收尾：构造时完成读取配置、预筛、聚类、查缓存与装箱，
+    大模型调用由同步 / 异步节点各自完成，finish 解析各批次输出、写缓存并生成节点输出
+    """
+
+    def __init__(self, state: SemanticJudgeInput, config: RunnableConfig):
+        # 读取LLM配置（进程内缓存，文件修改后自动重新加载）
+        llm_cfg = load_llm_config(config)
+        _cfg = llm_cfg.raw
+        llm_config = llm_cfg.llm
+        self.sp = llm_cfg.sp
+        self.up_tpl = llm_cfg.up_tpl
+        self.batch_cfg: Dict[str, Any] = _cfg.get("batch", {})
+        self.llm_params: Dict[str, Any] = {
+            "model": llm_config.get("model", "doubao-seed-1-8-251228"),
+            "temperature": llm_config.get("temperature", 0.3),
+            "max_completion_tokens": llm_config.get("max_completion_tokens", 4096),
+        }
+
+        # 获取输入数据
+        remaining_keywords: KeywordTable = state.remaining_keywords
+        self.product_info: str = state.product_info
+        self.terms = [term for term in remaining_keywords.search_term.tolist() if term]
+
+        # 本地预筛：与产品信息 n-gram 覆盖度高的词直接判为相关（可选：覆盖度极低的词直接否定），只有中间段继续判断
+        prefilter_cfg = _cfg.get("prefilter", {})
+        self.local_bad: Dict[str, str] = {}
+        self.prefilter_info: Dict[str, Any] = {}
+        judge_terms = self.terms
+        if prefilter_cfg.get("enabled", False):
+            prefiltered = prefilter_terms(
+                self.product_info,
+                self.terms,
+                keep_threshold=prefilter_cfg.get("keep_threshold", DEFAULT_KEEP_THRESHOLD),
+                reject_threshold=prefilter_cfg.get("reject_threshold", 0.0),
+                n=prefilter_cfg.get("ngram", 3)
+            )
+            self.prefilter_info = prefilter_stats(self.terms, prefiltered)
+            self.local_bad = {
+                term: PREFILTER_REJECT_REASON for term, bad in zip(self.terms, prefiltered.reject.tolist()) if bad
+            }
+            judge_terms = [term for term, ambiguous in zip(self.terms, prefiltered.ambiguous.tolist()) if ambiguous]
+
+        # 近重复词聚类：每簇只判断代表词（簇内第一个词），结果展开到簇内所有词
+        cluster_cfg = _cfg.get("cluster", {})
+        self.cluster_info: Dict[str, Any] = {}
+        self.representative_of: Dict[str, str] = {}
+        if cluster_cfg.get("enabled", False) and judge_terms:
+            codes, firsts = cluster_terms(judge_terms)
+            self.cluster_info = cluster_stats(len(judge_terms), len(firsts))
+            representatives = [judge_terms[i] for i in firsts.tolist()]
+            self.representative_of = {term: representatives[code] for term, code in zip(judge_terms, codes.tolist())}
+            judge_terms = representatives
+
+        # 按 (产品信息, 归一化搜索词, 模型, 提示词版本) 查缓存，只有未命中的词送给大模型
+        p_hash = product_hash(self.product_info)
+        version = llm_cfg.version
+        self.term_keys: Dict[str, VerdictKey] = {
+            term: VerdictKey(p_hash, normalize_term(term), self.llm_params["model"], version) for term in judge_terms
+        }
+        unique_keys: Dict[str, VerdictKey] = {key.cache_key: key for key in self.term_keys.values()}
+        self.cache = get_verdict_cache()
+        self.verdicts, hits = self.cache.get_many(list(unique_keys))
+        self.stats = cache_stats(len(unique_keys), **hits)
+
+        # 同一归一化词只判断一次
+        self.missed: Dict[str, str] = {}
+        for term, key in self.term_keys.items():
+            if key.cache_key not in self.verdicts:
+                self.missed.setdefault(key.cache_key, term)
+
+        # 按 token 预算装箱：输入不超出上下文窗口，预计输出不超出 max_completion_tokens
+        budget = token_budget(
+            llm_config,
+            _cfg.get("budget", {}),
+            prompt_tokens(self.sp, self.up_tpl.render({"product_info": self.product_info, "keywords_text": ""}))
+        )
+        self.batches = pack_batches(
+            list(self.missed.values()), budget, max_items=self.batch_cfg.get("size", DEFAULT_BATCH_SIZE)
+        )
+
+        # 增量事件：每个缓存键对应的全部搜索词（同簇成员、同归一化词），已发出的词不重复发出
+        self.streaming = has_listener()
+        self.targets: Dict[str, List[str]] = {}
+        if self.streaming:
+            for term in self.terms:
+                key = self.term_keys.get(self.representative_of.get(term, term))
+                if key is not None and term not in self.local_bad:
+                    self.targets.setdefault(key.cache_key, []).append(term)
+        self._emitted: set = set()
+        self._emit_lock = threading.Lock()
+
+    def emit_negatives(self, negatives: List[Tuple[str, str]]) -> None:
+        """发出尚未发出过的否定词"""
+        with self._emit_lock:
+            fresh = [(term, reason) for term, reason in negatives if term not in self._emitted]
+            self._emitted.update(term for term, _ in fresh)
+        if fresh:
+            emit(
+                NEGATIVE_KEYWORD_EVENT,
+                node_name="semantic_judge",
+                negatives=[{"search_term": term, "reason": reason} for term, reason in fresh]
+            )
+
+    def emit_known(self) -> None:
+        """调用大模型前先发出本地否定与缓存命中的否定词"""
+        if not self.streaming:
+            return
+        negatives = list(self.local_bad.items())
+        for cache_key, terms in self.targets.items():
+            verdict = self.verdicts.get(cache_key)
+            if verdict is not None and verdict.is_bad:
+                negatives.extend((term, verdict.reason) for term in terms)
+        self.emit_negatives(negatives)
+
+    def batch_listener(self, batch: List[str]) -> Tuple[Optional[Callable[[str], None]], Callable[[], None]]:
+        """
+        单个批次的流式解析，返回 (on_chunk, close)：on_chunk 接收模型输出片段，每凑齐一行就发出对应的否定词；
+        close 在响应结束后解析最后一行。没有监听器时 on_chunk 为 None
+        """
+        if not self.streaming:
+            return None, lambda: None
+        parser = VerdictLineParser()
+        batch_keys = {self.term_keys[term].search_term: self.term_keys[term].cache_key for term in batch}
+
+        def expand(verdicts: List[Tuple[str, str]]) -> None:
+            negatives = []
+            for term, reason in verdicts:
+                cache_key = batch_keys.get(normalize_term(term))
+                negatives.extend((member, reason) for member in self.targets.get(cache_key, [term]))
+            self.emit_negatives(negatives)
+
+        return lambda text: expand(parser.feed(text)), lambda: expand(parser.close())
+
+    def messages(self, batch: List[str]) -> List[BaseMessage]:
+        """渲染单个批次的提示词"""
+        user_prompt = self.up_tpl.render({
+            "product_info": self.product_info,
+            "keywords_text": "\n".join(batch)
+        })
+        return [
+            SystemMessage(content=self.sp),
+            HumanMessage(content=user_prompt)
+        ]
+
+    @staticmethod
+    def response_text(response: Any) -> str:
+        """提取批次输出；被截断时抛出 TruncatedError 交给批次调度拆分重试（截断的最后一行可能不完整，不保留）"""
+        text = message_text(response).strip()
+        if is_truncated(response):
+            raise TruncatedError(text.rsplit("\n", 1)[0] if "\n" in text else "")
+        return text
+
+    def finish(self, results: List[Optional[str]], llm_seconds: float) -> SemanticJudgeOutput:
+        """解析各批次输出、写缓存，按剩余词原顺序生成否定词"""
+        if self.prefilter_info:
+            # 按本次每个词的平均大模型耗时估算预筛节省的时间
+            decided = self.prefilter_info["auto_kept"] + self.prefilter_info["auto_rejected"]
+            self.prefilter_info["llm_seconds"] = round(llm_seconds, 2)
+            self.prefilter_info["latency_saved_seconds"] = (
+                round(llm_seconds / len(self.missed) * decided, 2) if self.missed else 0.0
+            )
+
+        # 模型未列出的词判为相关；输出中无法对应到本批次搜索词的行原样保留（不缓存）
+        # 重试后仍失败的批次不写缓存，其中的词未经判断、按相关处理，数量记入统计
+        new_entries: List[Tuple[VerdictKey, Verdict]] = []
+        extra_lines: List[str] = []
+        failed_keys: set = set()
+        failed_batches = 0
+        for batch, text in zip(self.batches, results):
+            if text is None:
+                failed_batches += 1
+                failed_keys.update(self.term_keys[term].cache_key for term in batch)
+                continue
+            listed = {normalize_term(term): (term, reason) for term, reason in parse_verdict_lines(text)}
+            for term in batch:
+                key = self.term_keys[term]
+                item = listed.pop(key.search_term, None)
+                verdict = Verdict(True, item[1]) if item else Verdict(False)
+                self.verdicts[key.cache_key] = verdict
+                new_entries.append((key, verdict))
+            extra_lines.extend(f"{term} | {reason}" for term, reason in listed.values())
+        self.cache.put_many(new_entries)
+
+        # 按剩余词原顺序输出否定词，簇成员取代表词的判断结果
+        lines = []
+        failed_terms = 0
+        for term in self.terms:
+            if term in self.local_bad:
+                lines.append(f"{term} | {self.local_bad[term]}")
+                continue
+            key = self.term_keys.get(self.representative_of.get(term, term))
+            if key is not None and key.cache_key in failed_keys:
+                failed_terms += 1
+                continue
+            verdict = self.verdicts.get(key.cache_key) if key is not None else None
+            if verdict is not None and verdict.is_bad:
+                lines.append(f"{term} | {verdict.reason}")
+        result_text = "\n".join(lines + extra_lines)
+        if failed_batches:
+            self.stats.update(failed_batches=failed_batches, failed_terms=failed_terms)
+            logger.error(f"语义判断: {failed_batches} 个批次重试后仍失败，{failed_terms} 个搜索词未经判断")
+
+        return SemanticJudgeOutput(
+            semantic_bad=result_text,
+            semantic_cache_stats=self.stats,
+            semantic_prefilter_stats=self.prefilter_info,
+            semantic_cluster_stats=self.cluster_info
+        )
 
 
 def semantic_judge_node(
@@ -21,74 +270,57 @@ def semantic_judge_node(
 ) -> SemanticJudgeOutput:
     """
     title: 语义相关性判断
-    desc: 使用大模型判断剩余关键词是否与产品不相关，识别品类错误和属性冲突的词
+    desc: 使用大模型判断剩余关键词是否与产品不相关，识别品类错误和属性冲突的词；与产品信息字面高度重合的词本地直接保留，只差词形、词序的近重复词只判断一个代表词，判断结果按产品与搜索词缓存，只有未命中缓存的词调用大模型
     integrations: 大语言模型
     """
-    ctx = runtime.context
-    
-    # 读取LLM配置
-    cfg_file = os.path.join(os.getenv("COZE_WORKSPACE_PATH", ""), config.get("metadata", {}).get("llm_cfg", ""))
-    if not cfg_file or not os.path.exists(cfg_file):
-        # 使用默认配置
-        llm_config = {}
-        sp = ""
-        up = ""
-    else:
-        with open(cfg_file, 'r', encoding='utf-8') as fd:
-            _cfg = json.load(fd)
-        llm_config = _cfg.get("config", {})
-        sp = _cfg.get("sp", "")
-        up = _cfg.get("up", "")
-    
-    # 获取输入数据
-    remaining_keywords: List[Dict[str, Any]] = state.remaining_keywords
-    product_info: str = state.product_info
-    
-    if not remaining_keywords:
-        return SemanticJudgeOutput(semantic_bad="")
-    
-    # 构建搜索词列表
-    keywords_text = "\n".join([
-        item.get("search_term", "") 
-        for item in remaining_keywords 
-        if item.get("search_term")
-    ])
-    
-    # 渲染用户提示词
-    up_tpl = Template(up)
-    user_prompt = up_tpl.render({
-        "product_info": product_info,
-        "keywords_text": keywords_text
-    })
-    
-    # 构建消息
-    messages = [
-        SystemMessage(content=sp),
-        HumanMessage(content=user_prompt)
-    ]
-    
-    # 调用LLM
-    client = LLMClient(ctx=ctx)
-    response = client.invoke(
-        messages=messages,
-        model=llm_config.get("model", "doubao-seed-1-8-251228"),
-        temperature=llm_config.get("temperature", 0.3),
-        max_completion_tokens=llm_config.get("max_completion_tokens", 4096)
+    if not len(state.remaining_keywords):
+        return SemanticJudgeOutput(semantic_bad="", semantic_cache_stats=cache_stats(0))
+
+    judgement = _Judgement(state, config)
+    judgement.emit_known()
+    client = LLMClient(ctx=runtime.context)
+
+    def judge_batch(batch: List[str]) -> str:
+        on_chunk, close = judgement.batch_listener(batch)
+        response = invoke_streaming(client, judgement.messages(batch), on_chunk, **judgement.llm_params)
+        close()
+        return judgement.response_text(response)
+
+    # 各批次并发调用，失败批次单独重试
+    started = time.perf_counter()
+    results = run_batches(
+        judgement.batches,
+        judge_batch,
+        concurrency=judgement.batch_cfg.get("concurrency", DEFAULT_CONCURRENCY),
+        retries=judgement.batch_cfg.get("retries", DEFAULT_RETRIES)
+    )
+    return judgement.finish(results, time.perf_counter() - started)
+
+
+async def asemantic_judge_node(
+    state: SemanticJudgeInput,
+    config: RunnableConfig,
+    runtime: Runtime[Context]
+) -> SemanticJudgeOutput:
+    """semantic_judge_node 的异步版本：预筛、聚类与查缓存在线程中完成，大模型调用为协程，任务取消时中断进行中的请求"""
+    if not len(state.remaining_keywords):
+        return SemanticJudgeOutput(semantic_bad="", semantic_cache_stats=cache_stats(0))
+
+    judgement = await asyncio.to_thread(_Judgement, state, config)
+    judgement.emit_known()
+    client = LLMClient(ctx=runtime.context)
+
+    async def judge_batch(batch: List[str]) -> str:
+        on_chunk, close = judgement.batch_listener(batch)
+        response = await ainvoke(client, judgement.messages(batch), on_chunk=on_chunk, **judgement.llm_params)
+        close()
+        return judgement.response_text(response)
+
+    started = time.perf_counter()
+    results = await arun_batches(
+        judgement.batches,
+        judge_batch,
+        concurrency=judgement.batch_cfg.get("concurrency", DEFAULT_CONCURRENCY),
+        retries=judgement.batch_cfg.get("retries", DEFAULT_RETRIES)
     )
-    
-    # 安全提取响应内容
-    content = response.content
-    if isinstance(content, str):
-        result_text = content
-    elif isinstance(content, list):
-        text_parts = []
-        for item in content:
-            if isinstance(item, dict) and item.get("type") == "text":
-                text_parts.append(item.get("text", ""))
-            elif isinstance(item, str):
-                text_parts.append(item)
-        result_text = " ".join(text_parts)
-    else:
-        result_text = str(content)
-    
-    return SemanticJudgeOutput(semantic_bad=result_text)
+    return await asyncio.to_thread(judgement.finish, results, time.perf_counter() - started)
@@ -1,12 +1,15 @@
 """
 统计规则筛选节点
-硬规则判断亏损词：高点击零单、高花费零单
+按声明式规则判断亏损词（默认：高点击零单、高花费零单），规则可按店铺 / ASIN 配置或随请求传入；
+也可切换为显著性模式（bayes / binomial），否定转化率显著低于账户基线的词
 """
-from typing import List, Dict, Any
+import numpy as np
 from langchain_core.runnables import RunnableConfig
 from langgraph.runtime import Runtime
 from coze_coding_utils.runtime_ctx.context import Context
 from graphs.state import StatsFilterInput, StatsFilterOutput
+from utils.report.rules import apply_rules, load_rule_config, resolve_rule_set
+from utils.report.table import KeywordTable
 
 
 def stats_filter_node(
@@ -16,42 +19,24 @@ def stats_filter_node(
 ) -> StatsFilterOutput:
     """
     title: 统计规则筛选
-    desc: 根据硬规则判断亏损词，识别高点击无转化和高花费无转化的关键词
+    desc: 根据统计规则判断亏损词（如高点击无转化、高花费无转化、ACOS 超标、转化率显著低于基线），规则编译为整列布尔掩码，每个词取第一条命中规则的原因
     """
-    data: List[Dict[str, Any]] = state.data
-    avg_price = 20.0  # 平均价格，可用于调整阈值
+    data: KeywordTable = state.data
+    rule_set = resolve_rule_set(
+        load_rule_config(),
+        shop_id=state.shop_id,
+        asin=state.asin,
+        rules=state.filter_rules,
+        params=state.filter_params,
+        mode=state.filter_mode
+    )
     
-    bad_keywords: List[Dict[str, Any]] = []
-    normal_keywords: List[Dict[str, Any]] = []
+    reasons = apply_rules(data, rule_set)
+    is_bad = np.not_equal(reasons, None)
     
-    for row in data:
-        st = str(row.get("search_term", ""))
-        cli = int(row.get("clicks", 0))
-        spe = float(row.get("spend", 0.0))
-        ords = int(row.get("orders", 0))
-        
-        reason = None
-        if ords == 0:
-            if cli > 10:
-                reason = "高点击无转化"
-            elif spe > avg_price / 2:
-                reason = "高花费无转化"
-        
-        if reason:
-            bad_keywords.append({
-                "search_term": st,
-                "clicks": cli,
-                "spend": spe,
-                "orders": ords,
-                "reason": reason
-            })
-        else:
-            normal_keywords.append({
-                "search_term": st,
-                "clicks": cli,
-                "spend": spe,
-                "orders": ords
-            })
+    # 保留报表中的其余列（展示量、销售额、广告活动等），供下游节点使用
+    bad_keywords = data.take(is_bad).with_column("reason", reasons[is_bad])
+    normal_keywords = data.take(~is_bad)
     
     return StatsFilterOutput(
         bad_keywords=bad_keywords,
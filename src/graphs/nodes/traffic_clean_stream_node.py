@@ -0,0 +1,180 @@
+"""
+流量清洗流式节点
+按固定行数分块读取报表，每个分块依次经过 预处理 → 块内搜索词聚合 → 统计筛选 → 语义判断 → 合并否定词，
+各阶段以生成器串联，任一时刻只有一个分块的中间数据驻留内存；跨块只累计否定词与去重后的有转化搜索词（集合），各块聚合结果累加进搜索词历史索引
+块内合并否定词只做去重，全部分块处理完后再跨块去重，剔除在任一分块中有转化的搜索词，并按各块累计的有转化搜索词做一次词组合并
+注意：统计筛选的阈值与贝叶斯基线按分块计算，结果可能与整份报表一次性处理（traffic_clean_graph）不同
+"""
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+import numpy as np
+from langchain_core.runnables import RunnableConfig
+from langgraph.runtime import Runtime
+from coze_coding_utils.runtime_ctx.context import Context
+from graphs.state import (
+    TrafficCleanStreamInput,
+    TrafficCleanStreamOutput,
+    StatsFilterInput,
+    StatsFilterOutput,
+    SemanticJudgeInput,
+    SemanticJudgeOutput,
+    MergeNegativesInput,
+)
+from graphs.nodes.stats_filter_node import stats_filter_node
+from graphs.nodes.semantic_judge_node import semantic_judge_node
+from graphs.nodes.merge_negatives_node import merge_negatives_node
+from utils.llm.verdict_cache import combine_cache_stats
+from utils.report.aggregate import aggregate_by_term, aggregate_stats, normalize_term
+from utils.report.cluster import combine_cluster_stats
+from utils.report.history import KeywordHistory, get_keyword_history
+from utils.report.negatives import collapse_phrases, dedupe_negatives
+from utils.report.similarity import combine_prefilter_stats
+from utils.report.reader import iter_report_chunks
+from utils.report.table import KeywordTable
+from utils.report.source import open_report_lines
+
+
+def traffic_clean_stream_node(
+    state: TrafficCleanStreamInput,
+    config: RunnableConfig,
+    runtime: Runtime[Context]
+) -> TrafficCleanStreamOutput:
+    """
+    title: 流量清洗（流式）
+    desc: 将报表按固定行数分块，每块依次完成数据预处理、统计规则筛选、语义相关性判断与否定词合并，峰值内存由分块大小决定而非报表大小；统计阈值与贝叶斯基线按分块评估
+    integrations: 大语言模型
+    """
+    chunk_rows = max(1, state.chunk_rows)
+    with open_report_lines(state.report_text, state.report_file, state.report_key) as lines:
+        final_list, agg_stats, cache_stats, prefilter_stats, cluster_stats, merge_stats = _clean_chunks(lines, chunk_rows, state, config, runtime)
+    return TrafficCleanStreamOutput(
+        final_negative_list=final_list,
+        aggregate_stats=agg_stats,
+        semantic_cache_stats=cache_stats,
+        semantic_prefilter_stats=prefilter_stats,
+        semantic_cluster_stats=cluster_stats,
+        negative_merge_stats=merge_stats
+    )
+
+
+def _clean_chunks(
+    lines: Iterator[str],
+    chunk_rows: int,
+    state: TrafficCleanStreamInput,
+    config: RunnableConfig,
+    runtime: Runtime[Context]
+) -> Tuple[KeywordTable, Dict[str, Any], Dict[str, Any], Dict[str, Any], Dict[str, Any], Dict[str, Any]]:
+    """
+    逐块执行 预处理 → 统计筛选 → 语义判断 → 合并否定词，
+    返回 (否定词列表, 聚合统计, 语义判断缓存命中统计, 预筛统计, 聚类统计, 否定词合并统计)
+    """
+    # 阶段1：数据预处理 + 块内按搜索词聚合，逐块产出结构化关键词
+    history = get_keyword_history(state.shop_id, state.asin)
+    agg_stats: Dict[str, Any] = {}
+    chunks: Iterator[KeywordTable] = (
+        _aggregate(history, table, agg_stats)
+        for table in iter_report_chunks(lines, chunk_rows)
+        if len(table)
+    )
+
+    # 阶段2：统计规则筛选
+    filtered: Iterator[Tuple[KeywordTable, StatsFilterOutput]] = (
+        (
+            data,
+            stats_filter_node(
+                StatsFilterInput(
+                    data=data,
+                    shop_id=state.shop_id,
+                    asin=state.asin,
+                    filter_rules=state.filter_rules,
+                    filter_params=state.filter_params,
+                    filter_mode=state.filter_mode
+                ),
+                config,
+                runtime
+            )
+        )
+        for data in chunks
+    )
+
+    # 阶段3：语义判断
+    judged: Iterator[Tuple[KeywordTable, StatsFilterOutput, SemanticJudgeOutput]] = (
+        (
+            data,
+            f,
+            semantic_judge_node(
+                SemanticJudgeInput(remaining_keywords=f.remaining_keywords, product_info=state.product_info),
+                config,
+                runtime
+            )
+        )
+        for data, f in filtered
+    )
+
+    # 阶段4：与本块的统计否定词合并去重，并累计各块的缓存命中、预筛、聚类统计与有转化的搜索词
+    final_parts: List[KeywordTable] = []
+    cache_parts: List[Dict[str, Any]] = []
+    prefilter_parts: List[Dict[str, Any]] = []
+    cluster_parts: List[Dict[str, Any]] = []
+    # 有转化的归一化搜索词（跨块去重，只随不同的有转化词数增长）
+    converting: Set[str] = set()
+    statistical = semantic_count = 0
+    for data, f, semantic in judged:
+        cache_parts.append(semantic.semantic_cache_stats)
+        prefilter_parts.append(semantic.semantic_prefilter_stats)
+        cluster_parts.append(semantic.semantic_cluster_stats)
+        converting.update(normalize_term(term) for term in data.search_term[data.orders > 0].tolist())
+        merged = merge_negatives_node(
+            MergeNegativesInput(
+                bad_keywords=f.bad_keywords,
+                semantic_bad=semantic.semantic_bad,
+                data=data,
+                negative_phrase_min_cover=0
+            ),
+            config,
+            runtime
+        )
+        statistical += merged.negative_merge_stats["statistical"]
+        semantic_count += merged.negative_merge_stats["semantic"]
+        final_parts.append(merged.final_negative_list)
+    if history is not None:
+        history.save()
+
+    # 跨块去重（同一搜索词可能出现在多个分块中），剔除在其他分块中有转化的搜索词，再按整份报表的有转化搜索词做词组合并
+    combined = KeywordTable.concat(final_parts)
+    deduped, terms = dedupe_negatives(combined)
+    keep = np.fromiter((term not in converting for term in terms), dtype=bool, count=len(terms))
+    converted = int(len(keep) - keep.sum())
+    if converted:
+        deduped = deduped.take(keep)
+        terms = [term for term, kept in zip(terms, keep.tolist()) if kept]
+    final_list, phrase_stats = collapse_phrases(deduped, terms, list(converting), state.negative_phrase_min_cover)
+    merge_stats = {
+        "statistical": statistical,
+        "semantic": semantic_count,
+        "duplicates": statistical + semantic_count - len(deduped) - converted,
+        "converting": converted,
+        **phrase_stats,
+        "exact": len(deduped) - phrase_stats["phrase_covered"],
+        "final": len(final_list),
+    }
+    return (
+        final_list,
+        agg_stats,
+        combine_cache_stats(cache_parts),
+        combine_prefilter_stats(prefilter_parts),
+        combine_cluster_stats(cluster_parts),
+        merge_stats,
+    )
+
+
+def _aggregate(history: Optional[KeywordHistory], table: KeywordTable, totals: Dict[str, Any]) -> KeywordTable:
+    """
+    分块按搜索词聚合，聚合统计累加进 totals；聚合结果累加进历史索引（只更新内存，全部分块处理完后统一写盘），
+    没有历史索引（未给出 shop_id）时不导入
+    """
+    data = aggregate_by_term(table)[0]
+    for name, value in aggregate_stats(table, data).items():
+        totals[name] = totals.get(name, 0) + value
+    if history is not None:
+        history.ingest(data, save=False)
+    return data
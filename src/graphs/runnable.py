@@ -0,0 +1,27 @@
+"""
+同时提供同步与异步实现的节点
+LangGraph 把同步节点函数放到默认线程池里执行（graph.ainvoke 时也是），慢的大模型调用会占住线程，并发运行数受线程池大小限制；
+只注册 async 函数时 graph_helper 按 func.__name__ 查找节点会失败，且 graph.invoke / stream 无法执行。
+这里用公开的 RunnableLambda 把两者组合成一个节点：同步 API 走 func，异步 API 走 afunc，节点名取同步函数名；
+RunnableLambda 只注入 config，runtime 通过 langgraph.runtime.get_runtime 从当前运行上下文取得；
+包装函数带原函数的名称与签名（functools.wraps），graph_helper 仍能按函数名找到节点及其输入输出类型
+"""
+import functools
+from typing import Any, Awaitable, Callable
+
+from langchain_core.runnables import RunnableConfig, RunnableLambda
+from langgraph.runtime import get_runtime
+
+
+def sync_async_node(func: Callable[..., Any], afunc: Callable[..., Awaitable[Any]]) -> RunnableLambda:
+    """组合同步与异步节点函数（两者签名均为 (state, config, runtime)；注册时需显式传入 input_schema）"""
+
+    @functools.wraps(func)
+    def invoke(state: Any, config: RunnableConfig) -> Any:
+        return func(state, config, get_runtime())
+
+    @functools.wraps(afunc)
+    async def ainvoke(state: Any, config: RunnableConfig) -> Any:
+        return await afunc(state, config, get_runtime())
+
+    return RunnableLambda(invoke, afunc=ainvoke, name=func.__name__)
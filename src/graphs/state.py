@@ -2,53 +2,134 @@
 状态定义文件
 亚马逊广告优化工作流（流量清洗 + 关键词收割）
 """
-from typing import List, Optional, Dict, Any
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional, Dict, Any
 from pydantic import BaseModel, Field
+from utils.file.file import File
+from utils.report.table import KeywordTable
+
+
+# ==================== 内部状态模型 ====================
+
+# 为 True 时内部状态模型也做完整校验（/node_run 等外部直接调用单个节点的场景）
+_strict_validation: ContextVar[bool] = ContextVar("strict_validation", default=False)
+
+
+@contextmanager
+def strict_validation() -> Iterator[None]:
+    """在该上下文内，TrustedModel 与普通 BaseModel 一样做完整校验"""
+    token = _strict_validation.set(True)
+    try:
+        yield
+    finally:
+        _strict_validation.reset(token)
+
+
+class TrustedModel(BaseModel):
+    """
+    图内部节点之间传递的状态模型
+    数据来自受信任的内部节点（外部输入已在入口节点完成校验），构造时按引用保存字段值（model_construct），
+    不再逐层校验和拷贝大列表；在 strict_validation() 上下文内恢复完整校验
+    """
+
+    def __init__(self, /, **data: Any):
+        if _strict_validation.get():
+            super().__init__(**data)
+            return
+        constructed = self.model_construct(**data)
+        object.__setattr__(self, "__dict__", constructed.__dict__)
+        object.__setattr__(self, "__pydantic_fields_set__", constructed.__pydantic_fields_set__)
+        object.__setattr__(self, "__pydantic_extra__", constructed.__pydantic_extra__)
+        object.__setattr__(self, "__pydantic_private__", constructed.__pydantic_private__)
+
+
+# ==================== 共享字段 ====================
+# 工作流入口、分发节点、流量清洗各节点与全局状态共用的参数只在这里定义一次，各状态模型按需继承（多继承时字段按基类从右到左排列）
+
+class ReportSourceFields(BaseModel):
+    """报表来源（三选一）"""
+    report_text: str = Field(default="", description="用户粘贴的广告报表文本（与 report_file / report_key 三选一）")
+    report_file: Optional[File] = Field(default=None, description="报表文件（http/https URL；本地路径仅限 REPORT_LOCAL_DIR 目录下的文件），大报表建议传文件而非 report_text")
+    report_key: str = Field(default="", description="报表在对象存储中的 key，优先于 report_file 与 report_text")
+
+
+class StatsFilterFields(BaseModel):
+    """统计筛选规则的选择与覆盖"""
+    shop_id: str = Field(default="", description="店铺 ID，用于选择店铺级统计筛选规则并按店铺 / ASIN 累加搜索词历史，为空时不记录历史")
+    asin: str = Field(default="", description="ASIN，用于选择 ASIN 级统计筛选规则（优先于店铺级）")
+    filter_rules: List[Dict[str, Any]] = Field(default=[], description='统计筛选规则，如 [{"when": "orders == 0 and clicks > 10", "reason": "高点击无转化"}]，传入时覆盖配置文件中的规则')
+    filter_params: Dict[str, float] = Field(default={}, description="统计筛选规则参数（如 avg_price、target_acos），覆盖配置文件中的同名参数")
+    filter_mode: str = Field(default="", description="统计筛选模式：rules 按规则；bayes 贝叶斯（beta-binomial）或 binomial 二项检验，否定转化率显著低于账户基线的词；为空时取配置文件，默认 rules")
+
+
+class TrafficCleanFields(StatsFilterFields, ReportSourceFields):
+    """流量清洗（含流式模式）的参数"""
+    product_info: str = Field(default="", description="产品信息（标题+描述）")
+    chunk_rows: int = Field(default=5000, description="流式模式下每个分块的行数")
+    negative_phrase_min_cover: int = Field(default=3, description="否定词合并为词组否定时词组至少覆盖的否定词数（且不出现在任何有转化的搜索词中），为 0 时只去重、全部输出精确否定")
+
+
+class TrafficCleanModeFields(TrafficCleanFields):
+    """流量清洗工作流的参数（含处理模式）"""
+    streaming: bool = Field(default=False, description="流量清洗是否按分块流式处理（大报表时开启，内存随分块大小而非报表大小增长）")
+    keep_campaign_breakdown: bool = Field(default=False, description="搜索词聚合时是否保留按广告活动/广告组的明细索引")
+
+
+class AdOptimizeFields(TrafficCleanModeFields):
+    """亚马逊广告优化工作流的参数（流量清洗 + 关键词收割）"""
+    seed_keywords: str = Field(default="", description="种子关键词（可选，用于拓词）")
+    bypass_expand_cache: bool = Field(default=False, description="跳过拓词结果缓存，强制调用大模型（新结果仍写入缓存）")
+    recommend_conflict_action: str = Field(default="flag", description="推荐词与本次否定词冲突时的处理：flag 保留并标注，drop 剔除")
 
 
 # ==================== 合并工作流：亚马逊广告优化 ====================
 
-class AdOptimizeInput(BaseModel):
+class AdOptimizeInput(AdOptimizeFields):
     """亚马逊广告优化工作流的输入"""
-    report_text: str = Field(..., description="用户粘贴的广告报表文本")
     product_info: str = Field(..., description="产品信息（标题+描述）")
-    seed_keywords: str = Field(default="", description="种子关键词（可选，用于拓词）")
 
 
 class AdOptimizeOutput(BaseModel):
     """亚马逊广告优化工作流的输出"""
     negative_keywords: List[Dict[str, Any]] = Field(default=[], description="否定关键词列表（止血）")
     recommend_keywords: List[Dict[str, Any]] = Field(default=[], description="新增关键词建议（拓词）")
+    aggregate_stats: Dict[str, Any] = Field(default={}, description="搜索词聚合前后的行数与预估 token 数（流式模式下为各分块之和）")
+    semantic_cache_stats: Dict[str, Any] = Field(default={}, description="语义判断结果缓存命中统计（去重词数、内存/数据库命中数、未命中数、命中率、重试后仍失败的批次数与未判断的搜索词数）")
+    semantic_prefilter_stats: Dict[str, Any] = Field(default={}, description="语义判断本地预筛统计（自动保留/否定/送入大模型的词数、节省的 token 数与预估耗时）")
+    semantic_cluster_stats: Dict[str, Any] = Field(default={}, description="语义判断近重复词聚类统计（词数、簇数与压缩比）")
+    ngram_negative_candidates: List[Dict[str, Any]] = Field(default=[], description="n-gram 花费挖掘出的词组否定候选（词组、词数、覆盖搜索词数、累计点击/花费/订单、原因与示例搜索词），流式模式下为空")
+    ngram_mining_stats: Dict[str, Any] = Field(default={}, description="n-gram 花费挖掘统计（搜索词数、n-gram 数、命中规则数、候选数）")
+    negative_merge_stats: Dict[str, Any] = Field(default={}, description="否定词合并统计（统计/语义否定词数、重复数、词组数及其覆盖的否定词数、最终否定词数）")
+    recommend_check_stats: Dict[str, Any] = Field(default={}, description="推荐词交叉校验统计（推荐词数、与否定词冲突数、报表中已有数、剔除数）")
 
 
 # 汇聚节点：合并两个分支的结果
-class MergeResultInput(BaseModel):
+class MergeResultInput(TrustedModel):
     """汇聚节点输入"""
-    final_negative_list: List[Dict[str, Any]] = Field(default=[], description="否定关键词列表")
+    final_negative_list: KeywordTable = Field(default_factory=KeywordTable.empty, description="否定关键词列表")
     keyword_recommend: List[Dict[str, Any]] = Field(default=[], description="关键词投放建议")
+    data: KeywordTable = Field(default_factory=KeywordTable.empty, description="按搜索词聚合后的报表（流式模式下为空，只校验否定词）")
+    recommend_conflict_action: str = Field(default="flag", description="推荐词与本次否定词冲突时的处理：flag 保留并标注，drop 剔除")
 
 
-class MergeResultOutput(BaseModel):
+class MergeResultOutput(TrustedModel):
     """汇聚节点输出"""
     negative_keywords: List[Dict[str, Any]] = Field(default=[], description="否定关键词列表（止血）")
     recommend_keywords: List[Dict[str, Any]] = Field(default=[], description="新增关键词建议（拓词）")
+    recommend_check_stats: Dict[str, Any] = Field(default={}, description="推荐词交叉校验统计（推荐词数、与否定词冲突数、报表中已有数、剔除数）")
 
 
 # ==================== 流量清洗分支节点状态 ====================
 
 # 分发节点输入
-class DispatchInput(BaseModel):
+class DispatchInput(AdOptimizeFields):
     """分发节点输入"""
-    report_text: str = Field(default="", description="广告报表文本")
-    product_info: str = Field(default="", description="产品信息")
-    seed_keywords: str = Field(default="", description="种子关键词")
 
 
-class DispatchOutput(BaseModel):
+class DispatchOutput(AdOptimizeFields, TrustedModel):
     """分发节点输出"""
-    report_text: str = Field(default="", description="广告报表文本")
-    product_info: str = Field(default="", description="产品信息")
-    seed_keywords: str = Field(default="", description="种子关键词")
+
 
 class KeywordData(BaseModel):
     """单个关键词数据"""
@@ -56,6 +137,10 @@ class KeywordData(BaseModel):
     clicks: int = Field(default=0, description="点击数")
     spend: float = Field(default=0.0, description="花费")
     orders: int = Field(default=0, description="订单数")
+    impressions: Optional[int] = Field(default=None, description="展示量（报表含该列时）")
+    sales: Optional[float] = Field(default=None, description="销售额（报表含该列时）")
+    campaign: Optional[str] = Field(default=None, description="广告活动名称（报表含该列时）")
+    ad_group: Optional[str] = Field(default=None, description="广告组名称（报表含该列时）")
 
 
 class BadKeyword(BaseModel):
@@ -68,62 +153,116 @@ class BadKeyword(BaseModel):
 
 
 # 工作流A的输入输出
-class TrafficCleanInput(BaseModel):
+class TrafficCleanInput(TrafficCleanModeFields):
     """工作流A的输入"""
-    report_text: str = Field(..., description="用户粘贴的广告报表文本")
     product_info: str = Field(..., description="产品信息（标题+描述）")
 
 
 class TrafficCleanOutput(BaseModel):
     """工作流A的输出"""
-    final_negative_list: List[Dict[str, Any]] = Field(default=[], description="最终否定关键词列表")
+    final_negative_list: KeywordTable = Field(default_factory=KeywordTable.empty, description="最终否定关键词列表")
+    aggregate_stats: Dict[str, Any] = Field(default={}, description="搜索词聚合前后的行数与预估 token 数（流式模式下为各分块之和）")
+    semantic_cache_stats: Dict[str, Any] = Field(default={}, description="语义判断结果缓存命中统计（去重词数、内存/数据库命中数、未命中数、命中率、重试后仍失败的批次数与未判断的搜索词数）")
+    semantic_prefilter_stats: Dict[str, Any] = Field(default={}, description="语义判断本地预筛统计（自动保留/否定/送入大模型的词数、节省的 token 数与预估耗时）")
+    semantic_cluster_stats: Dict[str, Any] = Field(default={}, description="语义判断近重复词聚类统计（词数、簇数与压缩比）")
+    ngram_negative_candidates: List[Dict[str, Any]] = Field(default=[], description="n-gram 花费挖掘出的词组否定候选（词组、词数、覆盖搜索词数、累计点击/花费/订单、原因与示例搜索词），流式模式下为空")
+    ngram_mining_stats: Dict[str, Any] = Field(default={}, description="n-gram 花费挖掘统计（搜索词数、n-gram 数、命中规则数、候选数）")
+    negative_merge_stats: Dict[str, Any] = Field(default={}, description="否定词合并统计（统计/语义否定词数、重复数、词组数及其覆盖的否定词数、最终否定词数）")
 
 
 # 节点A1：数据预处理
-class DataPreprocessInput(BaseModel):
+class DataPreprocessInput(ReportSourceFields):
     """数据预处理节点输入"""
-    report_text: str = Field(..., description="广告报表文本")
 
 
-class DataPreprocessOutput(BaseModel):
+class DataPreprocessOutput(TrustedModel):
     """数据预处理节点输出"""
-    data: List[Dict[str, Any]] = Field(default=[], description="结构化关键词列表")
+    data: KeywordTable = Field(default_factory=KeywordTable.empty, description="结构化关键词列表")
+
+
+# 节点A1.5：搜索词聚合
+class AggregateTermsInput(TrustedModel):
+    """搜索词聚合节点输入"""
+    data: KeywordTable = Field(default_factory=KeywordTable.empty, description="结构化关键词列表")
+    keep_campaign_breakdown: bool = Field(default=False, description="是否保留广告活动明细索引")
+    shop_id: str = Field(default="", description="店铺 ID，搜索词历史按店铺 / ASIN 分别累加，为空时不记录历史")
+    asin: str = Field(default="", description="ASIN，搜索词历史按店铺 / ASIN 分别累加")
+
+
+class AggregateTermsOutput(TrustedModel):
+    """搜索词聚合节点输出"""
+    data: KeywordTable = Field(default_factory=KeywordTable.empty, description="按搜索词聚合后的关键词列表")
+    campaign_breakdown: Dict[str, List[Dict[str, Any]]] = Field(default={}, description="搜索词 -> 各广告活动/广告组明细（可选）")
+    aggregate_stats: Dict[str, Any] = Field(default={}, description="聚合前后的行数与预估 token 数")
 
 
 # 节点A2：统计规则筛选
-class StatsFilterInput(BaseModel):
+class StatsFilterInput(StatsFilterFields, TrustedModel):
     """统计规则筛选节点输入"""
-    data: List[Dict[str, Any]] = Field(default=[], description="结构化关键词列表")
+    data: KeywordTable = Field(default_factory=KeywordTable.empty, description="结构化关键词列表")
 
 
-class StatsFilterOutput(BaseModel):
+class StatsFilterOutput(TrustedModel):
     """统计规则筛选节点输出"""
-    bad_keywords: List[Dict[str, Any]] = Field(default=[], description="统计否定词")
-    remaining_keywords: List[Dict[str, Any]] = Field(default=[], description="剩余待判断的词")
+    bad_keywords: KeywordTable = Field(default_factory=KeywordTable.empty, description="统计否定词")
+    remaining_keywords: KeywordTable = Field(default_factory=KeywordTable.empty, description="剩余待判断的词")
+
+
+# 节点A2.5：n-gram 花费挖掘
+class NgramMiningInput(TrustedModel):
+    """n-gram 花费挖掘节点输入"""
+    data: KeywordTable = Field(default_factory=KeywordTable.empty, description="按搜索词聚合后的关键词列表")
+
+
+class NgramMiningOutput(TrustedModel):
+    """n-gram 花费挖掘节点输出"""
+    ngram_negative_candidates: List[Dict[str, Any]] = Field(default=[], description="n-gram 花费挖掘出的词组否定候选（词组、词数、覆盖搜索词数、累计点击/花费/订单、原因与示例搜索词），流式模式下为空")
+    ngram_mining_stats: Dict[str, Any] = Field(default={}, description="n-gram 花费挖掘统计（搜索词数、n-gram 数、命中规则数、候选数）")
 
 
 # 节点A3：LLM语义相关性判断
-class SemanticJudgeInput(BaseModel):
+class SemanticJudgeInput(TrustedModel):
     """语义相关性判断节点输入"""
-    remaining_keywords: List[Dict[str, Any]] = Field(default=[], description="剩余待判断的词")
+    remaining_keywords: KeywordTable = Field(default_factory=KeywordTable.empty, description="剩余待判断的词")
     product_info: str = Field(..., description="产品信息")
 
 
-class SemanticJudgeOutput(BaseModel):
+class SemanticJudgeOutput(TrustedModel):
     """语义相关性判断节点输出"""
     semantic_bad: str = Field(default="", description="语义不相关词（文本格式）")
+    semantic_cache_stats: Dict[str, Any] = Field(default={}, description="语义判断结果缓存命中统计（去重词数、内存/数据库命中数、未命中数、命中率、重试后仍失败的批次数与未判断的搜索词数）")
+    semantic_prefilter_stats: Dict[str, Any] = Field(default={}, description="语义判断本地预筛统计（自动保留/否定/送入大模型的词数、节省的 token 数与预估耗时）")
+    semantic_cluster_stats: Dict[str, Any] = Field(default={}, description="语义判断近重复词聚类统计（词数、簇数与压缩比）")
 
 
 # 节点A4：合并否定词
-class MergeNegativesInput(BaseModel):
+class MergeNegativesInput(TrustedModel):
     """合并否定词节点输入"""
-    bad_keywords: List[Dict[str, Any]] = Field(default=[], description="统计否定词")
+    bad_keywords: KeywordTable = Field(default_factory=KeywordTable.empty, description="统计否定词")
     semantic_bad: str = Field(default="", description="语义不相关词")
+    data: KeywordTable = Field(default_factory=KeywordTable.empty, description="按搜索词聚合后的报表，用于补全语义否定词的指标与识别有转化的搜索词；为空时不做词组合并")
+    negative_phrase_min_cover: int = Field(default=3, description="否定词合并为词组否定时词组至少覆盖的否定词数（且不出现在任何有转化的搜索词中），为 0 时只去重、全部输出精确否定")
 
 
-class MergeNegativesOutput(BaseModel):
+class MergeNegativesOutput(TrustedModel):
     """合并否定词节点输出"""
-    final_negative_list: List[Dict[str, Any]] = Field(default=[], description="最终否定词列表")
+    final_negative_list: KeywordTable = Field(default_factory=KeywordTable.empty, description="最终否定词列表")
+    negative_merge_stats: Dict[str, Any] = Field(default={}, description="否定词合并统计（统计/语义否定词数、重复数、词组数及其覆盖的否定词数、最终否定词数）")
+
+
+# 流式模式：分块执行 预处理 → 统计筛选 → 语义判断 → 合并否定词（不做 n-gram 花费挖掘）
+class TrafficCleanStreamInput(TrafficCleanFields):
+    """流量清洗流式节点输入"""
+
+
+class TrafficCleanStreamOutput(TrustedModel):
+    """流量清洗流式节点输出"""
+    final_negative_list: KeywordTable = Field(default_factory=KeywordTable.empty, description="最终否定词列表")
+    aggregate_stats: Dict[str, Any] = Field(default={}, description="搜索词聚合前后的行数与预估 token 数（流式模式下为各分块之和）")
+    semantic_cache_stats: Dict[str, Any] = Field(default={}, description="语义判断结果缓存命中统计（去重词数、内存/数据库命中数、未命中数、命中率、重试后仍失败的批次数与未判断的搜索词数）")
+    semantic_prefilter_stats: Dict[str, Any] = Field(default={}, description="语义判断本地预筛统计（自动保留/否定/送入大模型的词数、节省的 token 数与预估耗时）")
+    semantic_cluster_stats: Dict[str, Any] = Field(default={}, description="语义判断近重复词聚类统计（词数、簇数与压缩比）")
+    negative_merge_stats: Dict[str, Any] = Field(default={}, description="否定词合并统计（统计/语义否定词数、重复数、因其他分块有转化而剔除的词数、词组数及其覆盖的否定词数、最终否定词数）")
 
 
 # ==================== 工作流B：关键词收割 ====================
@@ -142,6 +281,9 @@ class KeywordHarvestInput(BaseModel):
     """工作流B的输入"""
     product_description: str = Field(..., description="产品描述")
     seed_keywords: str = Field(..., description="种子关键词")
+    bypass_expand_cache: bool = Field(default=False, description="跳过拓词结果缓存，强制调用大模型（新结果仍写入缓存）")
+    shop_id: str = Field(default="", description="店铺 ID，按店铺 / ASIN 查询搜索词历史，为空时不关联历史")
+    asin: str = Field(default="", description="ASIN，按店铺 / ASIN 查询搜索词历史")
 
 
 class KeywordHarvestOutput(BaseModel):
@@ -154,19 +296,24 @@ class ExpandKeywordsInput(BaseModel):
     """场景拓词节点输入"""
     product_info: str = Field(default="", description="产品信息（标题+描述）")
     seed_keywords: str = Field(default="", description="种子关键词")
+    bypass_expand_cache: bool = Field(default=False, description="跳过拓词结果缓存，强制调用大模型（新结果仍写入缓存）")
+    shop_id: str = Field(default="", description="店铺 ID，按店铺 / ASIN 查询搜索词历史，为空时不关联历史")
+    asin: str = Field(default="", description="ASIN，按店铺 / ASIN 查询搜索词历史")
 
 
-class ExpandKeywordsOutput(BaseModel):
+class ExpandKeywordsOutput(TrustedModel):
     """场景拓词节点输出"""
     longtail_keywords: str = Field(default="", description="长尾关键词列表")
 
 
 # 节点B2：竞争度打分
-class CompetitionScoreInput(BaseModel):
+class CompetitionScoreInput(TrustedModel):
     """竞争度打分节点输入"""
     longtail_keywords: str = Field(default="", description="长尾关键词列表")
+    shop_id: str = Field(default="", description="店铺 ID，按店铺 / ASIN 查询搜索词历史，为空时不关联历史")
+    asin: str = Field(default="", description="ASIN，按店铺 / ASIN 查询搜索词历史")
 
 
-class CompetitionScoreOutput(BaseModel):
+class CompetitionScoreOutput(TrustedModel):
     """竞争度打分节点输出"""
     keyword_recommend: List[Dict[str, Any]] = Field(default=[], description="关键词投放建议")
@@ -8,36 +8,58 @@ from langgraph.graph import StateGraph, END
 from langchain_core.runnables import RunnableConfig
 from langgraph.runtime import Runtime
 from coze_coding_utils.runtime_ctx.context import Context
+from utils.report.table import KeywordTable
 
 from graphs.state import (
+    TrustedModel,
+    TrafficCleanModeFields,
     TrafficCleanInput,
     TrafficCleanOutput,
     DataPreprocessInput,
     DataPreprocessOutput,
+    AggregateTermsInput,
+    AggregateTermsOutput,
     StatsFilterInput,
     StatsFilterOutput,
     SemanticJudgeInput,
     SemanticJudgeOutput,
     MergeNegativesInput,
-    MergeNegativesOutput
+    MergeNegativesOutput,
+    TrafficCleanStreamInput,
+    TrafficCleanStreamOutput
 )
 
 from graphs.nodes.data_preprocess_node import data_preprocess_node
+from graphs.nodes.aggregate_terms_node import aggregate_terms_node
 from graphs.nodes.stats_filter_node import stats_filter_node
-from graphs.nodes.semantic_judge_node import semantic_judge_node
+from graphs.nodes.ngram_mining_node import ngram_mining_node
+from graphs.nodes.semantic_judge_node import semantic_judge_node, asemantic_judge_node
 from graphs.nodes.merge_negatives_node import merge_negatives_node
+from graphs.nodes.traffic_clean_stream_node import traffic_clean_stream_node
+from graphs.runnable import sync_async_node
 
 
 # 定义工作流A的全局状态
-class TrafficCleanGlobalState(BaseModel):
-    """工作流A的全局状态"""
-    report_text: str = Field(default="", description="广告报表文本")
-    product_info: str = Field(default="", description="产品信息")
-    data: List[Dict[str, Any]] = Field(default=[], description="结构化关键词列表")
-    bad_keywords: List[Dict[str, Any]] = Field(default=[], description="统计否定词")
-    remaining_keywords: List[Dict[str, Any]] = Field(default=[], description="剩余待判断的词")
+class TrafficCleanGlobalState(TrafficCleanModeFields, TrustedModel):
+    """工作流A的全局状态（输入参数见 TrafficCleanModeFields）"""
+    data: KeywordTable = Field(default_factory=KeywordTable.empty, description="结构化关键词列表")
+    campaign_breakdown: Dict[str, List[Dict[str, Any]]] = Field(default={}, description="搜索词 -> 各广告活动/广告组明细")
+    aggregate_stats: Dict[str, Any] = Field(default={}, description="搜索词聚合前后的行数与预估 token 数（流式模式下为各分块之和）")
+    bad_keywords: KeywordTable = Field(default_factory=KeywordTable.empty, description="统计否定词")
+    remaining_keywords: KeywordTable = Field(default_factory=KeywordTable.empty, description="剩余待判断的词")
     semantic_bad: str = Field(default="", description="语义不相关词")
-    final_negative_list: List[Dict[str, Any]] = Field(default=[], description="最终否定词列表")
+    semantic_cache_stats: Dict[str, Any] = Field(default={}, description="语义判断结果缓存命中统计（去重词数、内存/数据库命中数、未命中数、命中率、重试后仍失败的批次数与未判断的搜索词数）")
+    semantic_prefilter_stats: Dict[str, Any] = Field(default={}, description="语义判断本地预筛统计（自动保留/否定/送入大模型的词数、节省的 token 数与预估耗时）")
+    semantic_cluster_stats: Dict[str, Any] = Field(default={}, description="语义判断近重复词聚类统计（词数、簇数与压缩比）")
+    ngram_negative_candidates: List[Dict[str, Any]] = Field(default=[], description="n-gram 花费挖掘出的词组否定候选（词组、词数、覆盖搜索词数、累计点击/花费/订单、原因与示例搜索词），流式模式下为空")
+    ngram_mining_stats: Dict[str, Any] = Field(default={}, description="n-gram 花费挖掘统计（搜索词数、n-gram 数、命中规则数、候选数）")
+    negative_merge_stats: Dict[str, Any] = Field(default={}, description="否定词合并统计（统计/语义否定词数、重复数、词组数及其覆盖的否定词数、最终否定词数）")
+    final_negative_list: KeywordTable = Field(default_factory=KeywordTable.empty, description="最终否定词列表")
+
+
+def route_entry(state: TrafficCleanGlobalState) -> str:
+    """入口路由：流式模式走分块节点，否则走逐节点链路"""
+    return "traffic_clean_stream" if state.streaming else "data_preprocess"
 
 
 def create_traffic_clean_graph() -> StateGraph:
@@ -53,25 +75,39 @@ def create_traffic_clean_graph() -> StateGraph:
     
     # 添加节点
     builder.add_node("data_preprocess", data_preprocess_node)
+    builder.add_node("aggregate_terms", aggregate_terms_node)
     builder.add_node("stats_filter", stats_filter_node)
+    builder.add_node("ngram_mining", ngram_mining_node)
     builder.add_node(
         "semantic_judge",
-        semantic_judge_node,
+        sync_async_node(semantic_judge_node, asemantic_judge_node),
+        input_schema=SemanticJudgeInput,
         metadata={
             "type": "agent",
             "llm_cfg": "config/semantic_judge_llm_cfg.json"
         }
     )
     builder.add_node("merge_negatives", merge_negatives_node)
+    builder.add_node(
+        "traffic_clean_stream",
+        traffic_clean_stream_node,
+        metadata={
+            "type": "agent",
+            "llm_cfg": "config/semantic_judge_llm_cfg.json"
+        }
+    )
     
-    # 设置入口点
-    builder.set_entry_point("data_preprocess")
+    # 设置入口点：根据 streaming 选择逐节点链路或分块流式节点
+    builder.set_conditional_entry_point(route_entry, ["data_preprocess", "traffic_clean_stream"])
     
     # 添加边
-    builder.add_edge("data_preprocess", "stats_filter")
-    builder.add_edge("stats_filter", "semantic_judge")
+    builder.add_edge("data_preprocess", "aggregate_terms")
+    builder.add_edge("aggregate_terms", "stats_filter")
+    builder.add_edge("stats_filter", "ngram_mining")
+    builder.add_edge("ngram_mining", "semantic_judge")
     builder.add_edge("semantic_judge", "merge_negatives")
     builder.add_edge("merge_negatives", END)
+    builder.add_edge("traffic_clean_stream", END)
     
     return builder
 
@@ -20,6 +20,8 @@ from coze_coding_utils.log.write_log import setup_logging, request_context
 from coze_coding_utils.log.config import LOG_LEVEL
 from coze_coding_utils.error.classifier import ErrorClassifier, classify_error
 from coze_coding_utils.helper.stream_runner import AgentStreamRunner, WorkflowStreamRunner,agent_stream_handler,workflow_stream_handler, RunOpt
+from graphs.state import strict_validation
+from utils import events as node_events
 
 setup_logging(
     log_file=LOG_FILE,
@@ -40,6 +42,15 @@ from coze_coding_utils.log.loop_trace import init_run_config, init_agent_config
 
 # 超时配置常量
 TIMEOUT_SECONDS = 900  # 15分钟
+# 请求体日志最多记录的字符数（大报表应通过 report_file / report_key 传入，避免整段写入日志）
+LOG_BODY_PREVIEW_CHARS = 2048
+
+
+def _body_preview(body_text: str) -> str:
+    """请求体日志预览：超长时截断并注明原始长度"""
+    if len(body_text) <= LOG_BODY_PREVIEW_CHARS:
+        return body_text
+    return f"{body_text[:LOG_BODY_PREVIEW_CHARS]}...(truncated, total {len(body_text)} chars)"
 
 class GraphService:
     def __init__(self):
@@ -206,7 +217,13 @@ class GraphService:
         _graph = _g.compile()
 
         run_config = init_run_config(_graph, ctx)
-        return await _graph.ainvoke(payload, config=run_config)
+        # 单节点调用的输入来自外部，内部状态模型也要做完整校验
+        with strict_validation():
+            result = await _graph.ainvoke(payload, config=run_config)
+        # 节点输出中的列式表（KeywordTable）等内部类型按输出模型转换为 JSON 友好的结构
+        if output_cls is not None and isinstance(result, dict):
+            return output_cls.model_validate(result).model_dump(mode="json")
+        return result
 
     def graph_inout_schema(self) -> Any:
         if graph_helper.is_agent_proj():
@@ -229,8 +246,43 @@ class GraphService:
 
     async def astream(self, payload: Dict[str, Any], graph: CompiledStateGraph, run_config: RunnableConfig, ctx=Context, run_opt: Optional[RunOpt] = None) -> AsyncIterable[Any]:
         stream_runner = self._get_stream_runner()
-        async for chunk in stream_runner.astream(payload, graph, run_config, ctx, run_opt):
-            yield chunk
+        if graph_helper.is_agent_proj():
+            async for chunk in stream_runner.astream(payload, graph, run_config, ctx, run_opt):
+                yield chunk
+            return
+
+        # 工作流：节点运行中发出的增量事件（如逐行解析出的否定词）与 stream runner 的事件合并到同一队列按到达顺序推送
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        finished = object()
+
+        def on_node_event(event_type: str, data: Dict[str, Any]) -> None:
+            event = {
+                "type": event_type,
+                "timestamp": int(time.time() * 1000),
+                "log_id": ctx.logid,
+                "run_id": ctx.run_id,
+            }
+            event.update(data)
+            # 节点可能在工作线程中执行
+            loop.call_soon_threadsafe(queue.put_nowait, event)
+
+        async def pump() -> None:
+            try:
+                async for chunk in stream_runner.astream(payload, graph, run_config, ctx, run_opt):
+                    await queue.put(chunk)
+            finally:
+                await queue.put(finished)
+
+        # 任务创建时复制当前上下文，监听器随之传给 stream runner 的工作线程与各节点
+        with node_events.listen(on_node_event):
+            pump_task = asyncio.create_task(pump())
+        try:
+            while (item := await queue.get()) is not finished:
+                yield item
+            await pump_task
+        finally:
+            pump_task.cancel()
 
 
 service = GraphService()
@@ -247,7 +299,7 @@ async def http_run(request: Request) -> Dict[str, Any]:
     try:
         body_text = raw_body.decode("utf-8")
     except Exception as e:
-        body_text = str(raw_body)
+        body_text = _body_preview(str(raw_body))
         raise HTTPException(status_code=400,
                             detail=f"Invalid JSON format: {body_text}, traceback: {traceback.format_exc()}, error: {e}")
 
@@ -259,11 +311,12 @@ async def http_run(request: Request) -> Dict[str, Any]:
         f"Received request for /run: "
         f"run_id={run_id}, "
         f"query={dict(request.query_params)}, "
-        f"body={body_text}"
+        f"body={_body_preview(body_text)}"
     )
 
     try:
-        payload = await request.json()
+        # 请求体已读取并解码，直接解析，不再通过 request.json() 重复解析
+        payload = json.loads(body_text)
 
         # 创建任务并记录 - 这是关键，让我们可以通过run_id取消任务
         task = asyncio.create_task(service.run(payload, ctx))
@@ -334,7 +387,7 @@ async def http_stream_run(request: Request):
     try:
         body_text = raw_body.decode("utf-8")
     except Exception as e:
-        body_text = str(raw_body)
+        body_text = _body_preview(str(raw_body))
         raise HTTPException(status_code=400,
                             detail=f"Invalid JSON format: {body_text}, traceback: {extract_core_stack()}, error: {e}")
     run_id = ctx.run_id
@@ -344,10 +397,10 @@ async def http_stream_run(request: Request):
         f"run_id={run_id}, "
         f"is_agent_project={is_agent}, "
         f"query={dict(request.query_params)}, "
-        f"body={body_text}"
+        f"body={_body_preview(body_text)}"
     )
     try:
-        payload = await request.json()
+        payload = json.loads(body_text)
     except json.JSONDecodeError as e:
         logger.error(f"JSON decode error in http_stream_run: {e}, traceback: {traceback.format_exc()}")
         raise HTTPException(status_code=400, detail=f"Invalid JSON format:{extract_core_stack()}")
@@ -398,18 +451,18 @@ async def http_node_run(node_id: str, request: Request):
     try:
         body_text = raw_body.decode("utf-8")
     except UnicodeDecodeError:
-        body_text = str(raw_body)
+        body_text = _body_preview(str(raw_body))
         raise HTTPException(status_code=400, detail=f"Invalid JSON format: {body_text}")
     ctx = new_context(method="node_run", headers=request.headers)
     request_context.set(ctx)
     logger.info(
         f"Received request for /node_run/{node_id}: "
         f"query={dict(request.query_params)}, "
-        f"body={body_text}",
+        f"body={_body_preview(body_text)}",
     )
 
     try:
-        payload = await request.json()
+        payload = json.loads(body_text)
     except json.JSONDecodeError as e:
         logger.error(f"JSON decode error in http_node_run: {e}, traceback: {traceback.format_exc()}")
         raise HTTPException(status_code=400, detail=f"Invalid JSON format:{extract_core_stack()}")
@@ -1,8 +1,27 @@
-from sqlalchemy import BigInteger, DateTime, Identity, Index, Integer, JSON, PrimaryKeyConstraint, Text, text
+from sqlalchemy import BigInteger, Boolean, DateTime, Identity, Index, Integer, JSON, PrimaryKeyConstraint, Text, text
 from typing import Optional
 import datetime
 
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
 class Base(DeclarativeBase):
-    pass
\ No newline at end of file
+    pass
+
+
+class SemanticVerdict(Base):
+    """语义相关性判断结果缓存，按 (产品信息哈希, 归一化搜索词, 模型, 提示词版本) 唯一"""
+    __tablename__ = "semantic_verdict"
+    __table_args__ = (
+        PrimaryKeyConstraint("cache_key", name="semantic_verdict_pkey"),
+        Index("semantic_verdict_expires_at_idx", "expires_at"),
+    )
+
+    cache_key: Mapped[str] = mapped_column(Text, comment="各组成部分拼接后的 sha256")
+    product_hash: Mapped[str] = mapped_column(Text)
+    search_term: Mapped[str] = mapped_column(Text, comment="归一化后的搜索词")
+    model: Mapped[str] = mapped_column(Text)
+    prompt_version: Mapped[str] = mapped_column(Text)
+    is_bad: Mapped[bool] = mapped_column(Boolean, server_default=text("false"))
+    reason: Mapped[str] = mapped_column(Text, server_default=text("''"))
+    created_at: Mapped[datetime.datetime] = mapped_column(DateTime(timezone=True), server_default=text("now()"))
+    expires_at: Mapped[datetime.datetime] = mapped_column(DateTime(timezone=True))
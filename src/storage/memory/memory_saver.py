@@ -8,6 +8,8 @@ from typing import Optional, Union
 import logging
 import time
 
+from storage.memory.serializer import get_checkpoint_serde
+
 logger = logging.getLogger(__name__)
 
 # 数据库连接超时时间（秒），每次尝试 15 秒，共尝试 2 次
@@ -83,7 +85,7 @@ class MemoryManager:
 
     def _create_fallback_checkpointer(self) -> MemorySaver:
         """创建内存兜底 checkpointer"""
-        self._checkpointer = MemorySaver()
+        self._checkpointer = MemorySaver(serde=get_checkpoint_serde())
         logger.warning("Using MemorySaver as fallback checkpointer (data will not persist across restarts)")
         return self._checkpointer
 
@@ -116,7 +118,7 @@ class MemoryManager:
                 max_idle=300,
                 check=AsyncConnectionPool.check_connection,
             )
-            self._checkpointer = AsyncPostgresSaver(self._pool)
+            self._checkpointer = AsyncPostgresSaver(self._pool, serde=get_checkpoint_serde())
             logger.info("AsyncPostgresSaver initialized successfully")
         except Exception as e:
             logger.warning(f"Failed to create AsyncPostgresSaver: {e}, will fallback to MemorySaver")
@@ -0,0 +1,94 @@
+"""
+检查点序列化
+在 langgraph 默认的 msgpack 序列化（JsonPlusSerializer）之上可选 zstd 压缩，
+通过环境变量 CHECKPOINT_SERDE 选择："msgpack"（默认实现）或 "msgpack+zstd"（默认）
+"""
+import os
+import threading
+from typing import Any, Callable, Dict, Tuple
+import logging
+
+from langgraph.checkpoint.serde.base import SerializerProtocol
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHECKPOINT_SERDE = "msgpack+zstd"
+# 小于该字节数的值不压缩（压缩收益低于帧头与 CPU 开销）
+ZSTD_MIN_BYTES = 1024
+ZSTD_DEFAULT_LEVEL = 1
+# 压缩后的类型标记后缀，如 "msgpack+zstd"
+ZSTD_SUFFIX = "+zstd"
+
+
+class ZstdSerializer(SerializerProtocol):
+    """
+    对内层序列化结果做 zstd 压缩
+    类型标记追加 "+zstd"，读取时按标记决定是否解压，因此可以直接读取未压缩的旧检查点
+    zstandard 的压缩器 / 解压器不是线程安全的，而同一个实例会被并行分支与并发运行共用，每个线程各持有一份
+    """
+
+    def __init__(self, serde: SerializerProtocol, level: int = ZSTD_DEFAULT_LEVEL, min_bytes: int = ZSTD_MIN_BYTES):
+        import zstandard
+
+        self._zstd = zstandard
+        self.serde = serde
+        self.level = level
+        self.min_bytes = min_bytes
+        self._local = threading.local()
+
+    def _compressor(self) -> Any:
+        compressor = getattr(self._local, "compressor", None)
+        if compressor is None:
+            compressor = self._local.compressor = self._zstd.ZstdCompressor(level=self.level)
+        return compressor
+
+    def _decompressor(self) -> Any:
+        decompressor = getattr(self._local, "decompressor", None)
+        if decompressor is None:
+            decompressor = self._local.decompressor = self._zstd.ZstdDecompressor()
+        return decompressor
+
+    def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+        type_, data = self.serde.dumps_typed(obj)
+        if len(data) < self.min_bytes:
+            return type_, data
+        return type_ + ZSTD_SUFFIX, self._compressor().compress(data)
+
+    def loads_typed(self, data: Tuple[str, bytes]) -> Any:
+        type_, data_ = data
+        if type_.endswith(ZSTD_SUFFIX):
+            type_ = type_[:-len(ZSTD_SUFFIX)]
+            data_ = self._decompressor().decompress(data_)
+        return self.serde.loads_typed((type_, data_))
+
+
+def _zstd_factory() -> SerializerProtocol:
+    level = int(os.getenv("CHECKPOINT_ZSTD_LEVEL", ZSTD_DEFAULT_LEVEL))
+    try:
+        return ZstdSerializer(JsonPlusSerializer(), level=level)
+    except ImportError:
+        logger.warning("zstandard is not installed, checkpoints will not be compressed")
+        return JsonPlusSerializer()
+
+
+# 序列化实现注册表：名称 -> 工厂函数
+SERDE_FACTORIES: Dict[str, Callable[[], SerializerProtocol]] = {
+    "msgpack": JsonPlusSerializer,
+    "msgpack+zstd": _zstd_factory,
+}
+
+
+def register_checkpoint_serde(name: str, factory: Callable[[], SerializerProtocol]) -> None:
+    """注册自定义检查点序列化实现"""
+    SERDE_FACTORIES[name] = factory
+
+
+def get_checkpoint_serde(name: str = "") -> SerializerProtocol:
+    """按名称（默认取环境变量 CHECKPOINT_SERDE）创建检查点序列化实现，未知名称退回默认实现"""
+    name = name or os.getenv("CHECKPOINT_SERDE", DEFAULT_CHECKPOINT_SERDE)
+    factory = SERDE_FACTORIES.get(name)
+    if factory is None:
+        logger.warning(f"Unknown checkpoint serde '{name}', using {DEFAULT_CHECKPOINT_SERDE}")
+        factory = SERDE_FACTORIES[DEFAULT_CHECKPOINT_SERDE]
+    return factory()
@@ -152,6 +152,18 @@ class S3SyncStorage:
             logger.error(self._error_msg("Error uploading file to S3", e))
             raise e
 
+    def write_file(self, *, file_key: str, file_content: bytes, content_type: str = "application/octet-stream", bucket: Optional[str] = None) -> str:
+        """按给定 key 写入对象（不追加随机后缀，已存在则覆盖），用于内容寻址的缓存等场景"""
+        self._validate_file_name(file_key)
+        try:
+            client = self._get_client()
+            target_bucket = self._resolve_bucket(bucket)
+            client.put_object(Bucket=target_bucket, Key=file_key, Body=file_content, ContentType=content_type)
+            return file_key
+        except Exception as e:
+            logger.error(self._error_msg("Error writing file to S3", e))
+            raise e
+
     def delete_file(self, *, file_key: str, bucket: Optional[str] = None) -> bool:
         try:
             client = self._get_client()
@@ -198,6 +210,29 @@ class S3SyncStorage:
             logger.error(self._error_msg("Error reading file from S3", e))
             raise e
 
+    def download_file(self, *, file_key: str, local_path: str, bucket: Optional[str] = None, chunk_size: int = 8 * 1024 * 1024) -> str:
+        """流式下载对象到本地文件（分块写入，不在内存中保留完整内容），返回本地路径"""
+        try:
+            client = self._get_client()
+            target_bucket = self._resolve_bucket(bucket)
+            resp = client.get_object(Bucket=target_bucket, Key=file_key)
+            body = resp.get("Body")
+            if body is None:
+                raise RuntimeError("S3 get_object returned no Body")
+            try:
+                with open(local_path, "wb") as f:
+                    for chunk in body.iter_chunks(chunk_size=chunk_size):
+                        f.write(chunk)
+                return local_path
+            finally:
+                try:
+                    body.close()
+                except Exception as ce:
+                    logger.debug("Failed to close S3 response body: %s", ce)
+        except Exception as e:
+            logger.error(self._error_msg("Error downloading file from S3", e))
+            raise e
+
     def list_files(self, *, prefix: Optional[str] = None, bucket: Optional[str] = None, max_keys: int = 1000, continuation_token: Optional[str] = None) -> ListFilesResult:
         """列出对象，支持前缀过滤与分页；返回 keys/is_truncated/next_continuation_token。"""
         try:
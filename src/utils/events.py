@@ -0,0 +1,37 @@
+"""
+节点运行中的增量事件
+节点在产出部分结果时（如语义判断每解析出一行否定词、拓词每生成一个关键词）调用 emit，由外层（/stream_run）注册的监听器转成 SSE 事件推给客户端；
+监听器保存在上下文变量中，随 LangGraph 执行节点的线程 / 任务的上下文复制传递，没有监听器时 emit 不做任何事
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, Optional
+
+# 否定词事件：{"node_name": 节点名, "negatives": [{"search_term": 搜索词, "reason": 原因}, ...]}
+NEGATIVE_KEYWORD_EVENT = "negative_keyword"
+# 关键词建议事件：{"node_name": 节点名, "keywords": [{"keyword": ..., "match_type": ..., "competition": ..., "bid": ..., "reason": ...}, ...]}
+KEYWORD_RECOMMEND_EVENT = "keyword_recommend"
+
+Listener = Callable[[str, Dict[str, Any]], None]
+_listener: ContextVar[Optional[Listener]] = ContextVar("node_event_listener", default=None)
+
+
+@contextmanager
+def listen(listener: Listener) -> Iterator[None]:
+    """在当前上下文中注册事件监听器，之后创建的任务 / 复制的上下文都会继承"""
+    token = _listener.set(listener)
+    try:
+        yield
+    finally:
+        _listener.reset(token)
+
+
+def has_listener() -> bool:
+    return _listener.get() is not None
+
+
+def emit(event_type: str, **data: Any) -> None:
+    """发送事件；监听器需线程安全（节点可能在线程池中调用）"""
+    listener = _listener.get()
+    if listener is not None:
+        listener(event_type, data)
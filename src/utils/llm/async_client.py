@@ -0,0 +1,105 @@
+"""
+大模型异步调用
+coze_coding_dev_sdk 的 LLMClient 只提供同步的 invoke / stream，在 graph.ainvoke 中调用会占住一个工作线程，
+且任务取消时已发出的 HTTP 请求无法中断。这里复用 LLMClient 构造的 ChatOpenAI（请求头、鉴权与同步调用一致），
+改用其异步流式接口：等待响应时不占用线程，任务被取消时 CancelledError 在 await 处抛出，流被关闭，底层 HTTP 请求随之中断
+构造模型用的是 SDK 私有方法 LLMClient._create_llm，只在 create_chat_model 中调用，并核对 SDK 版本，升级后未核对时直接报错
+"""
+import asyncio
+import functools
+import importlib.metadata
+import os
+import weakref
+from contextlib import aclosing
+from typing import Any, Callable, List, Optional
+
+from coze_coding_dev_sdk import LLMClient
+from coze_coding_dev_sdk.llm.models import LLMConfig
+from cozeloop.decorator import observe
+from langchain_core.messages import AIMessage, BaseMessage
+
+# 每个事件循环内并发中的异步大模型调用上限（与线程池路径的 LLM_MAX_CONCURRENCY 含义相同）
+LLM_MAX_ASYNC_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+# 已核对 LLMClient._create_llm 签名及 LLMClient.stream 默认参数的 SDK 版本（主.次版本号）
+TESTED_SDK_VERSIONS = ("0.5",)
+
+
+def llm_semaphore() -> asyncio.Semaphore:
+    """当前事件循环共享的大模型并发信号量（asyncio.Semaphore 不能跨事件循环使用）"""
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _semaphores[loop] = asyncio.Semaphore(LLM_MAX_ASYNC_CONCURRENCY)
+    return semaphore
+
+
+@functools.lru_cache(maxsize=None)
+def check_sdk_version() -> str:
+    """返回已安装的 coze-coding-dev-sdk 版本；不在 TESTED_SDK_VERSIONS 中或私有方法不存在时抛出 RuntimeError"""
+    version = importlib.metadata.version("coze-coding-dev-sdk")
+    if ".".join(version.split(".")[:2]) not in TESTED_SDK_VERSIONS or not callable(getattr(LLMClient, "_create_llm", None)):
+        raise RuntimeError(
+            f"coze-coding-dev-sdk {version} 未经核对：utils.llm.async_client 依赖私有方法 LLMClient._create_llm，"
+            f"请核对其签名与 LLMClient.stream 的默认参数后更新 TESTED_SDK_VERSIONS"
+        )
+    return version
+
+
+def create_chat_model(
+    client: LLMClient,
+    model: str,
+    thinking: Optional[str],
+    caching: Optional[str],
+    temperature: Optional[float],
+    frequency_penalty: Optional[float],
+    top_p: Optional[float],
+    max_completion_tokens: Optional[int],
+) -> Any:
+    """按 LLMClient.stream 的方式构造流式 ChatOpenAI（唯一调用私有 _create_llm 的地方）"""
+    check_sdk_version()
+    return client._create_llm(
+        LLMConfig(
+            model=model,
+            thinking=thinking,
+            caching=caching,
+            temperature=temperature,
+            frequency_penalty=frequency_penalty,
+            top_p=top_p,
+            max_completion_tokens=max_completion_tokens,
+            streaming=True,
+        ),
+        use_caching=caching == "enabled",
+    )
+
+
+@observe(name="llm_ainvoke")
+async def ainvoke(
+    client: LLMClient,
+    messages: List[BaseMessage],
+    model: str = "doubao-seed-1-8-251228",
+    thinking: Optional[str] = "disabled",
+    caching: Optional[str] = "disabled",
+    temperature: Optional[float] = 1.0,
+    frequency_penalty: Optional[float] = 0,
+    top_p: Optional[float] = 0,
+    max_completion_tokens: Optional[int] = 32768,
+    on_chunk: Optional[Callable[[str], None]] = None,
+) -> AIMessage:
+    """
+    异步调用大模型，返回完整响应（与 LLMClient.invoke 相同：流式接收后拼装 content 与 response_metadata）
+    参数及默认值与 LLMClient.stream 相同；on_chunk 在每收到一段文本时调用，用于边接收边解析
+    """
+    llm = create_chat_model(client, model, thinking, caching, temperature, frequency_penalty, top_p, max_completion_tokens)
+    full_content = ""
+    response_metadata = {}
+    async with llm_semaphore():
+        async with aclosing(llm.astream(messages)) as stream:
+            async for chunk in stream:
+                if chunk.content:
+                    full_content += str(chunk.content)
+                    if on_chunk is not None:
+                        on_chunk(str(chunk.content))
+                if chunk.response_metadata:
+                    response_metadata.update(chunk.response_metadata)
+    return AIMessage(content=full_content, response_metadata=response_metadata)
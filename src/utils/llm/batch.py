@@ -0,0 +1,197 @@
+"""
+大模型分批并发调用
+把长列表切成批次，在线程池中并发调用（进程内所有调用共享一个有界信号量限制总并发），
+失败的批次单独重试，输出被截断的批次对半拆分后重试并合并结果，结果按批次原顺序返回
+异步节点使用 arun_batches：各批次作为协程并发执行，不占用线程，任务取消时所有进行中的批次随之取消
+"""
+import asyncio
+import contextvars
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, List, Optional, Sequence, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+DEFAULT_BATCH_SIZE = 200
+DEFAULT_CONCURRENCY = 4
+DEFAULT_RETRIES = 2
+# 重试等待：RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1)
+RETRY_BACKOFF_SECONDS = 1.0
+
+# 进程内所有大模型调用的并发上限（多个工作流同时运行时共享）
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+_llm_semaphore = threading.BoundedSemaphore(LLM_MAX_CONCURRENCY)
+
+
+class BatchError(RuntimeError):
+    """所有批次在重试后都失败"""
+
+
+class TruncatedError(RuntimeError):
+    """大模型输出达到 max_completion_tokens 被截断；partial 为截断前的输出"""
+
+    def __init__(self, partial: Any = None):
+        super().__init__("LLM output truncated at max_completion_tokens")
+        self.partial = partial
+
+
+def is_truncated(message: Any) -> bool:
+    """响应是否因达到最大输出 token 数而结束（OpenAI 兼容接口的 finish_reason 为 length）"""
+    metadata = getattr(message, "response_metadata", None) or {}
+    return metadata.get("finish_reason") == "length" or metadata.get("stop_reason") == "max_tokens"
+
+
+def join_text(parts: List[str]) -> str:
+    """拆分批次的默认合并方式：文本按行拼接"""
+    return "\n".join(part for part in parts if part)
+
+
+def split_batches(items: Sequence[T], size: int) -> List[Sequence[T]]:
+    """按固定大小切分批次"""
+    size = max(1, size)
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def _call_with_retry(
+    call: Callable[[T], R],
+    batch: T,
+    index: int,
+    retries: int,
+    merge: Callable[[List[R]], R] = join_text,
+) -> Optional[R]:
+    """
+    调用单个批次，失败后指数退避重试，重试耗尽返回 None
+    输出被截断时不原样重试，而是对半拆分分别调用再合并；任一半失败则整批返回 None
+    """
+    for attempt in range(retries + 1):
+        try:
+            with _llm_semaphore:
+                return call(batch)
+        except TruncatedError as e:
+            if len(batch) <= 1:
+                logger.warning(f"Batch {index} truncated with a single item, keeping partial output")
+                return e.partial
+            half = len(batch) // 2
+            logger.warning(f"Batch {index} truncated, splitting {len(batch)} items into {half} + {len(batch) - half}")
+            parts = [_call_with_retry(call, part, index, retries, merge) for part in (batch[:half], batch[half:])]
+            if any(part is None for part in parts):
+                return None
+            return merge(parts)
+        except Exception as e:
+            if attempt == retries:
+                logger.error(f"Batch {index} failed after {retries + 1} attempts: {e}")
+                return None
+            logger.warning(f"Batch {index} attempt {attempt + 1} failed, retrying: {e}")
+            time.sleep(RETRY_BACKOFF_SECONDS * 2 ** attempt)
+    return None
+
+
+def run_batches(
+    batches: Sequence[T],
+    call: Callable[[T], R],
+    concurrency: int = DEFAULT_CONCURRENCY,
+    retries: int = DEFAULT_RETRIES,
+    merge: Callable[[List[R]], R] = join_text,
+) -> List[Optional[R]]:
+    """
+    并发执行 call(batch)，返回与 batches 顺序一致的结果；重试后仍失败的批次结果为 None
+    call 抛出 TruncatedError 时批次被拆分重试，各部分结果用 merge 合并
+    全部批次失败时抛出 BatchError
+    """
+    if not batches:
+        return []
+    if len(batches) == 1 or concurrency <= 1:
+        results: List[Any] = [_call_with_retry(call, b, i, retries, merge) for i, b in enumerate(batches)]
+    else:
+        with ThreadPoolExecutor(max_workers=min(concurrency, len(batches))) as executor:
+            # 每个任务复制当前上下文，保证链路追踪等上下文变量在线程中可见
+            futures = [
+                executor.submit(contextvars.copy_context().run, _call_with_retry, call, b, i, retries, merge)
+                for i, b in enumerate(batches)
+            ]
+            results = [f.result() for f in futures]
+    failed = sum(r is None for r in results)
+    if failed == len(results):
+        raise BatchError(f"All {failed} batches failed")
+    if failed:
+        logger.error(f"{failed}/{len(results)} batches failed and were skipped")
+    return results
+
+
+async def _acall_with_retry(
+    call: Callable[[T], Awaitable[R]],
+    batch: T,
+    index: int,
+    retries: int,
+    merge: Callable[[List[R]], R] = join_text,
+) -> Optional[R]:
+    """_call_with_retry 的异步版本；取消（CancelledError）不属于失败，直接向上传播"""
+    for attempt in range(retries + 1):
+        try:
+            return await call(batch)
+        except TruncatedError as e:
+            if len(batch) <= 1:
+                logger.warning(f"Batch {index} truncated with a single item, keeping partial output")
+                return e.partial
+            half = len(batch) // 2
+            logger.warning(f"Batch {index} truncated, splitting {len(batch)} items into {half} + {len(batch) - half}")
+            parts = await asyncio.gather(
+                *(_acall_with_retry(call, part, index, retries, merge) for part in (batch[:half], batch[half:]))
+            )
+            if any(part is None for part in parts):
+                return None
+            return merge(list(parts))
+        except Exception as e:
+            if attempt == retries:
+                logger.error(f"Batch {index} failed after {retries + 1} attempts: {e}")
+                return None
+            logger.warning(f"Batch {index} attempt {attempt + 1} failed, retrying: {e}")
+            await asyncio.sleep(RETRY_BACKOFF_SECONDS * 2 ** attempt)
+    return None
+
+
+async def arun_batches(
+    batches: Sequence[T],
+    call: Callable[[T], Awaitable[R]],
+    concurrency: int = DEFAULT_CONCURRENCY,
+    retries: int = DEFAULT_RETRIES,
+    merge: Callable[[List[R]], R] = join_text,
+) -> List[Optional[R]]:
+    """run_batches 的异步版本：同一节点内最多 concurrency 个批次同时进行，结果与失败处理相同"""
+    if not batches:
+        return []
+    limit = asyncio.Semaphore(max(1, concurrency))
+
+    async def run_one(batch: T, index: int) -> Optional[R]:
+        async with limit:
+            return await _acall_with_retry(call, batch, index, retries, merge)
+
+    results = await asyncio.gather(*(run_one(b, i) for i, b in enumerate(batches)))
+    failed = sum(r is None for r in results)
+    if failed == len(results):
+        raise BatchError(f"All {failed} batches failed")
+    if failed:
+        logger.error(f"{failed}/{len(results)} batches failed and were skipped")
+    return list(results)
+
+
+def message_text(message: Any) -> str:
+    """提取大模型响应的文本内容（content 可能是字符串或分段列表）"""
+    content = message.content
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        text_parts = []
+        for item in content:
+            if isinstance(item, dict) and item.get("type") == "text":
+                text_parts.append(item.get("text", ""))
+            elif isinstance(item, str):
+                text_parts.append(item)
+        return " ".join(text_parts)
+    return str(content)
@@ -0,0 +1,83 @@
+"""
+按 token 预算装箱
+每个批次的输入（提示词 + 本批搜索词）不超过上下文窗口减去输出预留，预计输出不超过 max_completion_tokens，
+在两者之内尽量多装词；预算与单词输出估算取 LLM 配置中的 budget 段：
+- context_tokens: 模型上下文窗口
+- output_tokens_per_item: 每个被输出的词除词本身外的输出 token 数（如 " | 原因"）
+- output_ratio: 预计被输出的词占批次的比例（语义判断只输出不相关词）
+- safety_margin: 预算的使用比例，给估算误差留余量
+估算偏低导致输出被截断时，由 run_batches 拆分批次重试
+"""
+from typing import Any, Callable, Dict, List, NamedTuple, Sequence, TypeVar
+
+from utils.report.aggregate import term_tokens
+
+T = TypeVar("T")
+
+DEFAULT_CONTEXT_TOKENS = 32768
+DEFAULT_MAX_COMPLETION_TOKENS = 4096
+DEFAULT_OUTPUT_TOKENS_PER_ITEM = 12
+DEFAULT_OUTPUT_RATIO = 1.0
+DEFAULT_SAFETY_MARGIN = 0.9
+
+
+class TokenBudget(NamedTuple):
+    """单个批次可用的输入 / 输出 token 数（输入已扣除固定提示词）"""
+    input_tokens: int
+    output_tokens: int
+    output_tokens_per_item: float
+    output_ratio: float
+
+    def output_cost(self, item_tokens: int) -> float:
+        """单个词的预计输出 token 数"""
+        return self.output_ratio * (item_tokens + self.output_tokens_per_item)
+
+
+def token_budget(llm_config: Dict[str, Any], budget_cfg: Dict[str, Any], prompt_tokens: int) -> TokenBudget:
+    """由 LLM 配置（max_completion_tokens）、budget 段与固定提示词 token 数计算批次预算"""
+    margin = budget_cfg.get("safety_margin", DEFAULT_SAFETY_MARGIN)
+    max_output = llm_config.get("max_completion_tokens", DEFAULT_MAX_COMPLETION_TOKENS)
+    context = budget_cfg.get("context_tokens", DEFAULT_CONTEXT_TOKENS)
+    return TokenBudget(
+        input_tokens=max(0, int((context - max_output) * margin) - prompt_tokens),
+        output_tokens=int(max_output * margin),
+        output_tokens_per_item=budget_cfg.get("output_tokens_per_item", DEFAULT_OUTPUT_TOKENS_PER_ITEM),
+        output_ratio=budget_cfg.get("output_ratio", DEFAULT_OUTPUT_RATIO),
+    )
+
+
+def prompt_tokens(*texts: str) -> int:
+    """固定提示词（系统提示词、不含搜索词的用户提示词）的 token 数"""
+    return sum(term_tokens(text) for text in texts)
+
+
+def pack_batches(
+    items: Sequence[T],
+    budget: TokenBudget,
+    max_items: int = 0,
+    item_tokens: Callable[[T], int] = term_tokens,
+) -> List[Sequence[T]]:
+    """
+    按原顺序贪心装箱：加入下一个词会超出输入或输出预算（或达到 max_items）时开始新批次
+    单个词自身超出预算时独占一个批次
+    """
+    batches: List[Sequence[T]] = []
+    start = 0
+    used_input = 0
+    used_output = 0.0
+    for i, item in enumerate(items):
+        tokens = item_tokens(item)
+        output = budget.output_cost(tokens)
+        full = (
+            used_input + tokens > budget.input_tokens
+            or used_output + output > budget.output_tokens
+            or (max_items > 0 and i - start >= max_items)
+        )
+        if i > start and full:
+            batches.append(items[start:i])
+            start, used_input, used_output = i, 0, 0.0
+        used_input += tokens
+        used_output += output
+    if start < len(items):
+        batches.append(items[start:])
+    return batches
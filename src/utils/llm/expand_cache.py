@@ -0,0 +1,235 @@
+"""
+拓词结果缓存
+卖家一天内会对同一个 listing 多次运行工作流，按 (产品信息, 种子关键词, 模型, 温度, 提示词版本) 的内容哈希缓存拓词节点的原始输出：
+- 进程内 LRU：命中时不访问磁盘 / 对象存储
+- 持久层：本地磁盘（默认）或对象存储（S3SyncStorage），跨进程、跨重启共享
+两级缓存都按 TTL 过期；持久层读写失败时只使用进程内缓存
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, NamedTuple, Optional, Tuple
+
+from utils.llm.verdict_cache import product_hash
+from utils.report.aggregate import normalize_term
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = 24 * 3600
+DEFAULT_LRU_SIZE = 1000
+# 对象存储中缓存对象的 key 前缀
+S3_KEY_PREFIX = "cache/expand_keywords"
+
+
+class ExpandKey(NamedTuple):
+    """缓存键的组成部分"""
+    product_hash: str
+    seed_keywords: str
+    model: str
+    temperature: str
+    prompt_version: str
+
+    @property
+    def cache_key(self) -> str:
+        return hashlib.sha256("\x1f".join(self).encode("utf-8")).hexdigest()
+
+
+def expand_key(product_info: str, seed_keywords: str, model: str, temperature: Any, version: str) -> ExpandKey:
+    """产品信息取归一化哈希，种子关键词归一化（大小写、全半角、空白）后参与哈希"""
+    return ExpandKey(product_hash(product_info), normalize_term(seed_keywords), model, repr(temperature), version)
+
+
+class LRUExpandCache:
+    """进程内 LRU 缓存，条目带过期时间"""
+
+    def __init__(self, max_size: int = DEFAULT_LRU_SIZE, ttl: float = DEFAULT_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._items: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            if item[0] <= time.time():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return item[1]
+
+    def put(self, key: str, value: str, expires_at: Optional[float] = None) -> None:
+        with self._lock:
+            self._items[key] = (expires_at or time.time() + self.ttl, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+def _encode(key: ExpandKey, value: str, expires_at: float) -> bytes:
+    return json.dumps(
+        {"key": key._asdict(), "longtail_keywords": value, "created_at": time.time(), "expires_at": expires_at},
+        ensure_ascii=False,
+    ).encode("utf-8")
+
+
+def _decode(data: bytes) -> Optional[Tuple[float, str]]:
+    """返回 (过期时间戳, 拓词结果)，已过期返回 None"""
+    entry = json.loads(data)
+    if entry["expires_at"] <= time.time():
+        return None
+    return entry["expires_at"], entry["longtail_keywords"]
+
+
+class DiskExpandCache:
+    """本地磁盘缓存：每个键一个 JSON 文件（按哈希前两位分目录），先写临时文件再原子替换"""
+
+    def __init__(self, root: str, ttl: float = DEFAULT_TTL_SECONDS):
+        self.root = root
+        self.ttl = ttl
+
+    def _path(self, cache_key: str) -> str:
+        return os.path.join(self.root, cache_key[:2], f"{cache_key}.json")
+
+    def get(self, cache_key: str) -> Optional[Tuple[float, str]]:
+        path = self._path(cache_key)
+        try:
+            with open(path, "rb") as fd:
+                entry = _decode(fd.read())
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Expand cache read failed: {e}")
+            return None
+        if entry is None:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        return entry
+
+    def put(self, key: ExpandKey, value: str) -> None:
+        path = self._path(key.cache_key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(_encode(key, value, time.time() + self.ttl))
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Expand cache write failed: {e}")
+
+
+class S3ExpandCache:
+    """对象存储缓存：key 为 {S3_KEY_PREFIX}/{哈希}.json；首次访问失败后停用"""
+
+    def __init__(self, ttl: float = DEFAULT_TTL_SECONDS):
+        self.ttl = ttl
+        self._storage = None
+        self._disabled = False
+        self._lock = threading.Lock()
+
+    def _get_storage(self):
+        if self._storage is None and not self._disabled:
+            with self._lock:
+                if self._storage is None and not self._disabled:
+                    try:
+                        from utils.report.source import get_report_storage
+
+                        self._storage = get_report_storage()
+                    except Exception as e:
+                        logger.warning(f"Expand cache object storage unavailable, using in-process cache only: {e}")
+                        self._disabled = True
+        return self._storage
+
+    @staticmethod
+    def _key(cache_key: str) -> str:
+        return f"{S3_KEY_PREFIX}/{cache_key}.json"
+
+    def get(self, cache_key: str) -> Optional[Tuple[float, str]]:
+        storage = self._get_storage()
+        if storage is None:
+            return None
+        try:
+            if not storage.file_exists(file_key=self._key(cache_key)):
+                return None
+            return _decode(storage.read_file(file_key=self._key(cache_key)))
+        except Exception as e:
+            logger.warning(f"Expand cache lookup failed: {e}")
+            return None
+
+    def put(self, key: ExpandKey, value: str) -> None:
+        storage = self._get_storage()
+        if storage is None:
+            return
+        try:
+            storage.write_file(
+                file_key=self._key(key.cache_key),
+                file_content=_encode(key, value, time.time() + self.ttl),
+                content_type="application/json",
+            )
+        except Exception as e:
+            logger.warning(f"Expand cache write failed: {e}")
+
+
+class ExpandCache:
+    """两级缓存：先查进程内 LRU，未命中的再查持久层并回填 LRU"""
+
+    def __init__(self, memory: LRUExpandCache, durable: Optional[Any] = None):
+        self.memory = memory
+        self.durable = durable
+
+    def get(self, key: ExpandKey) -> Tuple[Optional[str], str]:
+        """返回 (缓存的拓词结果, 命中层级 memory / durable / 空串)"""
+        cache_key = key.cache_key
+        value = self.memory.get(cache_key)
+        if value is not None:
+            return value, "memory"
+        if self.durable is not None:
+            entry = self.durable.get(cache_key)
+            if entry is not None:
+                expires_at, value = entry
+                self.memory.put(cache_key, value, expires_at=expires_at)
+                return value, "durable"
+        return None, ""
+
+    def put(self, key: ExpandKey, value: str) -> None:
+        self.memory.put(key.cache_key, value)
+        if self.durable is not None:
+            self.durable.put(key, value)
+
+
+_cache: Optional[ExpandCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_expand_cache() -> ExpandCache:
+    """
+    进程内共享的拓词结果缓存
+    环境变量：EXPAND_CACHE_BACKEND（disk 默认 / s3 / memory）、EXPAND_CACHE_DIR（disk 时的目录，默认系统临时目录下 expand_keywords_cache）、
+    EXPAND_CACHE_TTL_SECONDS、EXPAND_CACHE_LRU_SIZE
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                ttl = float(os.getenv("EXPAND_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS))
+                memory = LRUExpandCache(int(os.getenv("EXPAND_CACHE_LRU_SIZE", DEFAULT_LRU_SIZE)), ttl)
+                backend = os.getenv("EXPAND_CACHE_BACKEND", "disk")
+                durable: Optional[Any] = None
+                if backend == "disk":
+                    root = os.getenv("EXPAND_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "expand_keywords_cache")
+                    durable = DiskExpandCache(root, ttl)
+                elif backend == "s3":
+                    durable = S3ExpandCache(ttl)
+                _cache = ExpandCache(memory, durable)
+    return _cache
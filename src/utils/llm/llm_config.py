@@ -0,0 +1,77 @@
+"""
+大模型节点配置加载
+节点的 config/*_llm_cfg.json 每次调用都要读取并解析，用户提示词模板也要重新编译为 Jinja2 Template。
+这里按文件路径在进程内缓存解析后的配置、编译好的模板与提示词版本，每次调用只 stat 一次文件：
+修改时间或文件大小变化时重新加载，修改提示词后不必重启服务；文件不存在时返回空配置
+"""
+import hashlib
+import json
+import os
+import stat
+import threading
+from typing import Any, Dict, NamedTuple, Tuple
+
+from jinja2 import Template
+from langchain_core.runnables import RunnableConfig
+
+
+def prompt_version(sp: str, up: str, explicit: str = "") -> str:
+    """提示词版本：配置中显式给出时使用配置值，否则取系统提示词与用户提示词模板的哈希"""
+    if explicit:
+        return explicit
+    return hashlib.sha256(f"{sp}\x00{up}".encode("utf-8")).hexdigest()[:16]
+
+
+class NodeLLMConfig(NamedTuple):
+    """
+    解析后的节点配置（多次调用共享，只读）
+    - raw: 整个配置文件；llm: 其中的 config 段（model、temperature 等）
+    - sp / up: 系统提示词与用户提示词模板原文；up_tpl: 编译好的用户提示词模板
+    - version: 提示词版本（配置中的 prompt_version，未配置时为提示词哈希）
+    """
+    raw: Dict[str, Any]
+    llm: Dict[str, Any]
+    sp: str
+    up: str
+    up_tpl: Template
+    version: str
+
+
+def parse_llm_config(raw: Dict[str, Any]) -> NodeLLMConfig:
+    sp = raw.get("sp", "")
+    up = raw.get("up", "")
+    return NodeLLMConfig(raw, raw.get("config", {}), sp, up, Template(up), prompt_version(sp, up, raw.get("prompt_version", "")))
+
+
+EMPTY_CONFIG = parse_llm_config({})
+
+# 路径 -> ((修改时间, 文件大小), 配置)
+_configs: Dict[str, Tuple[Tuple[int, int], NodeLLMConfig]] = {}
+_lock = threading.Lock()
+
+
+def load_llm_config_file(path: str) -> NodeLLMConfig:
+    """按路径加载配置：文件未变化时返回缓存，修改时间或大小变化时重新解析"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return EMPTY_CONFIG
+    if not stat.S_ISREG(st.st_mode):
+        return EMPTY_CONFIG
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached = _configs.get(path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    with open(path, "r", encoding="utf-8") as fd:
+        parsed = parse_llm_config(json.load(fd))
+    with _lock:
+        _configs[path] = (stamp, parsed)
+    return parsed
+
+
+def load_llm_config(config: RunnableConfig) -> NodeLLMConfig:
+    """按节点 metadata 中的 llm_cfg（相对 COZE_WORKSPACE_PATH）加载配置，未配置时返回空配置"""
+    llm_cfg = config.get("metadata", {}).get("llm_cfg", "")
+    if not llm_cfg:
+        return EMPTY_CONFIG
+    return load_llm_config_file(os.path.join(os.getenv("COZE_WORKSPACE_PATH", ""), llm_cfg))
@@ -0,0 +1,46 @@
+"""
+大模型同步流式调用
+LLMClient.invoke 内部就是流式接收后拼装完整响应，这里直接使用 LLMClient.stream，
+在拼装的同时把每段文本交给 on_chunk，调用方可以在响应结束前处理已经完整的行（LineSplitter 负责按行切分）
+"""
+from typing import Any, Callable, List, Optional
+
+from coze_coding_dev_sdk import LLMClient
+from langchain_core.messages import AIMessage, BaseMessage
+
+
+def invoke_streaming(
+    client: LLMClient,
+    messages: List[BaseMessage],
+    on_chunk: Optional[Callable[[str], None]] = None,
+    **params: Any,
+) -> AIMessage:
+    """与 LLMClient.invoke 返回相同的完整响应，接收过程中每段文本调用一次 on_chunk"""
+    full_content = ""
+    response_metadata = {}
+    for chunk in client.stream(messages=messages, **params):
+        if chunk.content:
+            full_content += str(chunk.content)
+            if on_chunk is not None:
+                on_chunk(str(chunk.content))
+        if chunk.response_metadata:
+            response_metadata.update(chunk.response_metadata)
+    return AIMessage(content=full_content, response_metadata=response_metadata)
+
+
+class LineSplitter:
+    """把流式输出的文本片段切成完整的行：feed 返回本次凑齐的行，close 返回最后一行（不以换行结尾的部分）"""
+
+    def __init__(self):
+        self._pending = ""
+
+    def feed(self, text: str) -> List[str]:
+        self._pending += text
+        if "\n" not in self._pending:
+            return []
+        *lines, self._pending = self._pending.split("\n")
+        return lines
+
+    def close(self) -> List[str]:
+        line, self._pending = self._pending, ""
+        return [line] if line.strip() else []
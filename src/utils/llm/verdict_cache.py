@@ -0,0 +1,297 @@
+"""
+语义判断结果缓存
+同一产品的同一批搜索词每天都会重复送给大模型判断，按 (产品信息哈希, 归一化搜索词, 模型, 提示词版本) 缓存每个词的判断结果：
+- 进程内 LRU：命中时不访问数据库
+- Postgres（storage.database）：跨进程、跨重启共享，过期记录在写入时清理
+两级缓存都按 TTL 过期；数据库不可用时只使用进程内缓存，冷却一段时间后再尝试连接
+"""
+import datetime
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from utils.report.aggregate import normalize_term
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600
+DEFAULT_LRU_SIZE = 100_000
+# 单条 SQL 中 IN 列表 / 批量写入的最大行数
+DB_BATCH_ROWS = 1000
+# 数据库连接或建表失败后，间隔多久再次尝试
+DB_RETRY_SECONDS = 60.0
+# 模型输出行没有 "|" 分隔符时的默认原因
+DEFAULT_REASON = "语义不相关"
+
+
+class VerdictKey(NamedTuple):
+    """缓存键的组成部分"""
+    product_hash: str
+    search_term: str
+    model: str
+    prompt_version: str
+
+    @property
+    def cache_key(self) -> str:
+        return hashlib.sha256("\x1f".join(self).encode("utf-8")).hexdigest()
+
+
+class Verdict(NamedTuple):
+    """单个搜索词的判断结果"""
+    is_bad: bool
+    reason: str = ""
+
+
+def product_hash(product_info: str) -> str:
+    """产品信息归一化后的哈希"""
+    return hashlib.sha256(normalize_term(product_info).encode("utf-8")).hexdigest()
+
+
+def parse_verdict_line(line: str) -> Optional[Tuple[str, str]]:
+    """解析模型输出的一行 "搜索词 | 原因"，没有分隔符时整行作为搜索词，空行返回 None"""
+    line = line.strip()
+    if not line:
+        return None
+    if "|" in line:
+        parts = line.split("|")
+        return parts[0].strip(), parts[1].strip()
+    return line, DEFAULT_REASON
+
+
+def parse_verdict_lines(text: str) -> List[Tuple[str, str]]:
+    """解析模型的完整输出"""
+    return [verdict for verdict in map(parse_verdict_line, text.split("\n")) if verdict is not None]
+
+
+class VerdictLineParser:
+    """流式解析：逐段喂入模型输出，每凑齐一行（遇到换行）就解析出来；最后一行在 close 时解析"""
+
+    def __init__(self):
+        self._pending = ""
+
+    def feed(self, text: str) -> List[Tuple[str, str]]:
+        self._pending += text
+        if "\n" not in self._pending:
+            return []
+        *lines, self._pending = self._pending.split("\n")
+        return [verdict for verdict in map(parse_verdict_line, lines) if verdict is not None]
+
+    def close(self) -> List[Tuple[str, str]]:
+        verdict = parse_verdict_line(self._pending)
+        self._pending = ""
+        return [verdict] if verdict is not None else []
+
+
+class LRUVerdictCache:
+    """进程内 LRU 缓存，条目带过期时间"""
+
+    def __init__(self, max_size: int = DEFAULT_LRU_SIZE, ttl: float = DEFAULT_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._items: "OrderedDict[str, Tuple[float, Verdict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Verdict]:
+        now = time.time()
+        found: Dict[str, Verdict] = {}
+        with self._lock:
+            for key in keys:
+                item = self._items.get(key)
+                if item is None:
+                    continue
+                if item[0] <= now:
+                    del self._items[key]
+                    continue
+                self._items.move_to_end(key)
+                found[key] = item[1]
+        return found
+
+    def put_many(self, verdicts: Dict[str, Verdict], expires_at: Optional[float] = None) -> None:
+        expires_at = expires_at or time.time() + self.ttl
+        with self._lock:
+            for key, verdict in verdicts.items():
+                self._items[key] = (expires_at, verdict)
+                self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class PostgresVerdictCache:
+    """基于 storage.database 的 Postgres 缓存；首次使用时建表，连接或建表失败后冷却 retry_seconds 秒再重试"""
+
+    def __init__(self, ttl: float = DEFAULT_TTL_SECONDS, retry_seconds: float = DB_RETRY_SECONDS):
+        self.ttl = ttl
+        self.retry_seconds = retry_seconds
+        self._ready = False
+        # 冷却结束前不再尝试连接（单调时钟）
+        self._retry_at = 0.0
+        self._lock = threading.Lock()
+
+    def _ensure_table(self) -> bool:
+        if self._ready or time.monotonic() < self._retry_at:
+            return self._ready
+        with self._lock:
+            if self._ready or time.monotonic() < self._retry_at:
+                return self._ready
+            try:
+                from storage.database.db import get_engine
+                from storage.database.shared.model import SemanticVerdict
+
+                SemanticVerdict.__table__.create(get_engine(), checkfirst=True)
+                self._ready = True
+            except Exception as e:
+                logger.warning(
+                    f"Verdict cache database unavailable, using in-process cache only, retrying in {self.retry_seconds:.0f}s: {e}"
+                )
+                self._retry_at = time.monotonic() + self.retry_seconds
+        return self._ready
+
+    def get_many(self, keys: List[str]) -> Dict[str, Tuple[float, Verdict]]:
+        """返回 cache_key -> (过期时间戳, 判断结果)，只包含未过期的记录"""
+        if not keys or not self._ensure_table():
+            return {}
+        from sqlalchemy import select
+        from storage.database.db import get_session
+        from storage.database.shared.model import SemanticVerdict
+
+        now = datetime.datetime.now(datetime.timezone.utc)
+        found: Dict[str, Tuple[float, Verdict]] = {}
+        try:
+            with get_session() as session:
+                for i in range(0, len(keys), DB_BATCH_ROWS):
+                    rows = session.execute(
+                        select(SemanticVerdict.cache_key, SemanticVerdict.is_bad, SemanticVerdict.reason, SemanticVerdict.expires_at)
+                        .where(SemanticVerdict.cache_key.in_(keys[i:i + DB_BATCH_ROWS]))
+                        .where(SemanticVerdict.expires_at > now)
+                    )
+                    for cache_key, is_bad, reason, expires_at in rows:
+                        found[cache_key] = (expires_at.timestamp(), Verdict(is_bad, reason))
+        except Exception as e:
+            logger.warning(f"Verdict cache lookup failed: {e}")
+        return found
+
+    def put_many(self, entries: List[Tuple[VerdictKey, Verdict]]) -> None:
+        """写入（已存在则覆盖）判断结果，并清理过期记录"""
+        if not entries or not self._ensure_table():
+            return
+        from sqlalchemy import delete
+        from sqlalchemy.dialects.postgresql import insert
+        from storage.database.db import get_session
+        from storage.database.shared.model import SemanticVerdict
+
+        now = datetime.datetime.now(datetime.timezone.utc)
+        expires_at = now + datetime.timedelta(seconds=self.ttl)
+        rows = [
+            {
+                "cache_key": key.cache_key,
+                "product_hash": key.product_hash,
+                "search_term": key.search_term,
+                "model": key.model,
+                "prompt_version": key.prompt_version,
+                "is_bad": verdict.is_bad,
+                "reason": verdict.reason,
+                "created_at": now,
+                "expires_at": expires_at,
+            }
+            for key, verdict in entries
+        ]
+        try:
+            with get_session() as session:
+                for i in range(0, len(rows), DB_BATCH_ROWS):
+                    stmt = insert(SemanticVerdict).values(rows[i:i + DB_BATCH_ROWS])
+                    session.execute(stmt.on_conflict_do_update(
+                        index_elements=[SemanticVerdict.cache_key],
+                        set_={
+                            "is_bad": stmt.excluded.is_bad,
+                            "reason": stmt.excluded.reason,
+                            "created_at": stmt.excluded.created_at,
+                            "expires_at": stmt.excluded.expires_at,
+                        },
+                    ))
+                session.execute(delete(SemanticVerdict).where(SemanticVerdict.expires_at <= now))
+                session.commit()
+        except Exception as e:
+            logger.warning(f"Verdict cache write failed: {e}")
+
+
+class VerdictCache:
+    """两级缓存：先查进程内 LRU，未命中的再查 Postgres 并回填 LRU"""
+
+    def __init__(self, memory: LRUVerdictCache, database: Optional[PostgresVerdictCache] = None):
+        self.memory = memory
+        self.database = database
+
+    def get_many(self, keys: List[str]) -> Tuple[Dict[str, Verdict], Dict[str, int]]:
+        """返回 (命中的判断结果, 各级命中数)"""
+        found = self.memory.get_many(keys)
+        memory_hits = len(found)
+        db_hits = 0
+        if self.database is not None and len(found) < len(keys):
+            rows = self.database.get_many([k for k in keys if k not in found])
+            db_hits = len(rows)
+            for key, (expires_at, verdict) in rows.items():
+                self.memory.put_many({key: verdict}, expires_at=expires_at)
+                found[key] = verdict
+        return found, {"memory_hits": memory_hits, "db_hits": db_hits}
+
+    def put_many(self, entries: List[Tuple[VerdictKey, Verdict]]) -> None:
+        self.memory.put_many({key.cache_key: verdict for key, verdict in entries})
+        if self.database is not None:
+            self.database.put_many(entries)
+
+
+_cache: Optional[VerdictCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_verdict_cache() -> VerdictCache:
+    """
+    进程内共享的判断结果缓存
+    环境变量：VERDICT_CACHE_BACKEND（postgres / memory，默认设置了 PGDATABASE_URL 时为 postgres，否则为 memory）、
+    VERDICT_CACHE_TTL_SECONDS、VERDICT_CACHE_LRU_SIZE
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                ttl = float(os.getenv("VERDICT_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS))
+                memory = LRUVerdictCache(int(os.getenv("VERDICT_CACHE_LRU_SIZE", DEFAULT_LRU_SIZE)), ttl)
+                backend = os.getenv("VERDICT_CACHE_BACKEND") or ("postgres" if os.getenv("PGDATABASE_URL") else "memory")
+                database = PostgresVerdictCache(ttl) if backend == "postgres" else None
+                _cache = VerdictCache(memory, database)
+    return _cache
+
+
+def cache_stats(
+    terms: int, memory_hits: int = 0, db_hits: int = 0, failed_batches: int = 0, failed_terms: int = 0
+) -> Dict[str, Any]:
+    """
+    缓存命中统计（terms 为去重后的搜索词数）
+    failed_batches / failed_terms: 重试后仍失败的批次数及其涉及的搜索词数（这些词未经判断，按相关处理）
+    """
+    hits = memory_hits + db_hits
+    return {
+        "terms": terms,
+        "memory_hits": memory_hits,
+        "db_hits": db_hits,
+        "misses": terms - hits,
+        "hit_ratio": round(hits / terms, 4) if terms else 0.0,
+        "failed_batches": failed_batches,
+        "failed_terms": failed_terms,
+    }
+
+
+def combine_cache_stats(stats: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """合并多次判断（如流式模式下各分块）的缓存命中统计"""
+    totals = {"terms": 0, "memory_hits": 0, "db_hits": 0, "failed_batches": 0, "failed_terms": 0}
+    for item in stats:
+        for name in totals:
+            totals[name] += item.get(name, 0)
+    return cache_stats(**totals)
@@ -0,0 +1,118 @@
+"""
+搜索词聚合
+同一搜索词在报表中按广告活动、广告组、日期重复出现，按归一化后的搜索词做哈希聚合，
+点击、花费、订单（以及展示量、销售额）求和，下游筛选和大模型判断每个词只处理一次
+"""
+import unicodedata
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.report.table import KeywordTable
+
+# 可求和的数值列
+SUM_COLUMNS = ("clicks", "spend", "orders", "impressions", "sales")
+
+
+def normalize_term(term: str) -> str:
+    """搜索词归一化：全角转半角（NFKC）、大小写折叠、空白折叠"""
+    # 纯 ASCII 的词 NFKC 不变、casefold 等同 lower，走快速路径
+    if term.isascii():
+        return " ".join(term.lower().split())
+    return " ".join(unicodedata.normalize("NFKC", term).casefold().split())
+
+
+def factorize(values: List[Any]) -> Tuple[np.ndarray, List[Any]]:
+    """哈希分组编码：返回每个值的组号（按首次出现顺序编号）与各组的取值"""
+    index: Dict[Any, int] = {}
+    codes = np.fromiter((index.setdefault(v, len(index)) for v in values), dtype=np.int64, count=len(values))
+    return codes, list(index)
+
+
+def term_codes(search_term: np.ndarray) -> Tuple[np.ndarray, List[str]]:
+    """
+    按归一化搜索词分组
+    先对原始字符串去重，只对去重后的词做归一化，再按归一化结果二次分组
+    """
+    raw_codes, raw_terms = factorize(search_term.tolist())
+    norm_codes, norm_terms = factorize([normalize_term(t) for t in raw_terms])
+    return norm_codes[raw_codes], norm_terms
+
+
+def _group_sum(codes: np.ndarray, values: np.ndarray, size: int) -> np.ndarray:
+    """按组号求和，保持原列类型"""
+    sums = np.bincount(codes, weights=values, minlength=size)
+    if values.dtype.kind == "i":
+        return np.rint(sums).astype(values.dtype)
+    return sums
+
+
+def campaign_breakdown(table: KeywordTable, codes: np.ndarray, terms: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+    """按 (搜索词, 广告活动, 广告组) 聚合，得到每个搜索词在各广告活动/广告组下的明细"""
+    if table.campaign is None:
+        return {}
+    ad_group = table.ad_group if table.ad_group is not None else np.full(len(table), "", dtype=object)
+    keys = list(zip(codes.tolist(), table.campaign.tolist(), ad_group.tolist()))
+    group_codes, groups = factorize(keys)
+    size = len(groups)
+    sums = {
+        name: _group_sum(group_codes, getattr(table, name), size).tolist()
+        for name in SUM_COLUMNS
+        if getattr(table, name) is not None
+    }
+
+    breakdown: Dict[str, List[Dict[str, Any]]] = {}
+    for i, (code, campaign, group) in enumerate(groups):
+        entry: Dict[str, Any] = {"campaign": campaign, "ad_group": group}
+        for name, values in sums.items():
+            entry[name] = values[i]
+        breakdown.setdefault(terms[code], []).append(entry)
+    return breakdown
+
+
+def aggregate_by_term(
+    table: KeywordTable,
+    keep_breakdown: bool = False,
+) -> Tuple[KeywordTable, Optional[Dict[str, List[Dict[str, Any]]]]]:
+    """
+    按归一化搜索词聚合报表
+    返回 (聚合后的表, 广告活动明细索引)；聚合后的表不含广告活动/广告组列，
+    keep_breakdown 为 False 或报表不含广告活动列时明细索引为 None
+    """
+    if not len(table):
+        return table, ({} if keep_breakdown else None)
+
+    codes, terms = term_codes(table.search_term)
+    size = len(terms)
+    columns: Dict[str, np.ndarray] = {"search_term": np.array(terms, dtype=object)}
+    for name in SUM_COLUMNS:
+        values = getattr(table, name)
+        if values is not None:
+            columns[name] = _group_sum(codes, values, size)
+    aggregated = KeywordTable(**columns)
+
+    breakdown = campaign_breakdown(table, codes, terms) if keep_breakdown else None
+    return aggregated, breakdown
+
+
+def term_tokens(term: str) -> int:
+    """
+    粗略估算单行文本送入大模型的 token 数
+    按 UTF-8 约 4 字节一个 token 折算，每行另计 1 个 token
+    """
+    return len(term.encode("utf-8")) // 4 + 1
+
+
+def estimate_tokens(terms: List[str]) -> int:
+    """粗略估算搜索词列表送入大模型的 token 数（每行一个词）"""
+    return sum(term_tokens(term) for term in terms)
+
+
+def aggregate_stats(table: KeywordTable, aggregated: KeywordTable) -> Dict[str, int]:
+    """聚合前后的行数与预估 token 数"""
+    return {
+        "rows_before": len(table),
+        "rows_after": len(aggregated),
+        "tokens_before": estimate_tokens(table.search_term.tolist()),
+        "tokens_after": estimate_tokens(aggregated.search_term.tolist()),
+    }
@@ -0,0 +1,119 @@
+"""
+近重复搜索词聚类
+"wireless earbuds for running"、"wireless earbud for runner"、"running wireless earbuds" 这类词只差词形、词序和虚词，
+按排序后的词干集合（sorted-token signature）分组：归一化 → 分词 → 去虚词 → 词干化 → 去重排序，签名相同即同一簇
+每个词只做一次签名计算，按签名哈希分组，整体线性时间
+"""
+import re
+from typing import Any, Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from utils.report.aggregate import factorize, normalize_term
+
+# 虚词：只由虚词组成的词组不作为否定词组或挖掘结果，判断搜索词是否被产品覆盖时也忽略
+FUNCTION_WORDS = frozenset({
+    "a", "an", "the", "for", "with", "and", "or", "of", "to", "in", "on", "by", "at", "from", "de", "la",
+})
+# 表示位置、来源的介词会改变搜索意图（"charger in car" 与 "car charger"），签名中保留
+POSITIONAL = frozenset({"in", "on", "by", "at", "from"})
+# 签名中忽略的虚词
+STOPWORDS = FUNCTION_WORDS - POSITIONAL
+# 词干至少保留的字符数，更短的词不做词干化
+MIN_STEM = 3
+# 只去掉 "s" 的复数，剩余部分至少保留的字符数（news、bags 这类短词的 "s" 保留）
+MIN_PLURAL_STEM = 4
+# 复数 "es" 只跟在这些结尾之后（boxes, glasses, watches），其余只去掉 "s"（cases -> case）
+_ES_AFTER = ("s", "x", "z", "ch", "sh")
+# 以这些结尾的词不是复数（glass, bus, lens 的 "s" 保留）
+_NOT_PLURAL = ("ss", "us", "is")
+# 复数处理后再去掉的派生后缀
+_DERIVED_SUFFIXES = ("ing", "er")
+_TOKEN = re.compile(r"\w+")
+
+
+def _strip(token: str, suffix: str) -> str:
+    """去掉后缀，剩余部分不足 MIN_STEM 个字符时保持原样"""
+    if token.endswith(suffix) and len(token) - len(suffix) >= MIN_STEM:
+        return token[:-len(suffix)]
+    return token
+
+
+def stem_token(token: str) -> str:
+    """
+    轻量英文词干化：复数 → 单数，再去掉 -ing / -er 并合并词尾重复辅音，最后去掉词尾 e
+    （earbuds -> earbud, running / runner -> run, cases / case -> cas）
+    只要求同一词的不同词形落到同一词干，词干本身不必是合法单词
+    """
+    if token.endswith("ies") and len(token) - 3 >= MIN_STEM:
+        token = token[:-3] + "y"
+    elif token.endswith("es") and token[:-2].endswith(_ES_AFTER):
+        token = _strip(token, "es")
+    elif token.endswith("s") and not token.endswith(_NOT_PLURAL) and len(token) > MIN_PLURAL_STEM:
+        token = token[:-1]
+    for suffix in _DERIVED_SUFFIXES:
+        stem = _strip(token, suffix)
+        if stem != token:
+            if len(stem) > MIN_STEM and stem[-1] == stem[-2] and stem[-1] not in "aeiousl":
+                stem = stem[:-1]
+            token = stem
+            break
+    return _strip(token, "e")
+
+
+def signature_tokens(term: str, stems: Dict[str, str]) -> List[str]:
+    """搜索词的签名词干：去虚词、词干化、去重排序；全是虚词时退回原词的分词。stems 为跨词共享的词干缓存"""
+    tokens = _TOKEN.findall(normalize_term(term))
+    signature = set()
+    for token in tokens:
+        if token in STOPWORDS:
+            continue
+        stem = stems.get(token)
+        if stem is None:
+            stem = stems[token] = stem_token(token)
+        signature.add(stem)
+    # 全是虚词时退回原词，避免不同的虚词组合落入同一空签名
+    return sorted(signature) if signature else tokens
+
+
+def term_signature(term: str, stems: Dict[str, str]) -> str:
+    """搜索词签名：签名词干拼接"""
+    return " ".join(signature_tokens(term, stems))
+
+
+def cluster_terms(terms: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    按签名聚类，返回 (每个词的簇号, 每个簇代表词在 terms 中的下标)
+    簇号按首次出现顺序编号，代表词取簇内第一个词
+    """
+    stems: Dict[str, str] = {}
+    codes, _ = factorize([term_signature(term, stems) for term in terms])
+    # 簇号按首次出现顺序递增，前缀最大值增长的位置即各簇第一个词
+    representatives = np.flatnonzero(np.diff(np.maximum.accumulate(codes), prepend=-1) > 0)
+    return codes, representatives
+
+
+def cluster_stats(terms: int, clusters: int) -> Dict[str, Any]:
+    """聚类统计：compression_ratio 为平均每簇词数（送入大模型的词数缩小的倍数）"""
+    return {
+        "terms": terms,
+        "clusters": clusters,
+        "compression_ratio": round(terms / clusters, 2) if clusters else 1.0,
+    }
+
+
+def combine_cluster_stats(stats: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """合并多次聚类（如流式模式下各分块）的统计"""
+    terms = clusters = 0
+    for item in stats:
+        terms += item.get("terms", 0)
+        clusters += item.get("clusters", 0)
+    return cluster_stats(terms, clusters)
+
+
+def dedupe_terms(terms: List[str]) -> List[str]:
+    """按签名去重（完全重复与近重复），每簇保留第一个词，保持原顺序"""
+    if not terms:
+        return []
+    _, representatives = cluster_terms(terms)
+    return [terms[i] for i in representatives]
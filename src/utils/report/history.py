@@ -0,0 +1,208 @@
+"""
+搜索词历史表现索引
+流量清洗分支每聚合一份报表，就把各搜索词的点击、订单、花费累加进该店铺 / ASIN 的索引，拓词打分时按关键词查回历史点击、转化率（CVR）与点击成本（CPC）
+- 每个 (shop_id, asin) 一份索引，不同店铺、商品的历史互不影响；未给出 shop_id 的运行不导入、不查询历史
+- 报表只影响之后的运行：总工作流中竞争度打分与搜索词聚合并行执行，同一次运行的报表不会用于本次打分
+- 索引按归一化搜索词的 64 位哈希排序存放（uint64 数组 + 数值列，每行固定 32 字节，与搜索词长度无关），
+  导入时只对新报表分组求和，再用 np.searchsorted 定位、插入已有索引；查询同样整列二分
+- 内存有上限：单份索引超过 max_rows 行时只保留点击最多的词；进程内的索引按 LRU 保留，条目数或总行数超限时淘汰最久未用的
+- 同一份报表重复运行不会重复累加：按聚合结果的内容哈希记录已导入的报表
+- 默认只保存在进程内；disk 后端每份索引持久化为一个 .npz 文件（每次导入整份重写：先写临时文件再原子替换），
+  其他进程写入后按修改时间重新加载；多进程同时写入时后写者覆盖
+"""
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.report.aggregate import normalize_term
+from utils.report.table import KeywordTable
+
+logger = logging.getLogger(__name__)
+
+# 参与累加的指标列
+HISTORY_COLUMNS = ("clicks", "orders", "spend")
+# 每份索引最多记录的已导入报表哈希数（超出后丢弃最早的）
+MAX_DIGESTS = 1_000
+# 进程内最多保留的索引数与所有索引的总行数（环境变量 KEYWORD_HISTORY_MAX_ENTRIES / KEYWORD_HISTORY_MAX_ROWS 可覆盖）
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_MAX_ROWS = 2_000_000
+
+
+def term_keys(terms: List[str]) -> np.ndarray:
+    """（已归一化的）搜索词的 64 位哈希键"""
+    return np.fromiter(
+        (int.from_bytes(hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest(), "little") for term in terms),
+        dtype=np.uint64,
+        count=len(terms),
+    )
+
+
+def table_digest(table: KeywordTable) -> str:
+    """聚合结果的内容哈希（搜索词与各指标列）"""
+    h = hashlib.sha256()
+    h.update("\x1f".join(table.search_term.tolist()).encode("utf-8"))
+    for name in HISTORY_COLUMNS:
+        h.update(np.ascontiguousarray(getattr(table, name)).tobytes())
+    return h.hexdigest()
+
+
+class KeywordHistory:
+    """按归一化搜索词（的哈希键）累加的历史指标；path 为空时只保存在进程内，行数超过 max_rows 时只保留点击最多的词"""
+
+    def __init__(self, path: str = "", max_rows: int = DEFAULT_MAX_ROWS):
+        self.path = path
+        self.max_rows = max_rows
+        self.keys = np.zeros(0, dtype=np.uint64)
+        self.metrics: Dict[str, np.ndarray] = {
+            "clicks": np.zeros(0, dtype=np.int64),
+            "orders": np.zeros(0, dtype=np.int64),
+            "spend": np.zeros(0, dtype=np.float64),
+        }
+        self.digests: List[str] = []
+        self._mtime: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _reload(self) -> None:
+        """持久化文件被（其他进程）更新后重新加载"""
+        if not self.path:
+            return
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return
+        if mtime == self._mtime:
+            return
+        try:
+            with np.load(self.path) as data:
+                self.keys = data["keys"]
+                self.metrics = {name: data[name] for name in HISTORY_COLUMNS}
+                self.digests = data["digests"].tolist()
+            self._mtime = mtime
+        except Exception as e:
+            logger.warning(f"Keyword history load failed: {e}")
+
+    def _save(self) -> None:
+        if not self.path:
+            return
+        try:
+            directory = os.path.dirname(self.path) or "."
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".npz")
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, keys=self.keys, digests=np.array(self.digests, dtype=str), **self.metrics)
+            os.replace(tmp_path, self.path)
+            self._mtime = os.path.getmtime(self.path)
+        except Exception as e:
+            logger.warning(f"Keyword history write failed: {e}")
+
+    def ingest(self, table: KeywordTable, save: bool = True) -> bool:
+        """
+        累加一份（已按搜索词聚合的）报表，返回是否导入；已导入过的报表跳过
+        save 为 False 时只更新内存（如流式模式逐块导入），最后调用 save() 一次写盘
+        """
+        if not len(table):
+            return False
+        digest = table_digest(table)
+        with self._lock:
+            self._reload()
+            if digest in self.digests:
+                return False
+            # 新报表先分组求和，再按二分位置累加到已有词、插入新词，已有索引无需重新排序
+            keys, codes = np.unique(
+                term_keys([normalize_term(term) for term in table.search_term.tolist()]), return_inverse=True
+            )
+            index = self.keys
+            pos = np.searchsorted(index, keys)
+            found = pos < len(index)
+            found[found] = index[pos[found]] == keys[found]
+            missing = ~found
+            for name in HISTORY_COLUMNS:
+                column = self.metrics[name].copy()
+                summed = np.bincount(codes, weights=getattr(table, name), minlength=len(keys)).astype(column.dtype)
+                column[pos[found]] += summed[found]
+                self.metrics[name] = np.insert(column, pos[missing], summed[missing])
+            self.keys = np.insert(index, pos[missing], keys[missing])
+            self._trim()
+            self.digests = (self.digests + [digest])[-MAX_DIGESTS:]
+            if save:
+                self._save()
+        return True
+
+    def _trim(self) -> None:
+        """行数超过 max_rows 时只保留点击最多的 max_rows 个词（保持按键排序）"""
+        if len(self.keys) <= self.max_rows:
+            return
+        kept = np.sort(np.argpartition(-self.metrics["clicks"], self.max_rows - 1)[:self.max_rows])
+        self.keys = self.keys[kept]
+        self.metrics = {name: values[kept] for name, values in self.metrics.items()}
+
+    def save(self) -> None:
+        with self._lock:
+            self._save()
+
+    def lookup(self, terms: List[str], normalized: bool = False) -> Dict[str, np.ndarray]:
+        """
+        按（归一化后的）搜索词查询历史指标，返回与 terms 等长的 clicks / orders / spend 列，没有历史的词为 0
+        normalized 为 True 表示 terms 已经归一化
+        """
+        with self._lock:
+            self._reload()
+            index, metrics = self.keys, self.metrics
+        terms = terms if normalized else [normalize_term(term) for term in terms]
+        result = {name: np.zeros(len(terms), dtype=metrics[name].dtype) for name in HISTORY_COLUMNS}
+        if not len(index) or not len(terms):
+            return result
+        queries = term_keys(terms)
+        pos = np.minimum(np.searchsorted(index, queries), len(index) - 1)
+        found = index[pos] == queries
+        for name in HISTORY_COLUMNS:
+            result[name][found] = metrics[name][pos[found]]
+        return result
+
+
+_histories: "OrderedDict[Tuple[str, str], KeywordHistory]" = OrderedDict()
+_history_lock = threading.Lock()
+
+
+def history_path(directory: str, shop_id: str, asin: str) -> str:
+    """disk 后端下 (shop_id, asin) 对应的索引文件路径"""
+    key = hashlib.sha256(f"{shop_id}\x1f{asin}".encode("utf-8")).hexdigest()[:32]
+    return os.path.join(directory, f"keyword_history_{key}.npz")
+
+
+def get_keyword_history(shop_id: str = "", asin: str = "") -> Optional[KeywordHistory]:
+    """
+    进程内共享的搜索词历史索引，每个 (shop_id, asin) 一份；shop_id 为空时返回 None（匿名运行之间不共享历史）
+    索引按 LRU 保留：条目数超过 KEYWORD_HISTORY_MAX_ENTRIES 或总行数超过 KEYWORD_HISTORY_MAX_ROWS 时淘汰最久未用的
+    （disk 后端被淘汰的索引下次使用时从文件重新加载）
+    环境变量：KEYWORD_HISTORY_BACKEND（memory 默认 / disk）、KEYWORD_HISTORY_DIR（disk 时的目录，默认系统临时目录下 keyword_history）
+    """
+    if not shop_id:
+        return None
+    key = (shop_id, asin)
+    max_entries = max(1, int(os.getenv("KEYWORD_HISTORY_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)))
+    max_rows = max(1, int(os.getenv("KEYWORD_HISTORY_MAX_ROWS", DEFAULT_MAX_ROWS)))
+    with _history_lock:
+        history = _histories.get(key)
+        if history is None:
+            path = ""
+            if os.getenv("KEYWORD_HISTORY_BACKEND", "memory") == "disk":
+                directory = os.getenv("KEYWORD_HISTORY_DIR") or os.path.join(tempfile.gettempdir(), "keyword_history")
+                path = history_path(directory, shop_id, asin)
+            history = _histories[key] = KeywordHistory(path, max_rows)
+        _histories.move_to_end(key)
+        # 淘汰最久未用的索引（当前索引除外）
+        total = sum(len(item) for item in _histories.values())
+        while len(_histories) > 1 and (len(_histories) > max_entries or total > max_rows):
+            _, evicted = _histories.popitem(last=False)
+            total -= len(evicted)
+    return history
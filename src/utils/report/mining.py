@@ -0,0 +1,132 @@
+"""
+n-gram 花费挖掘
+单个搜索词点击太少、难以单独判断，但浪费常集中在 "free"、"used"、"case for" 这类词组上，分散在成千上万个低点击搜索词里。
+把整份报表的搜索词展开为 1..3-gram（见 utils.report.ngrams），按 n-gram 汇总点击、花费、订单（以及展示量、销售额），
+再按配置的规则表（与统计筛选相同的表达式引擎，见 utils.report.rules）整列求值，命中的 n-gram 作为词组否定候选，按花费从高到低输出；
+包含更短命中词组的 n-gram 已被该词组覆盖，不再重复列出
+规则可用的字段：n（词数）、terms（含该 n-gram 的搜索词数）、clicks / spend / orders / impressions / sales 与配置中的参数
+"""
+import json
+import os
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from utils.report.aggregate import SUM_COLUMNS
+from utils.report.cluster import FUNCTION_WORDS
+from utils.report.ngrams import DEFAULT_MAX_N, Ngrams, expand_ngrams
+from utils.report.rules import RuleError, compile_rules, match_rules
+from utils.report.table import KeywordTable
+
+# 规则配置文件（相对 COZE_WORKSPACE_PATH）
+DEFAULT_MINING_RULES_FILE = "config/ngram_mining_rules.json"
+DEFAULT_MAX_CANDIDATES = 200
+# 候选中列出的花费最高的搜索词示例数
+EXAMPLES = 3
+
+# 未配置时的规则
+DEFAULT_MINING_PARAMS: Dict[str, float] = {"min_spend": 10.0, "min_terms": 3}
+DEFAULT_MINING_RULES: List[Dict[str, str]] = [
+    {"when": "orders == 0 and spend >= min_spend and terms >= min_terms", "reason": "多个搜索词共有的词组，累计花费无转化"},
+]
+
+
+def load_mining_config(path: str = "") -> Dict[str, Any]:
+    """读取挖掘规则配置文件，不存在时返回空配置"""
+    path = path or os.path.join(os.getenv("COZE_WORKSPACE_PATH", ""), DEFAULT_MINING_RULES_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as fd:
+        return json.load(fd)
+
+
+class _Columns:
+    """规则求值时的取值函数：n-gram 汇总列与参数"""
+
+    def __init__(self, columns: Dict[str, np.ndarray], params: Dict[str, float]):
+        self.columns = columns
+        self.params = params
+
+    def available(self, name: str) -> bool:
+        if name in self.params or name in self.columns:
+            return True
+        if name in SUM_COLUMNS:
+            return False
+        raise RuleError(f"挖掘规则引用了未知的字段或参数: {name}")
+
+    def __call__(self, name: str) -> Any:
+        if name in self.params:
+            return self.params[name]
+        return self.columns[name]
+
+
+def _prune(grams: Ngrams, hits: np.ndarray) -> np.ndarray:
+    """
+    去掉不适合作为词组否定的命中（hits 按词数升序）：只由虚词组成的（"for"、"for the"），
+    以及包含更短的已命中词组的（已有 "free" 时 "free earbuds" 会被同一个词组否定覆盖）
+    """
+    kept: Set[Tuple[str, ...]] = set()
+    result: List[int] = []
+    for code in hits.tolist():
+        words = tuple(grams.text(code).split())
+        if all(word in FUNCTION_WORDS for word in words):
+            continue
+        size = len(words)
+        if any(words[i:i + n] in kept for n in range(1, size) for i in range(size - n + 1)):
+            continue
+        kept.add(words)
+        result.append(code)
+    return np.array(result, dtype=np.int64)
+
+
+def mine_ngrams(table: KeywordTable, config: Optional[Dict[str, Any]] = None) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    挖掘报表中花费无转化的 n-gram，返回 (词组否定候选, 统计)
+    候选形如 {"ngram", "n", "terms", "clicks", "spend", "orders", "reason", "examples"}，examples 为花费最高的几个搜索词
+    """
+    config = config or {}
+    rules = config.get("rules") or DEFAULT_MINING_RULES
+    rule_set = compile_rules(rules, {**DEFAULT_MINING_PARAMS, **config.get("params", {})})
+    grams = expand_ngrams(table.search_term.tolist(), config.get("max_n", DEFAULT_MAX_N))
+    stats: Dict[str, Any] = {"terms": len(table), "ngrams": len(grams), "matched": 0, "candidates": 0}
+    if not len(grams):
+        return [], stats
+
+    columns: Dict[str, np.ndarray] = {"n": grams.sizes, "terms": grams.counts()}
+    for name in SUM_COLUMNS:
+        values = getattr(table, name)
+        if values is not None:
+            sums = grams.sums(values)
+            columns[name] = np.rint(sums).astype(values.dtype) if values.dtype.kind == "i" else sums
+    matched = match_rules(len(grams), rule_set.rules, _Columns(columns, rule_set.params))
+    hits = np.flatnonzero(matched < len(rule_set.rules))
+    stats["matched"] = len(hits)
+    hits = _prune(grams, hits[np.argsort(grams.sizes[hits], kind="stable")])
+    selected = hits[np.argsort(-columns["spend"][hits], kind="stable")][:config.get("max_candidates", DEFAULT_MAX_CANDIDATES)]
+    stats["candidates"] = len(selected)
+    if not len(selected):
+        return [], stats
+
+    # 候选 n-gram 各自花费最高的搜索词
+    flags = np.zeros(len(grams), dtype=bool)
+    flags[selected] = True
+    rows = np.flatnonzero(flags[grams.codes])
+    codes, term_ids = grams.codes[rows], grams.term_ids[rows]
+    order = np.lexsort((-table.spend[term_ids], codes))
+    codes, term_ids = codes[order], term_ids[order]
+    starts = np.searchsorted(codes, selected)
+    candidates: List[Dict[str, Any]] = []
+    for code, start in zip(selected.tolist(), starts.tolist()):
+        examples = term_ids[start:start + EXAMPLES]
+        examples = examples[codes[start:start + EXAMPLES] == code]
+        candidates.append({
+            "ngram": grams.text(code),
+            "n": int(grams.sizes[code]),
+            "terms": int(columns["terms"][code]),
+            "clicks": int(columns["clicks"][code]),
+            "spend": round(float(columns["spend"][code]), 2),
+            "orders": int(columns["orders"][code]),
+            "reason": rule_set.rules[matched[code]].reason,
+            "examples": table.search_term[examples].tolist(),
+        })
+    return candidates, stats
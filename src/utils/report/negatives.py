@@ -0,0 +1,111 @@
+"""
+否定词去重与词组合并
+- 去重：统计否定词与语义否定词按归一化搜索词哈希分组，同一个词只保留先出现的一行（统计否定词在前，保留其指标与原因）
+- 词组合并：把否定词与报表中有转化（orders > 0）的搜索词一起展开为 1..3-gram（见 utils.report.ngrams），
+  覆盖至少 min_cover 个否定词、且不出现在任何有转化搜索词中的 n-gram 为候选词组；候选按词数从短到长、覆盖数从多到少贪心选取，
+  已被选中词组覆盖的否定词不再计入后续候选的覆盖数。输出为词组否定（match_type=phrase）加上未被覆盖的精确否定（match_type=exact）
+"""
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from utils.report.aggregate import SUM_COLUMNS, term_codes
+from utils.report.cluster import FUNCTION_WORDS
+from utils.report.ngrams import DEFAULT_MAX_N, expand_ngrams
+from utils.report.table import KeywordTable
+
+# 词组至少覆盖的否定词数，为 0 时不做词组合并
+DEFAULT_MIN_COVER = 3
+# 词组否定原因中列出的被覆盖搜索词示例数
+REASON_EXAMPLES = 3
+
+
+def dedupe_negatives(table: KeywordTable) -> Tuple[KeywordTable, List[str]]:
+    """按归一化搜索词去重，同一个词保留第一次出现的行，返回 (去重后的表, 各行归一化后的搜索词)"""
+    if not len(table):
+        return table, []
+    codes, terms = term_codes(table.search_term)
+    _, first = np.unique(codes, return_index=True)
+    if len(first) == len(table):
+        return table, terms
+    return table.take(first), terms
+
+
+def report_metrics(terms: List[str], report: KeywordTable) -> Dict[str, np.ndarray]:
+    """按归一化搜索词从（已聚合的）报表中查回各指标，报表中没有的词为 0"""
+    report_codes, report_terms = term_codes(report.search_term)
+    index = {term: i for i, term in enumerate(report_terms)}
+    rows = np.fromiter((index.get(term, -1) for term in terms), dtype=np.int64, count=len(terms))
+    found = rows >= 0
+    # 聚合后的报表每个归一化搜索词只有一行
+    positions = np.empty(len(report_terms), dtype=np.int64)
+    positions[report_codes] = np.arange(len(report), dtype=np.int64)
+    metrics: Dict[str, np.ndarray] = {}
+    for name in SUM_COLUMNS:
+        values = getattr(report, name)
+        if values is not None:
+            column = np.zeros(len(terms), dtype=values.dtype)
+            column[found] = values[positions[rows[found]]]
+            metrics[name] = column
+    return metrics
+
+
+def collapse_phrases(
+    negatives: KeywordTable,
+    terms: List[str],
+    converting: List[str],
+    min_cover: int = DEFAULT_MIN_COVER,
+    max_n: int = DEFAULT_MAX_N,
+) -> Tuple[KeywordTable, Dict[str, Any]]:
+    """
+    把已去重的否定词（terms 为其归一化搜索词）合并为词组否定 + 精确否定，converting 为报表中有转化的搜索词
+    返回 (否定词表, 统计)；词组行的指标为其新覆盖（此前未被其他词组覆盖）的否定词之和，原因中列出这些搜索词示例，
+    各否定词的指标只计入一行
+    """
+    n = len(terms)
+    exact = np.full(n, "exact", dtype=object)
+    if min_cover <= 0 or n < min_cover:
+        return negatives.with_column("match_type", exact), {"phrases": 0, "phrase_covered": 0}
+
+    grams = expand_ngrams(terms + converting, max_n, normalized=True)
+    negated_rows = grams.term_ids < n
+    cover = grams.counts(negated_rows)
+    converting_hits = grams.counts(~negated_rows)
+    candidates = np.flatnonzero((cover >= min_cover) & (converting_hits == 0))
+    # 词数从短到长，同词数按覆盖数从多到少
+    candidates = candidates[np.lexsort((-cover[candidates], grams.sizes[candidates]))]
+    members = grams.members(negated_rows) if len(candidates) else []
+
+    covered = np.zeros(n, dtype=bool)
+    phrases: List[Tuple[str, np.ndarray]] = []
+    for code in candidates.tolist():
+        ids = members[code]
+        fresh = ids[~covered[ids]]
+        if len(fresh) < min_cover:
+            continue
+        phrase = grams.text(code)
+        # 只由虚词组成的词组（"for"、"for the"）会否定大量无关搜索，不作为词组否定
+        if all(word in FUNCTION_WORDS for word in phrase.split()):
+            continue
+        covered[fresh] = True
+        phrases.append((phrase, fresh))
+
+    stats = {"phrases": len(phrases), "phrase_covered": int(covered.sum())}
+    leftovers = negatives.take(~covered).with_column("match_type", exact[~covered])
+    if not phrases:
+        return leftovers, stats
+
+    source_terms = negatives.search_term
+    columns: Dict[str, Any] = {
+        "search_term": np.array([phrase for phrase, _ in phrases], dtype=object),
+        "reason": np.array([
+            f"词组否定：覆盖 {len(ids)} 个否定词（如 {'、'.join(source_terms[ids[:REASON_EXAMPLES]].tolist())}）"
+            for _, ids in phrases
+        ], dtype=object),
+        "match_type": np.full(len(phrases), "phrase", dtype=object),
+    }
+    for name in SUM_COLUMNS:
+        values = getattr(negatives, name)
+        if values is not None:
+            columns[name] = np.array([values[ids].sum() for _, ids in phrases], dtype=values.dtype)
+    return KeywordTable.concat([KeywordTable(**columns), leftovers]), stats
@@ -0,0 +1,134 @@
+"""
+搜索词 n-gram 展开与计数
+所有搜索词归一化后拆成词序列，词先哈希分组编码为整数，相邻位置的编号逐级组合成 2-gram、3-gram 的整数键
+（上一级 n-gram 编号 × 词表大小 + 下一个词编号），再用 np.unique 编码为 n-gram 编号；
+计数、按 n-gram 求和都在整数数组上用 bincount 完成，只有最终需要展示的 n-gram 才拼回文本
+"""
+from itertools import repeat
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from utils.report.aggregate import normalize_term
+
+DEFAULT_MAX_N = 3
+
+
+class Ngrams:
+    """
+    n-gram 展开结果：每个 (搜索词, n-gram) 一行，同一搜索词内重复出现的 n-gram 只计一次
+    - term_ids / codes: 每行所属的搜索词编号与 n-gram 编号
+    - sizes: 各 n-gram 的词数；text(code): n-gram 文本
+    """
+
+    def __init__(self, vocab: List[str], words: np.ndarray, term_ids: np.ndarray, codes: np.ndarray, sizes: np.ndarray, first: np.ndarray):
+        self.vocab = vocab
+        self.words = words
+        self.term_ids = term_ids
+        self.codes = codes
+        self.sizes = sizes
+        self.first = first
+
+    def __len__(self) -> int:
+        return len(self.sizes)
+
+    def text(self, code: int) -> str:
+        start = self.first[code]
+        return " ".join(self.vocab[w] for w in self.words[start:start + self.sizes[code]].tolist())
+
+    def counts(self, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """各 n-gram 出现在多少个搜索词中；rows 为行掩码时只统计这些行"""
+        codes = self.codes if rows is None else self.codes[rows]
+        return np.bincount(codes, minlength=len(self))
+
+    def sums(self, values: np.ndarray) -> np.ndarray:
+        """按 n-gram 对搜索词的指标求和（values 与搜索词等长）"""
+        return np.bincount(self.codes, weights=values[self.term_ids], minlength=len(self))
+
+    def members(self, rows: Optional[np.ndarray] = None) -> List[np.ndarray]:
+        """各 n-gram 所含的搜索词编号（升序）；rows 为行掩码时只取这些行"""
+        codes, term_ids = (self.codes, self.term_ids) if rows is None else (self.codes[rows], self.term_ids[rows])
+        order = np.lexsort((term_ids, codes))
+        bounds = np.cumsum(np.bincount(codes, minlength=len(self)))[:-1]
+        return np.split(term_ids[order], bounds)
+
+
+def _encode_words(terms: List[str]) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+    """所有搜索词拆词并编码，返回 (各搜索词词数, 词编号序列, 词表)"""
+    # 归一化后词间恰好一个空格，非空词的词数 = 空格数 + 1
+    spaces = np.fromiter(map(str.count, terms, repeat(" ")), dtype=np.int64, count=len(terms))
+    lengths = spaces + np.fromiter(map(bool, terms), dtype=np.int64, count=len(terms))
+    tokens = " ".join(terms).split()
+    vocab = list(dict.fromkeys(tokens))
+    index = dict(zip(vocab, range(len(vocab))))
+    words = np.fromiter(map(index.__getitem__, tokens), dtype=np.int64, count=len(tokens))
+    return lengths, words, vocab
+
+
+def _factorize_ints(keys: np.ndarray) -> Tuple[np.ndarray, int]:
+    """整数键编码为 0..size-1 的编号（按键值排序编号），返回 (编号, 不同键数)"""
+    if not len(keys):
+        return np.zeros(0, dtype=np.int64), 0
+    order = np.argsort(keys)
+    ordered = keys[order]
+    ids = np.empty(len(keys), dtype=np.int64)
+    ids[order] = np.concatenate([[0], np.cumsum(ordered[1:] != ordered[:-1], dtype=np.int64)])
+    return ids, int(ids[order[-1]]) + 1
+
+
+def expand_ngrams(terms: List[str], max_n: int = DEFAULT_MAX_N, normalized: bool = False) -> Ngrams:
+    """把搜索词展开为 1..max_n 个连续词组成的 n-gram；normalized 为 True 表示 terms 已经归一化"""
+    terms = terms if normalized else [normalize_term(term) for term in terms]
+    lengths, words, vocab = _encode_words(terms)
+    term_of = np.repeat(np.arange(len(terms), dtype=np.int64), lengths)
+    total = len(words)
+    vocab_size = max(1, len(vocab))
+
+    term_parts: List[np.ndarray] = []
+    code_parts: List[np.ndarray] = []
+    size_parts: List[np.ndarray] = []
+    first_parts: List[np.ndarray] = []
+    offset = 0
+    prefix = words
+    valid = np.ones(total, dtype=bool)
+    for n in range(1, max_n + 1):
+        count = total - n + 1
+        if count <= 0:
+            break
+        if n > 1:
+            # 起点 i 的 n-gram = 起点 i 的 (n-1)-gram + 第 i+n-1 个词，首尾须属于同一个搜索词
+            valid = valid[:count] & (term_of[:count] == term_of[n - 1:])
+            prefix = prefix[:count] * vocab_size + words[n - 1:]
+        positions = np.flatnonzero(valid)
+        if not len(positions):
+            break
+        # 1-gram 直接用词编号，更长的 n-gram 把组合键重新编码
+        local, size = (words, len(vocab)) if n == 1 else _factorize_ints(prefix[positions])
+        # 每个 n-gram 记一个出现位置，用于拼回文本
+        first = np.empty(size, dtype=np.int64)
+        first[local] = positions
+        codes = np.zeros(count, dtype=np.int64)
+        codes[positions] = local
+        term_parts.append(term_of[positions])
+        code_parts.append(local + offset)
+        size_parts.append(np.full(size, n, dtype=np.int64))
+        first_parts.append(first)
+        offset += size
+        prefix = codes
+
+    if not code_parts:
+        empty = np.zeros(0, dtype=np.int64)
+        return Ngrams(vocab, words, empty, empty, empty, empty)
+    term_ids = np.concatenate(term_parts)
+    codes = np.concatenate(code_parts)
+    # (搜索词, n-gram) 去重：同一个词内重复的 n-gram 只计一次；只有含重复词的搜索词才可能重复，只对这些词的行去重
+    word_pairs = np.sort(term_of * vocab_size + words)
+    repeated = np.unique(word_pairs[1:][word_pairs[1:] == word_pairs[:-1]] // vocab_size)
+    if len(repeated):
+        flags = np.zeros(len(terms), dtype=bool)
+        flags[repeated] = True
+        rows = flags[term_ids]
+        pairs = np.unique(term_ids[rows] * offset + codes[rows])
+        term_ids = np.concatenate([term_ids[~rows], pairs // offset])
+        codes = np.concatenate([codes[~rows], pairs % offset])
+    return Ngrams(vocab, words, term_ids, codes, np.concatenate(size_parts), np.concatenate(first_parts))
@@ -0,0 +1,150 @@
+"""
+报表文本解析
+将 "搜索词 点击数 花费 订单数" 格式的报表文本批量解析为列式 KeywordTable
+"""
+import re
+from typing import Iterator, List, Tuple
+
+import numpy as np
+
+from utils.report.table import KeywordTable
+
+# str.split() 认定的所有空白字符（换行除外）统一映射为空格
+_INLINE_WS_TABLE = str.maketrans({
+    chr(c): " " for c in range(0x110000) if chr(c).isspace() and chr(c) not in ("\n", " ")
+})
+# 一行至少 4 个字段：搜索词（可含空格） + 末尾 3 个数值字段
+_ROW_RE = re.compile(r"^ ?(\S.*) (\S+) (\S+) (\S+) ?$", re.M)
+
+# 单块解析的字符数上限，块内的中间对象（正则匹配结果）用完即释放
+DEFAULT_BLOCK_CHARS = 4 * 1024 * 1024
+# 二分定位非法值时，小于该长度的片段直接逐个转换
+_BISECT_MIN_SIZE = 16
+
+
+def normalize_whitespace(text: str) -> str:
+    """行内空白折叠为单个空格，等价于逐行 " ".join(line.split())，但整段文本一次完成"""
+    text = text.translate(_INLINE_WS_TABLE)
+    while "  " in text:
+        text = text.replace("  ", " ")
+    return text
+
+
+def iter_text_blocks(text: str, block_chars: int) -> Iterator[str]:
+    """按换行边界把文本切成约 block_chars 大小的块，限制解析时的临时内存"""
+    start = 0
+    length = len(text)
+    while start < length:
+        end = text.find("\n", start + block_chars)
+        if end < 0:
+            end = length
+        yield text[start:end]
+        start = end + 1
+
+
+def split_report_rows(text: str) -> Tuple[List[str], List[str], List[str], List[str]]:
+    """
+    用一次正则扫描切出 4 列原始字符串（搜索词、点击数、花费、订单数）
+    字段数不足 4 的行直接被跳过
+    """
+    rows = _ROW_RE.findall(normalize_whitespace(text))
+    return (
+        [r[0] for r in rows],
+        [r[1] for r in rows],
+        [r[2] for r in rows],
+        [r[3] for r in rows],
+    )
+
+
+def _as_array(values: List[str]) -> np.ndarray:
+    """数值列先尝试按 ASCII 字节数组存放（转换更快），含非 ASCII 字符时退回 Unicode 数组"""
+    try:
+        return np.array(values, dtype=np.bytes_)
+    except UnicodeEncodeError:
+        return np.array(values)
+
+
+def _cast_into(raw: np.ndarray, out: np.ndarray, valid: np.ndarray, lo: int, hi: int) -> None:
+    """
+    将 raw[lo:hi] 转换写入 out；整段转换失败时二分定位非法值
+    非法值很少时只需 O(k·log n) 次批量转换，转换语义与 int()/float() 一致
+    """
+    try:
+        out[lo:hi] = raw[lo:hi].astype(out.dtype)
+        return
+    except (ValueError, OverflowError):
+        pass
+    if hi - lo <= _BISECT_MIN_SIZE:
+        for i in range(lo, hi):
+            try:
+                out[i] = raw[i : i + 1].astype(out.dtype)[0]
+            except (ValueError, OverflowError):
+                valid[i] = False
+        return
+    mid = (lo + hi) // 2
+    _cast_into(raw, out, valid, lo, mid)
+    _cast_into(raw, out, valid, mid, hi)
+
+
+def _plain_number_mask(raw: np.ndarray, dtype: type) -> np.ndarray:
+    """向量化标记形如 "12" / "-3" / "4.50" 的常规数字，其余写法（含非法值）走二分转换"""
+    is_bytes = raw.dtype.kind == "S"
+    body = np.strings.lstrip(raw, b"+-" if is_bytes else "+-")
+    if dtype is np.float64:
+        body = np.strings.replace(body, b"." if is_bytes else ".", b"" if is_bytes else "", 1)
+    return np.strings.isdigit(body)
+
+
+def cast_column(values: List[str], dtype: type) -> Tuple[np.ndarray, np.ndarray]:
+    """批量转换一列字符串，返回 (数值数组, 有效掩码)；无法转换的位置掩码为 False"""
+    raw = _as_array(values)
+    out = np.zeros(len(raw), dtype=dtype)
+    valid = np.ones(len(raw), dtype=bool)
+    if not len(raw):
+        return out, valid
+
+    plain = _plain_number_mask(raw, dtype)
+    if plain.all():
+        _cast_into(raw, out, valid, 0, len(raw))
+        return out, valid
+
+    # 常规数字整批转换，其余少量值单独二分定位
+    for mask in (plain, ~plain):
+        sub_raw = raw[mask]
+        sub_out = np.zeros(len(sub_raw), dtype=dtype)
+        sub_valid = np.ones(len(sub_raw), dtype=bool)
+        if len(sub_raw):
+            _cast_into(sub_raw, sub_out, sub_valid, 0, len(sub_raw))
+        out[mask] = sub_out
+        valid[mask] = sub_valid
+    return out, valid
+
+
+def parse_report_block(text: str) -> KeywordTable:
+    """列式解析一块报表文本"""
+    terms, clicks_raw, spend_raw, orders_raw = split_report_rows(text)
+    if not terms:
+        return KeywordTable.empty()
+
+    clicks, clicks_ok = cast_column(clicks_raw, np.int64)
+    spend, spend_ok = cast_column(spend_raw, np.float64)
+    orders, orders_ok = cast_column(orders_raw, np.int64)
+    table = KeywordTable(
+        search_term=np.array(terms, dtype=object),
+        clicks=clicks,
+        spend=spend,
+        orders=orders,
+    )
+
+    valid = clicks_ok & spend_ok & orders_ok
+    if valid.all():
+        return table
+    return table.take(valid)
+
+
+def parse_report_columnar(text: str, block_chars: int = DEFAULT_BLOCK_CHARS) -> KeywordTable:
+    """
+    列式解析报表文本
+    与逐行解析的行为一致：字段数不足或数值无法转换（int()/float() 失败）的行被跳过
+    """
+    return KeywordTable.concat([parse_report_block(block) for block in iter_text_blocks(text, block_chars)])
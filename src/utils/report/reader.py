@@ -0,0 +1,275 @@
+"""
+亚马逊搜索词报告读取
+自动识别表头行与分隔符（Tab / 逗号 / 分号），按列名映射所需字段（含多语言站点的本地化列名），
+逐行流式读取，只保留需要的列；没有表头时退回 "搜索词 点击数 花费 订单数" 的空白分隔格式
+"""
+import csv
+import re
+from itertools import chain
+from operator import itemgetter
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from utils.report.parser import cast_column, parse_report_block, parse_report_columnar
+from utils.report.table import ALL_COLUMNS, KeywordTable
+
+# 每个分块的行数
+DEFAULT_CHUNK_ROWS = 50_000
+# 查找表头时最多读取的行数（部分导出文件在表头前有说明行）
+HEADER_SCAN_LINES = 20
+
+# 标准字段 -> 列名别名（均为 normalize_header 之后的形式）
+COLUMN_ALIASES: Dict[str, List[str]] = {
+    "search_term": [
+        "customer search term", "search term", "query",
+        "客户搜索词", "买家搜索词", "用户搜索词", "搜索词",
+        "suchbegriff des kunden", "suchbegriff",
+        "terme de recherche du client", "terme de recherche client", "terme de recherche",
+        "término de búsqueda del cliente", "término de búsqueda",
+        "termine di ricerca del cliente", "termine di ricerca",
+        "カスタマーの検索キーワード", "検索キーワード", "検索語句",
+    ],
+    "clicks": [
+        "clicks", "点击量", "点击次数", "点击数", "点击",
+        "klicks", "clics", "clic", "clicks totali", "クリック", "クリック数",
+    ],
+    "spend": [
+        "spend", "cost", "total spend", "花费", "支出", "广告花费",
+        "ausgaben", "kosten", "dépenses", "coût", "gasto", "spesa", "広告費", "費用",
+    ],
+    "orders": [
+        "7 day total orders", "14 day total orders", "total orders", "orders",
+        "7天总订单数", "14天总订单数", "7天总订单", "订单数", "订单量", "订单",
+        "bestellungen insgesamt innerhalb von 7 tagen", "bestellungen",
+        "commandes totales sur 7 jours", "commandes",
+        "pedidos totales de 7 días", "pedidos",
+        "ordini totali di 7 giorni", "ordini",
+        "7日間の総注文数", "注文数",
+    ],
+    "impressions": [
+        "impressions", "展示量", "曝光量", "展现量", "曝光",
+        "impressionen", "impresiones", "impressioni", "インプレッション", "インプレッション数",
+    ],
+    "sales": [
+        "7 day total sales", "14 day total sales", "total sales", "sales",
+        "7天总销售额", "14天总销售额", "销售额",
+        "umsatz insgesamt innerhalb von 7 tagen", "umsatz",
+        "ventes totales sur 7 jours", "ventes",
+        "ventas totales de 7 días", "ventas",
+        "vendite totali di 7 giorni", "vendite",
+        "7日間の総売上高", "売上", "売上高",
+    ],
+    "campaign": [
+        "campaign name", "campaign", "广告活动名称", "广告活动",
+        "kampagnenname", "kampagne", "nom de la campagne", "campagne",
+        "nombre de la campaña", "campaña", "nome della campagna", "campagna", "キャンペーン名",
+    ],
+    "ad_group": [
+        "ad group name", "ad group", "广告组名称", "广告组",
+        "name der anzeigengruppe", "anzeigengruppe", "nom du groupe d'annonces", "groupe d'annonces",
+        "nombre del grupo de anuncios", "grupo de anuncios",
+        "nome del gruppo di annunci", "gruppo di annunci", "広告グループ名",
+    ],
+}
+
+_ALIAS_TO_COLUMN: Dict[str, str] = {
+    alias: column for column, aliases in COLUMN_ALIASES.items() for alias in aliases
+}
+
+# 列名中的括号注释（币种、"#" 等）与多余符号
+_HEADER_PAREN_RE = re.compile(r"[(（\[][^)）\]]*[)）\]]")
+_HEADER_NOISE_RE = re.compile(r"[\"#$€£¥%:：]")
+# 数值中需要去掉的币种符号、百分号、空白等
+_NUMBER_NOISE_RE = re.compile(r"[^\d,.\-+]")
+_THOUSANDS_COMMA_RE = re.compile(r"^[-+]?\d{1,3}(,\d{3})+$")
+_THOUSANDS_DOT_RE = re.compile(r"^[-+]?\d{1,3}(\.\d{3})+$")
+_EMPTY_NUMBERS = {"", "-", "--", "—", "n/a", "N/A"}
+
+_DELIMITERS = ("\t", ",", ";")
+
+
+class ReportHeader(NamedTuple):
+    """识别出的表头：分隔符 + 标准字段到列下标的映射"""
+    delimiter: str
+    columns: Dict[str, int]
+
+
+def normalize_header(name: str) -> str:
+    """列名归一化：去 BOM、括号注释和符号，转小写并折叠空白"""
+    name = name.replace("\ufeff", "")
+    name = _HEADER_PAREN_RE.sub(" ", name)
+    name = _HEADER_NOISE_RE.sub(" ", name)
+    return " ".join(name.lower().split())
+
+
+def map_header(cells: List[str]) -> Dict[str, int]:
+    """将表头单元格映射为 标准字段 -> 列下标，同名字段取第一列"""
+    columns: Dict[str, int] = {}
+    for idx, cell in enumerate(cells):
+        column = _ALIAS_TO_COLUMN.get(normalize_header(cell))
+        if column and column not in columns:
+            columns[column] = idx
+    return columns
+
+
+def detect_header(line: str) -> Optional[ReportHeader]:
+    """判断一行是否为表头：必须能映射出搜索词、点击、花费、订单四个必选字段"""
+    delimiter = max(_DELIMITERS, key=line.count)
+    if line.count(delimiter) == 0:
+        return None
+    cells = next(csv.reader([line], delimiter=delimiter), [])
+    columns = map_header(cells)
+    if all(name in columns for name in ("search_term", "clicks", "spend", "orders")):
+        return ReportHeader(delimiter=delimiter, columns=columns)
+    return None
+
+
+def sniff_header(lines: Iterator[str], max_lines: int = HEADER_SCAN_LINES) -> Tuple[Optional[ReportHeader], List[str]]:
+    """
+    从行迭代器头部查找表头
+    返回 (表头, 已消费的行)；未找到表头时调用方需要把已消费的行放回去
+    """
+    consumed: List[str] = []
+    for line in lines:
+        consumed.append(line)
+        if line.strip():
+            header = detect_header(line)
+            if header is not None:
+                return header, consumed
+        if len(consumed) >= max_lines:
+            break
+    return None, consumed
+
+
+def parse_localized_number(value: str, integer: bool = False) -> Optional[float]:
+    """
+    解析带币种、千分位、百分号或欧洲小数逗号的数值，如 "$1,234.56"、"1.234,56 €"、"12,5%"
+    空值（""、"-"）按 0 处理；无法解析时返回 None
+    """
+    value = value.strip()
+    if value in _EMPTY_NUMBERS:
+        return 0.0
+    value = _NUMBER_NOISE_RE.sub("", value)
+    if "," in value and "." in value:
+        if value.rfind(",") > value.rfind("."):
+            value = value.replace(".", "").replace(",", ".")
+        else:
+            value = value.replace(",", "")
+    elif "," in value:
+        value = value.replace(",", "" if _THOUSANDS_COMMA_RE.match(value) else ".")
+    elif integer and _THOUSANDS_DOT_RE.match(value):
+        value = value.replace(".", "")
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def to_number_column(values: List[str], dtype: type) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    数值列批量转换：常规数字走 NumPy 批量转换，
+    只有少量带格式的值（币种、千分位等）逐个清洗
+    """
+    out, valid = cast_column(values, dtype)
+    if valid.all():
+        return out, valid
+    integer = dtype is np.int64
+    for i in np.flatnonzero(~valid).tolist():
+        number = parse_localized_number(values[i], integer=integer)
+        if number is not None and np.isfinite(number):
+            out[i] = round(number) if integer else number
+            valid[i] = True
+    return out, valid
+
+
+def _build_table(rows: List[tuple], names: List[str]) -> KeywordTable:
+    """将一块只含所需列的行元组转换为 KeywordTable"""
+    raw = dict(zip(names, zip(*rows)))
+    columns: Dict[str, np.ndarray] = {}
+    valid = np.ones(len(rows), dtype=bool)
+    for name in names:
+        dtype = ALL_COLUMNS[name]
+        if dtype is object:
+            columns[name] = np.array([" ".join(v.split()) for v in raw[name]], dtype=object)
+        else:
+            columns[name], ok = to_number_column(list(raw[name]), dtype)
+            valid &= ok
+    valid &= columns["search_term"].astype(bool)
+    table = KeywordTable(**columns)
+    return table if valid.all() else table.take(valid)
+
+
+def iter_delimited_chunks(lines: Iterable[str], header: ReportHeader, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[KeywordTable]:
+    """按表头映射流式读取分隔符文件，只取需要的列，每 chunk_rows 行产出一个 KeywordTable"""
+    names = list(header.columns)
+    indices = [header.columns[name] for name in names]
+    min_cells = max(indices) + 1
+    # 表头至少映射出 4 个必选字段，itemgetter 总是返回元组
+    getter = itemgetter(*indices)
+
+    rows: List[tuple] = []
+    for cells in csv.reader(lines, delimiter=header.delimiter):
+        if len(cells) < min_cells:
+            continue
+        rows.append(getter(cells))
+        if len(rows) >= chunk_rows:
+            yield _build_table(rows, names)
+            rows = []
+    if rows:
+        yield _build_table(rows, names)
+
+
+def iter_whitespace_chunks(lines: Iterable[str], chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[KeywordTable]:
+    """空白分隔格式（搜索词 点击数 花费 订单数）按 chunk_rows 行分块解析"""
+    buf: List[str] = []
+    for line in lines:
+        buf.append(line.rstrip("\r\n"))
+        if len(buf) >= chunk_rows:
+            yield parse_report_block("\n".join(buf))
+            buf = []
+    if buf:
+        yield parse_report_block("\n".join(buf))
+
+
+def iter_lines(text: str) -> Iterator[str]:
+    """
+    惰性按行切分字符串（保留行尾换行符）
+    不同于 io.StringIO，不会把整段文本再复制一份到内部缓冲区
+    """
+    start = 0
+    length = len(text)
+    while start < length:
+        end = text.find("\n", start)
+        if end < 0:
+            end = length - 1
+        yield text[start:end + 1]
+        start = end + 1
+
+
+def iter_report_chunks(lines: Iterable[str], chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[KeywordTable]:
+    """
+    流式读取报表：先在头部查找表头，找到则按列名映射读取分隔符文件，否则按空白分隔格式解析
+    只遍历一次输入，不要求整份报表驻留内存
+    """
+    it = iter(lines)
+    header, consumed = sniff_header(it)
+    if header is None:
+        yield from iter_whitespace_chunks(chain(consumed, it), chunk_rows)
+    else:
+        yield from iter_delimited_chunks(it, header, chunk_rows)
+
+
+def read_report(text: str) -> KeywordTable:
+    """读取整份报表文本为 KeywordTable"""
+    lines = iter_lines(text)
+    header, _ = sniff_header(lines)
+    if header is None:
+        # 无表头：整段文本直接走列式解析
+        return parse_report_columnar(text)
+    return KeywordTable.concat(list(iter_delimited_chunks(lines, header)))
+
+
+def read_report_lines(lines: Iterable[str]) -> KeywordTable:
+    """读取报表行迭代器（如内存映射的报表文件）为 KeywordTable"""
+    return KeywordTable.concat(list(iter_report_chunks(lines)))
@@ -0,0 +1,307 @@
+"""
+统计筛选规则引擎
+规则为声明式表达式，如 "orders == 0 and clicks > 10"、"acos > target_acos"、"p_below >= confidence"，
+编译为对 KeywordTable 整列计算的布尔掩码；按顺序求值，每行取第一条命中规则的原因
+只由常量组成的子表达式在编译时求值（常量除以 0 报 RuleError）；列参与的除法按 NumPy 语义得到 inf / nan
+"""
+import ast
+import json
+import logging
+import operator
+import os
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
+
+from utils.report.significance import DEFAULT_PRIOR_STRENGTH, SIGNIFICANCE_METHODS, prob_below_baseline
+from utils.report.table import ALL_COLUMNS, KeywordTable
+
+logger = logging.getLogger(__name__)
+
+# 规则配置文件（相对 COZE_WORKSPACE_PATH）
+DEFAULT_RULES_FILE = "config/stats_filter_rules.json"
+
+# 派生指标：名称 -> (分子列, 分母列)；分母为 0 时分子为正得 inf，分子也为 0 得 nan（任何比较均不命中）
+DERIVED_METRICS: Dict[str, Tuple[str, str]] = {
+    "acos": ("spend", "sales"),
+    "roas": ("sales", "spend"),
+    "ctr": ("clicks", "impressions"),
+    "cvr": ("orders", "clicks"),
+    "cpc": ("spend", "clicks"),
+}
+# 转化率低于基线的概率（见 utils.report.significance），参数 baseline_cvr（缺省取账户基线）、prior_strength
+SIGNIFICANCE_METRIC = "p_below"
+# 规则中可直接引用的数值列
+NUMERIC_COLUMNS = tuple(name for name, dtype in ALL_COLUMNS.items() if dtype is not object)
+
+# 筛选模式：rules 按规则列表；bayes / binomial 按转化率显著低于基线判断
+FILTER_MODES = ("rules",) + SIGNIFICANCE_METHODS
+DEFAULT_FILTER_MODE = "rules"
+
+# 未配置时的默认规则（与最初硬编码的两条规则一致）
+DEFAULT_PARAMS: Dict[str, float] = {
+    "avg_price": 20.0,
+    "confidence": 0.95,
+    "prior_strength": DEFAULT_PRIOR_STRENGTH,
+}
+DEFAULT_RULES: List[Dict[str, str]] = [
+    {"when": "orders == 0 and clicks > 10", "reason": "高点击无转化"},
+    {"when": "orders == 0 and spend > avg_price / 2", "reason": "高花费无转化"},
+]
+# 显著性模式下的规则：转化率低于基线的概率达到置信度即否定
+SIGNIFICANCE_RULES: List[Dict[str, str]] = [
+    {"when": f"{SIGNIFICANCE_METRIC} >= confidence", "reason": "转化率显著低于基线"},
+]
+
+_COMPARE_OPS: Dict[type, Callable[[Any, Any], Any]] = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+}
+
+
+def _divide(numerator: Any, denominator: Any) -> Any:
+    """整列除法：除数为 0 时得 inf（分子也为 0 时得 nan），不抛出 ZeroDivisionError"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.true_divide(numerator, denominator)
+
+
+_BIN_OPS: Dict[type, Callable[[Any, Any], Any]] = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: _divide,
+}
+# 编译期常量折叠使用 Python 运算（常量除以 0 抛出 ZeroDivisionError）
+_CONSTANT_OPS: Dict[type, Callable[[Any, Any], Any]] = {**_BIN_OPS, ast.Div: operator.truediv}
+
+
+class Rule(NamedTuple):
+    """一条已编译的规则"""
+    expression: str
+    reason: str
+    names: Set[str]
+    evaluate: Callable[[Callable[[str], Any]], Any]
+
+
+class RuleSet(NamedTuple):
+    """按顺序求值的规则及其参数，method 为 p_below 使用的显著性方法"""
+    rules: List[Rule]
+    params: Dict[str, float]
+    method: str = SIGNIFICANCE_METHODS[0]
+
+
+class RuleError(ValueError):
+    """规则表达式不合法"""
+
+
+def _constant_value(node: ast.AST) -> Optional[float]:
+    """只由数值常量、负号与四则运算组成的子表达式在编译时求值，含名称时返回 None"""
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) and not isinstance(node.value, bool):
+        return node.value
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+        value = _constant_value(node.operand)
+        return None if value is None else -value
+    if isinstance(node, ast.BinOp) and type(node.op) in _CONSTANT_OPS:
+        left, right = _constant_value(node.left), _constant_value(node.right)
+        if left is None or right is None:
+            return None
+        try:
+            return _CONSTANT_OPS[type(node.op)](left, right)
+        except ZeroDivisionError:
+            raise RuleError(f"规则表达式中常量除以 0: {ast.unparse(node)}")
+    return None
+
+
+def _compile_node(node: ast.AST, names: Set[str]) -> Callable[[Callable[[str], Any]], Any]:
+    """把表达式语法树编译为闭包，闭包参数为取值函数 name -> 数组或标量"""
+    constant = _constant_value(node)
+    if constant is not None:
+        return lambda get: constant
+    if isinstance(node, ast.Expression):
+        return _compile_node(node.body, names)
+    if isinstance(node, ast.BoolOp):
+        parts = [_compile_node(v, names) for v in node.values]
+        combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+
+        def bool_op(get):
+            result = parts[0](get)
+            for part in parts[1:]:
+                result = combine(result, part(get))
+            return result
+        return bool_op
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.Not, ast.USub)):
+        operand = _compile_node(node.operand, names)
+        if isinstance(node.op, ast.Not):
+            return lambda get: np.logical_not(operand(get))
+        return lambda get: -operand(get)
+    if isinstance(node, ast.Compare):
+        left = _compile_node(node.left, names)
+        ops = [_COMPARE_OPS.get(type(op)) for op in node.ops]
+        if not all(ops):
+            raise RuleError("只支持 == != < <= > >= 比较")
+        rights = [_compile_node(c, names) for c in node.comparators]
+
+        def compare(get):
+            lhs = left(get)
+            result = None
+            for op, right in zip(ops, rights):
+                rhs = right(get)
+                part = op(lhs, rhs)
+                result = part if result is None else np.logical_and(result, part)
+                lhs = rhs
+            return result
+        return compare
+    if isinstance(node, ast.BinOp) and type(node.op) in _BIN_OPS:
+        op = _BIN_OPS[type(node.op)]
+        left, right = _compile_node(node.left, names), _compile_node(node.right, names)
+        return lambda get: op(left(get), right(get))
+    if isinstance(node, ast.Name):
+        name = node.id
+        names.add(name)
+        return lambda get: get(name)
+    raise RuleError(f"不支持的表达式: {ast.dump(node)}")
+
+
+@lru_cache(maxsize=256)
+def compile_expression(expression: str) -> Tuple[Callable[[Callable[[str], Any]], Any], frozenset]:
+    """编译规则表达式，返回 (求值闭包, 引用的名称)；相同表达式只编译一次"""
+    try:
+        tree = ast.parse(expression.strip(), mode="eval")
+    except SyntaxError as e:
+        raise RuleError(f"规则表达式语法错误: {expression}: {e}")
+    names: Set[str] = set()
+    evaluate = _compile_node(tree, names)
+    return evaluate, frozenset(names)
+
+
+def compile_rules(
+    rules: List[Dict[str, Any]],
+    params: Optional[Dict[str, float]] = None,
+    method: str = SIGNIFICANCE_METHODS[0],
+) -> RuleSet:
+    """编译规则列表，每条规则形如 {"when": "orders == 0 and clicks > 10", "reason": "高点击无转化"}"""
+    compiled: List[Rule] = []
+    for item in rules:
+        expression = str(item.get("when", "")).strip()
+        if not expression:
+            raise RuleError(f"规则缺少 when 表达式: {item}")
+        evaluate, names = compile_expression(expression)
+        compiled.append(Rule(expression, str(item.get("reason", "")) or expression, set(names), evaluate))
+    return RuleSet(compiled, dict(params or {}), method)
+
+
+class _Columns:
+    """规则求值时的取值函数：列、派生指标（惰性计算并缓存）与参数"""
+
+    def __init__(self, table: KeywordTable, rule_set: RuleSet):
+        self.table = table
+        self.params = rule_set.params
+        self.method = rule_set.method
+        self.cache: Dict[str, np.ndarray] = {}
+
+    def available(self, name: str) -> bool:
+        if name in self.params or name == SIGNIFICANCE_METRIC:
+            return True
+        if name not in DERIVED_METRICS and name not in NUMERIC_COLUMNS:
+            raise RuleError(f"规则引用了未知的字段或参数: {name}")
+        if name in DERIVED_METRICS:
+            return all(self.available(col) for col in DERIVED_METRICS[name])
+        return getattr(self.table, name) is not None
+
+    def __call__(self, name: str) -> Any:
+        if name in self.params:
+            return self.params[name]
+        if name in self.cache:
+            return self.cache[name]
+        if name == SIGNIFICANCE_METRIC:
+            value = prob_below_baseline(
+                self.table.orders,
+                self.table.clicks,
+                baseline=self.params.get("baseline_cvr") or None,
+                method=self.method,
+                prior_strength=self.params.get("prior_strength", DEFAULT_PRIOR_STRENGTH),
+            )
+        elif name in DERIVED_METRICS:
+            numerator, denominator = (self(col) for col in DERIVED_METRICS[name])
+            with np.errstate(divide="ignore", invalid="ignore"):
+                value = np.true_divide(numerator, denominator)
+        else:
+            value = getattr(self.table, name)
+        self.cache[name] = value
+        return value
+
+
+def apply_rules(table: KeywordTable, rule_set: RuleSet) -> np.ndarray:
+    """
+    对整表按顺序求值规则，返回每行命中的第一条规则的原因（object 数组，未命中为 None）
+    引用了报表中不存在的列（如没有 sales 列时的 acos）的规则跳过；引用未知名称时抛出 RuleError
+    """
+    labels = np.array([rule.reason for rule in rule_set.rules] + [None], dtype=object)
+    return labels[match_rules(len(table), rule_set.rules, _Columns(table, rule_set))]
+
+
+def match_rules(n: int, rules: List[Rule], get: Any) -> np.ndarray:
+    """
+    按顺序求值规则，返回每行命中的第一条规则的序号（int32 数组，未命中为 len(rules)）
+    get 为取值函数，需提供 available(name) 判断字段是否存在（不存在的规则跳过）
+    """
+    matched = np.full(n, len(rules), dtype=np.int32)
+    unmatched = np.ones(n, dtype=bool)
+    for i, rule in enumerate(rules):
+        if not unmatched.any():
+            break
+        missing = [name for name in rule.names if not get.available(name)]
+        if missing:
+            logger.warning(f"规则 '{rule.expression}' 引用的字段不存在，已跳过: {missing}")
+            continue
+        hit = np.logical_and(rule.evaluate(get), unmatched)
+        matched[hit] = i
+        unmatched &= ~hit
+    return matched
+
+
+def load_rule_config(path: str = "") -> Dict[str, Any]:
+    """读取规则配置文件，不存在时返回空配置"""
+    path = path or os.path.join(os.getenv("COZE_WORKSPACE_PATH", ""), DEFAULT_RULES_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as fd:
+        return json.load(fd)
+
+
+def resolve_rule_set(
+    config: Dict[str, Any],
+    shop_id: str = "",
+    asin: str = "",
+    rules: Optional[List[Dict[str, Any]]] = None,
+    params: Optional[Dict[str, float]] = None,
+    mode: str = "",
+) -> RuleSet:
+    """
+    选择筛选模式、规则与参数，优先级从低到高：内置默认 → 配置 default → 店铺 → ASIN → 请求
+    模式与规则列表整体覆盖，参数按键合并；bayes / binomial 模式下使用显著性规则
+    """
+    merged_mode = DEFAULT_FILTER_MODE
+    merged_rules: List[Dict[str, Any]] = DEFAULT_RULES
+    merged_params: Dict[str, float] = dict(DEFAULT_PARAMS)
+    layers = [
+        config.get("default", {}),
+        config.get("shops", {}).get(shop_id, {}) if shop_id else {},
+        config.get("asins", {}).get(asin, {}) if asin else {},
+        {"mode": mode, "rules": rules or [], "params": params or {}},
+    ]
+    for layer in layers:
+        merged_mode = layer.get("mode") or merged_mode
+        if layer.get("rules"):
+            merged_rules = layer["rules"]
+        merged_params.update(layer.get("params", {}))
+    if merged_mode not in FILTER_MODES:
+        raise RuleError(f"未知的筛选模式: {merged_mode}，可选: {FILTER_MODES}")
+    if merged_mode in SIGNIFICANCE_METHODS:
+        return compile_rules(SIGNIFICANCE_RULES, merged_params, merged_mode)
+    return compile_rules(merged_rules, merged_params)
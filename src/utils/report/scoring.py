@@ -0,0 +1,151 @@
+"""
+关键词竞争度批量打分
+所有关键词只分词一次，得到整列特征，再按配置的规则表（与统计筛选相同的表达式引擎，见 utils.report.rules）逐条求布尔掩码，
+每个关键词取第一条命中规则的竞争度、匹配类型、出价与原因，均未命中时取默认档位
+特征：
+- words: 词数；has_scenario: 是否含场景词（按整词匹配，"format" 不算含 "for"）
+- clicks / orders / spend / cvr / cpc: 历史报表中该词的累计点击、订单、花费及转化率、点击成本（见 utils.report.history），
+  没有历史的词点击为 0，cvr / cpc 为 nan（任何比较均不命中），由后面基于词形的规则兜底
+"""
+import json
+import os
+import re
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from utils.report.aggregate import normalize_term
+from utils.report.history import KeywordHistory, get_keyword_history
+from utils.report.rules import RuleError, compile_rules, match_rules
+
+# 规则配置文件（相对 COZE_WORKSPACE_PATH）
+DEFAULT_SCORE_RULES_FILE = "config/competition_score_rules.json"
+# 打分结果中各规则给出的字段
+LABEL_FIELDS = ("competition", "match_type", "bid", "reason")
+
+# 未配置时的规则（与最初硬编码的判断一致，场景词改为整词匹配）
+DEFAULT_SCENARIO_WORDS = ["for", "with"]
+DEFAULT_SCORE_RULES: List[Dict[str, str]] = [
+    {"when": "words >= 3 and has_scenario", "competition": "低竞争·蓝海", "match_type": "Exact", "bid": "高", "reason": "长词+场景精准，转化高"},
+    {"when": "words <= 2", "competition": "高竞争·红海", "match_type": "Broad", "bid": "低", "reason": "大词，竞争激烈"},
+]
+DEFAULT_LEVEL: Dict[str, str] = {"competition": "中等竞争", "match_type": "Phrase", "bid": "中", "reason": "可测试"}
+
+# 模型输出中可能带的序号前缀（"1. xxx"、"2) xxx"；"3.5mm" 这类小数不算）
+_NUMBERING = re.compile(r"^\d+\s*[.)、](?!\d)\s*")
+
+
+def clean_keyword(line: str) -> str:
+    """去掉首尾空白与序号前缀"""
+    return _NUMBERING.sub("", line.strip()).strip()
+
+
+def load_score_config(path: str = "") -> Dict[str, Any]:
+    """读取打分规则配置文件，不存在时返回空配置"""
+    path = path or os.path.join(os.getenv("COZE_WORKSPACE_PATH", ""), DEFAULT_SCORE_RULES_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as fd:
+        return json.load(fd)
+
+
+class _Features:
+    """规则求值时的取值函数：关键词特征、历史指标、派生的 cvr / cpc 与参数"""
+
+    def __init__(self, columns: Dict[str, np.ndarray], params: Dict[str, float]):
+        self.columns = columns
+        self.params = params
+
+    def available(self, name: str) -> bool:
+        if name in self.params or name in self.columns:
+            return True
+        raise RuleError(f"打分规则引用了未知的字段或参数: {name}")
+
+    def __call__(self, name: str) -> Any:
+        if name in self.params:
+            return self.params[name]
+        return self.columns[name]
+
+
+class KeywordScorer:
+    """按规则表给关键词批量打分；规则在构造时编译一次，可重复调用 score"""
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None, history: Optional[KeywordHistory] = None):
+        config = config or {}
+        rules = config.get("rules") or DEFAULT_SCORE_RULES
+        self.rule_set = compile_rules(rules, config.get("params", {}))
+        default = {**DEFAULT_LEVEL, **config.get("default", {})}
+        # 每个字段一列标签，按命中的规则序号取值，末尾为默认档位
+        self.labels = {
+            field: np.array([str(rule.get(field, default[field])) for rule in rules] + [default[field]], dtype=object)
+            for field in LABEL_FIELDS
+        }
+        scenario_words = sorted({normalize_term(w) for w in config.get("scenario_words", DEFAULT_SCENARIO_WORDS)} - {""}, key=len, reverse=True)
+        self.scenario_pattern = re.compile(rf"(?<!\w)(?:{'|'.join(map(re.escape, scenario_words))})(?!\w)" if scenario_words else r"(?!)")
+        self.history = history
+
+    @classmethod
+    def load(cls, path: str = "", shop_id: str = "", asin: str = "") -> "KeywordScorer":
+        """按配置文件构造，历史索引取该店铺 / ASIN 的进程内共享实例（未给出 shop_id 时不关联历史）"""
+        return cls(load_score_config(path), get_keyword_history(shop_id, asin))
+
+    def features(self, keywords: List[str]) -> Dict[str, np.ndarray]:
+        """
+        一次分词得到整列特征：所有关键词归一化后拼成一个文本，空格位置与场景词匹配位置
+        按各行起始偏移二分定位到关键词，再用 bincount 按关键词汇总
+        """
+        n = len(keywords)
+        normalized = [normalize_term(kw) for kw in keywords]
+        text = "\n".join(normalized)
+        lengths = np.fromiter((len(kw) for kw in normalized), dtype=np.int64, count=n)
+        starts = np.concatenate([[0], np.cumsum(lengths + 1)[:-1]])
+        # 归一化后词间恰好一个空格，词数 = 空格数 + 1（"3.5mm earbuds" 为 2 个词）
+        chars = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+        spaces = np.flatnonzero(chars == ord(" "))
+        words = np.bincount(np.searchsorted(starts, spaces, side="right") - 1, minlength=n) + (lengths > 0)
+        # 场景词按整词匹配
+        hits = np.fromiter((m.start() for m in self.scenario_pattern.finditer(text)), dtype=np.int64)
+        has_scenario = np.zeros(n, dtype=bool)
+        has_scenario[np.searchsorted(starts, hits, side="right") - 1] = True
+        columns: Dict[str, np.ndarray] = {"words": words, "has_scenario": has_scenario}
+
+        if self.history is not None:
+            columns.update(self.history.lookup(normalized, normalized=True))
+        else:
+            columns.update(clicks=np.zeros(n, dtype=np.int64), orders=np.zeros(n, dtype=np.int64), spend=np.zeros(n))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            clicks = columns["clicks"].astype(np.float64)
+            columns["cvr"] = np.where(clicks > 0, columns["orders"] / clicks, np.nan)
+            columns["cpc"] = np.where(clicks > 0, columns["spend"] / clicks, np.nan)
+        return columns
+
+    def score(self, lines: List[str]) -> List[Dict[str, Any]]:
+        """
+        为关键词列表打分，返回投放建议（空行跳过，顺序不变）
+        有历史数据的词附带 history_clicks / history_cvr / history_cpc
+        """
+        keywords = [kw for kw in map(clean_keyword, lines) if kw]
+        if not keywords:
+            return []
+        columns = self.features(keywords)
+        matched = match_rules(len(keywords), self.rule_set.rules, _Features(columns, self.rule_set.params))
+        labels = {field: values[matched].tolist() for field, values in self.labels.items()}
+
+        res: List[Dict[str, Any]] = []
+        clicks = columns["clicks"].tolist()
+        cvr = np.round(columns["cvr"], 4).tolist()
+        cpc = np.round(columns["cpc"], 2).tolist()
+        for i, kw in enumerate(keywords):
+            item = {
+                "keyword": kw,
+                "match_type": labels["match_type"][i],
+                "competition": labels["competition"][i],
+                "bid": labels["bid"][i],
+                "reason": labels["reason"][i],
+            }
+            if clicks[i]:
+                item["history_clicks"] = clicks[i]
+                item["history_cvr"] = cvr[i]
+                item["history_cpc"] = cpc[i]
+            res.append(item)
+        return res
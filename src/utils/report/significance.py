@@ -0,0 +1,167 @@
+"""
+转化率显著性
+按整列计算每个搜索词的转化率低于账户基线转化率的概率，替代固定的"点击数 > k 且零单"阈值：
+- bayes: beta-binomial 后验，先验 Beta(基线 × 先验强度, (1 - 基线) × 先验强度)，返回 P(转化率 < 基线)
+- binomial: 单侧二项检验，返回 1 - P(X <= 订单数 | 点击数, 基线)
+两者都归结为正则化不完全 beta 函数；安装了 scipy 时使用 scipy.special.betainc，否则使用下面的 NumPy 实现
+"""
+import logging
+from typing import Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SIGNIFICANCE_METHODS = ("bayes", "binomial")
+DEFAULT_PRIOR_STRENGTH = 10.0
+
+# 连分式收敛阈值与最大迭代次数（迭代次数约随 sqrt(max(a, b)) 增长）
+_BETACF_EPS = 1e-12
+_BETACF_MAX_ITER = 10000
+_TINY = 1e-300
+
+# Lanczos 近似系数（g = 7, n = 9）
+_LANCZOS_G = 7.0
+_LANCZOS_COEF = (
+    0.99999999999980993, 676.5203681218851, -1259.1392167224028,
+    771.32342877765313, -176.61502916214059, 12.507343278686905,
+    -0.13857109526572012, 9.9843695780195716e-6, 1.5056327351493116e-7,
+)
+
+
+def log_gamma(x: np.ndarray) -> np.ndarray:
+    """整列计算 ln Γ(x)，x > 0"""
+    x = np.asarray(x, dtype=np.float64)
+    # x < 0.5 时用 ln Γ(x) = ln Γ(x + 1) - ln x 移到近似的精确区间
+    small = x < 0.5
+    z = np.where(small, x + 1.0, x) - 1.0
+    series = np.full_like(z, _LANCZOS_COEF[0])
+    for i, coef in enumerate(_LANCZOS_COEF[1:], start=1):
+        series += coef / (z + i)
+    t = z + _LANCZOS_G + 0.5
+    result = 0.5 * np.log(2 * np.pi) + (z + 0.5) * np.log(t) - t + np.log(series)
+    return np.where(small, result - np.log(x), result)
+
+
+def _betacf(a: np.ndarray, b: np.ndarray, x: np.ndarray) -> np.ndarray:
+    """不完全 beta 函数的连分式（修正 Lentz 法），已收敛的元素移出计算集合"""
+    n = a.shape[0]
+    result = np.empty(n, dtype=np.float64)
+    active = np.arange(n)
+    qab, qap, qam = a + b, a + 1.0, a - 1.0
+    c = np.ones(n)
+    d = 1.0 - qab * x / qap
+    d = 1.0 / np.where(np.abs(d) < _TINY, _TINY, d)
+    h = d.copy()
+    for m in range(1, _BETACF_MAX_ITER + 1):
+        m2 = 2 * m
+        aa = m * (b - m) * x / ((qam + m2) * (a + m2))
+        d = 1.0 + aa * d
+        d = 1.0 / np.where(np.abs(d) < _TINY, _TINY, d)
+        c = 1.0 + aa / c
+        c = np.where(np.abs(c) < _TINY, _TINY, c)
+        h *= d * c
+        aa = -(a + m) * (qab + m) * x / ((a + m2) * (qap + m2))
+        d = 1.0 + aa * d
+        d = 1.0 / np.where(np.abs(d) < _TINY, _TINY, d)
+        c = 1.0 + aa / c
+        c = np.where(np.abs(c) < _TINY, _TINY, c)
+        delta = d * c
+        h *= delta
+        done = np.abs(delta - 1.0) < _BETACF_EPS
+        if done.all():
+            result[active] = h
+            return result
+        if done.any():
+            result[active[done]] = h[done]
+            keep = ~done
+            active, a, b, x, c, d, h = active[keep], a[keep], b[keep], x[keep], c[keep], d[keep], h[keep]
+            qab, qap, qam = qab[keep], qap[keep], qam[keep]
+    logger.warning(f"不完全 beta 函数连分式未收敛的元素数: {active.shape[0]}")
+    result[active] = h
+    return result
+
+
+def _betainc_numpy(a: np.ndarray, b: np.ndarray, x: np.ndarray) -> np.ndarray:
+    """正则化不完全 beta 函数 I_x(a, b) 的 NumPy 实现"""
+    a, b, x = np.broadcast_arrays(
+        np.asarray(a, dtype=np.float64), np.asarray(b, dtype=np.float64), np.asarray(x, dtype=np.float64)
+    )
+    result = np.where(x <= 0.0, 0.0, 1.0)
+    inner = (x > 0.0) & (x < 1.0)
+    if not inner.any():
+        return result
+    a, b, x = a[inner], b[inner], x[inner]
+    # x 较大时用 I_x(a, b) = 1 - I_{1-x}(b, a)，保证连分式快速收敛
+    flip = x > (a + 1.0) / (a + b + 2.0)
+    a, b, x = np.where(flip, b, a), np.where(flip, a, b), np.where(flip, 1.0 - x, x)
+    log_front = a * np.log(x) + b * np.log1p(-x) - (log_gamma(a) + log_gamma(b) - log_gamma(a + b))
+    value = np.exp(log_front) * _betacf(a, b, x) / a
+    result[inner] = np.where(flip, 1.0 - value, value)
+    return result
+
+
+try:
+    from scipy.special import betainc
+except ImportError:
+    betainc = _betainc_numpy
+
+
+def account_baseline(orders: np.ndarray, clicks: np.ndarray) -> float:
+    """账户基线转化率：总订单数 / 总点击数"""
+    total_clicks = float(clicks.sum())
+    return float(orders.sum()) / total_clicks if total_clicks else 0.0
+
+
+def prob_below_baseline(
+    orders: np.ndarray,
+    clicks: np.ndarray,
+    baseline: Optional[float] = None,
+    method: str = "bayes",
+    prior_strength: float = DEFAULT_PRIOR_STRENGTH,
+) -> np.ndarray:
+    """
+    整列计算每个词的转化率低于基线的概率（置信度）
+    baseline 为空时取账户基线；基线不在 (0, 1) 内时无法判断，全部返回 0
+    """
+    if method not in SIGNIFICANCE_METHODS:
+        raise ValueError(f"未知的显著性方法: {method}，可选: {SIGNIFICANCE_METHODS}")
+    orders = np.asarray(orders, dtype=np.int64)
+    clicks = np.asarray(clicks, dtype=np.int64)
+    if baseline is None:
+        baseline = account_baseline(orders, clicks)
+    if not 0.0 < baseline < 1.0:
+        logger.warning(f"基线转化率 {baseline} 不在 (0, 1) 内，跳过显著性判断")
+        return np.zeros(orders.shape[0])
+    # 订单数超过点击数（归因口径差异）按点击数截断
+    orders = np.minimum(orders, clicks)
+    # 概率只取决于 (订单数, 点击数)，大量长尾词取值相同，只对去重后的组合计算
+    base = int(orders.max(initial=0)) + 1
+    keys, inverse = np.unique(clicks * base + orders, return_inverse=True)
+    return _prob_below(keys % base, keys // base, baseline, method, prior_strength)[inverse]
+
+
+def _prob_below(
+    orders: np.ndarray,
+    clicks: np.ndarray,
+    baseline: float,
+    method: str,
+    prior_strength: float,
+) -> np.ndarray:
+    """对去重后的 (订单数, 点击数) 组合计算概率"""
+    orders = orders.astype(np.float64)
+    clicks = clicks.astype(np.float64)
+    if method == "bayes":
+        strength = max(prior_strength, 1e-6)
+        alpha = baseline * strength + orders
+        beta = (1.0 - baseline) * strength + (clicks - orders)
+        return betainc(alpha, beta, np.full(orders.shape[0], baseline))
+
+    # 单侧二项检验：P(X <= k) = I_{1-p}(n - k, k + 1)，k >= n 时为 1
+    result = np.zeros(orders.shape[0])
+    testable = orders < clicks
+    if testable.any():
+        k, n = orders[testable], clicks[testable]
+        p_value = betainc(n - k, k + 1.0, np.full(k.shape[0], 1.0 - baseline))
+        result[testable] = 1.0 - p_value
+    return result
@@ -0,0 +1,178 @@
+"""
+搜索词与产品信息的字符 n-gram TF-IDF 覆盖度
+单词覆盖度 = 单词的 n-gram 中出现在产品信息里的部分的 TF-IDF 权重之和 / 单词全部 n-gram 的 TF-IDF 权重之和，
+搜索词覆盖度取其各单词覆盖度的最小值：每个词都出现在产品信息中的搜索词接近 1，品类错配的接近 0；词序不影响结果
+字符 n-gram 可以分散在产品信息的不同单词里（wired 的 n-gram 全部出现在 "Wireless ... Powered" 中），
+因此覆盖度只用于划分中间段，直接判为相关还要求搜索词的每个单词都以整词或词干出现在产品信息中
+搜索词按块拼接为 UTF-32 码点数组，n-gram 编码、哈希、IDF 与加权求和都以整列运算完成
+（稀疏矩阵以 (行号, n-gram 哈希桶) 表示，按行 bincount 求和），不逐词循环
+"""
+import re
+from typing import Any, Dict, Iterable, List, NamedTuple, Tuple
+
+import numpy as np
+
+from utils.report.aggregate import estimate_tokens, normalize_term
+from utils.report.cluster import FUNCTION_WORDS, stem_token
+
+# 词与词之间的分隔码点（不会出现在归一化后的搜索词中）
+_SEPARATOR = 0
+_SPACE = ord(" ")
+# 标点等非单词字符按空格处理（产品标题中常见 "Gym," "IPX7-Waterproof"）
+_NON_WORD = re.compile(r"[^\w]+")
+# 每个码点占用的位数（Unicode 最大码点 0x10FFFF < 2 ** 21），n <= 3 时编码不超过 int64
+_CODE_BITS = 21
+MAX_NGRAM = 3
+# n-gram 哈希桶数（2 ** HASH_BITS），远大于报表中不同 n-gram 的数量，碰撞可忽略
+HASH_BITS = 22
+_HASH_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+# 每块的搜索词数，控制中间数组大小
+CHUNK_TERMS = 65536
+
+# 预筛默认阈值：覆盖度不低于该值直接判为相关
+DEFAULT_KEEP_THRESHOLD = 0.9
+# 覆盖度低于 reject_threshold 被本地否定时的原因
+PREFILTER_REJECT_REASON = "与产品信息无字面相关"
+
+
+class PrefilterResult(NamedTuple):
+    """预筛结果：各词覆盖度与分段"""
+    similarity: np.ndarray
+    keep: np.ndarray
+    reject: np.ndarray
+
+    @property
+    def ambiguous(self) -> np.ndarray:
+        return ~(self.keep | self.reject)
+
+
+def hashed_ngrams(docs: List[str], n: int = 3) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    文档列表的字符 n-gram，返回 (每个 n-gram 所属单词, 哈希桶, 每个单词所属文档)，每个 n-gram 出现一次对应一个元素
+    n-gram 不跨越单词（空格只能出现在首尾），词首词尾的 n-gram 带空格与词中的区分开
+    """
+    if not 1 <= n <= MAX_NGRAM:
+        raise ValueError(f"n-gram 长度需在 1 到 {MAX_NGRAM} 之间: {n}")
+    text = "\x00".join(f" {doc} " for doc in docs) + "\x00"
+    codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).astype(np.int64)
+    is_gap = (codes == _SEPARATOR) | (codes == _SPACE)
+    # 单词起点：非空白且前一个码点是空白；每个码点所属单词与文档编号
+    word_start = ~is_gap
+    word_start[1:] &= is_gap[:-1]
+    words = np.cumsum(word_start) - 1
+    docs_of = np.zeros(len(codes), dtype=np.int64)
+    np.cumsum(codes[:-1] == _SEPARATOR, out=docs_of[1:])
+    word_doc = docs_of[word_start]
+
+    windows = len(codes) - n + 1
+    grams = np.zeros(windows, dtype=np.int64)
+    valid = np.ones(windows, dtype=bool)
+    for i in range(n):
+        part = codes[i:i + windows]
+        grams <<= _CODE_BITS
+        grams |= part
+        valid &= part != _SEPARATOR
+        if 0 < i < n - 1 or n == 1:
+            valid &= part != _SPACE
+    # 以空格开头的 n-gram 属于其后的单词
+    first = np.arange(windows) + (codes[:windows] == _SPACE)
+    gram_words = words[np.minimum(first, len(codes) - 1)][valid].astype(np.int32)
+    grams = grams[valid].view(np.uint64)
+    buckets = ((grams * _HASH_MULTIPLIER) >> np.uint64(64 - HASH_BITS)).astype(np.int32)
+    return gram_words, buckets, word_doc
+
+
+def ngram_coverage(query: str, terms: List[str], n: int = 3) -> np.ndarray:
+    """
+    各搜索词被 query（产品信息）覆盖的程度：每个单词的 n-gram 中出现在 query 里的 TF-IDF 权重占比，取各单词的最小值
+    IDF 在 query + 搜索词上按 n-gram 出现次数统计（平滑：ln((1 + N) / (1 + df)) + 1）
+    """
+    if not terms:
+        return np.zeros(0)
+    size = 1 << HASH_BITS
+    _, query_buckets, _ = hashed_ngrams([query], n)
+    in_query = np.zeros(size, dtype=bool)
+    in_query[query_buckets] = True
+
+    # 第一遍：分块计算 n-gram 并累计文档频率
+    df = np.bincount(query_buckets, minlength=size)
+    chunks = []
+    for start in range(0, len(terms), CHUNK_TERMS):
+        chunk = hashed_ngrams(terms[start:start + CHUNK_TERMS], n)
+        df += np.bincount(chunk[1], minlength=size)
+        chunks.append(chunk)
+    idf = np.log((1.0 + len(terms) + 1) / (1.0 + df)) + 1.0
+
+    # 第二遍：按单词加权求和得到单词覆盖度，再按文档取最小值（没有单词的文档为 0）
+    parts = []
+    for start, (gram_words, buckets, word_doc) in zip(range(0, len(terms), CHUNK_TERMS), chunks):
+        count = min(CHUNK_TERMS, len(terms) - start)
+        weights = idf[buckets]
+        total = np.bincount(gram_words, weights=weights, minlength=len(word_doc))
+        covered = np.bincount(gram_words, weights=weights * in_query[buckets], minlength=len(word_doc))
+        word_coverage = np.divide(covered, total, out=np.zeros(len(word_doc)), where=total > 0)
+        coverage = np.zeros(count)
+        if len(word_doc):
+            firsts = np.flatnonzero(np.diff(word_doc, prepend=-1))
+            coverage[word_doc[firsts]] = np.minimum.reduceat(word_coverage, firsts)
+        parts.append(coverage)
+    return np.concatenate(parts)
+
+
+def _words(text: str) -> str:
+    """归一化并把标点替换为空格"""
+    return normalize_term(_NON_WORD.sub(" ", text))
+
+
+def token_matched(product_info: str, terms: List[str]) -> np.ndarray:
+    """各搜索词的每个单词（虚词除外）是否都以整词或词干出现在产品信息中；没有实词的搜索词为 False"""
+    product = set()
+    for word in _words(product_info).split():
+        product.add(word)
+        product.add(stem_token(word))
+    matched = np.zeros(len(terms), dtype=bool)
+    for i, term in enumerate(terms):
+        words = [word for word in _words(term).split() if word not in FUNCTION_WORDS]
+        matched[i] = bool(words) and all(word in product or stem_token(word) in product for word in words)
+    return matched
+
+
+def prefilter_terms(
+    product_info: str,
+    terms: List[str],
+    keep_threshold: float,
+    reject_threshold: float = 0.0,
+    n: int = 3,
+) -> PrefilterResult:
+    """
+    按与产品信息的覆盖度分段：>= keep_threshold 且每个单词都整词出现在产品信息中的直接判为相关，
+    < reject_threshold 直接判为不相关，其余交给大模型；reject_threshold 为 0 时不做本地否定
+    """
+    similarity = ngram_coverage(_words(product_info), [_words(term) for term in terms], n)
+    keep = similarity >= keep_threshold
+    if keep.any():
+        candidates = np.flatnonzero(keep)
+        keep[candidates] = token_matched(product_info, [terms[i] for i in candidates.tolist()])
+    reject = ~keep & (similarity < reject_threshold)
+    return PrefilterResult(similarity, keep, reject)
+
+
+def prefilter_stats(terms: List[str], result: PrefilterResult) -> Dict[str, int]:
+    """预筛统计：各段词数（ambiguous 为继续交给缓存 / 大模型判断的词数）与免于送入大模型的预估 token 数"""
+    decided = result.keep | result.reject
+    return {
+        "terms": len(terms),
+        "auto_kept": int(result.keep.sum()),
+        "auto_rejected": int(result.reject.sum()),
+        "ambiguous": int((~decided).sum()),
+        "tokens_saved": estimate_tokens([t for t, d in zip(terms, decided.tolist()) if d]),
+    }
+
+
+def combine_prefilter_stats(stats: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """合并多次预筛（如流式模式下各分块）的统计，各项求和"""
+    totals: Dict[str, Any] = {}
+    for item in stats:
+        for name, value in item.items():
+            totals[name] = totals.get(name, 0) + value
+    return {name: round(value, 2) if isinstance(value, float) else value for name, value in totals.items()}
@@ -0,0 +1,129 @@
+"""
+报表来源
+报表可以直接以文本传入，也可以通过文件引用传入：对象存储 key（S3SyncStorage）、本地路径或 http/https URL（FileOps）
+文件引用统一落到本地文件后内存映射（mmap）逐行读取，报表内容不需要整体驻留在 Python 字符串中
+本地路径来自请求参数，只有配置了报表目录（环境变量 REPORT_LOCAL_DIR）且路径解析后位于该目录下时才允许读取
+"""
+import codecs
+import mmap
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from storage.s3.s3_storage import S3SyncStorage
+from utils.file.file import File, FileOps
+from utils.report.reader import iter_lines
+
+# 判断文件编码时读取的头部字节数
+ENCODING_SAMPLE_BYTES = 64 * 1024
+# 非 ASCII 兼容编码无法按 b"\n" 切行，退回文本流读取
+_TEXT_STREAM_ENCODINGS = ("utf-16", "utf-32")
+
+
+def detect_encoding(sample: bytes) -> str:
+    """根据 BOM 与头部样本判断编码：有 BOM 按 BOM，可按 UTF-8 解码即 UTF-8，否则交给 chardet"""
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if sample.startswith((codecs.BOM_UTF32_LE, codecs.BOM_UTF32_BE)):
+        return "utf-32"
+    if sample.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return "utf-16"
+    try:
+        sample.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError as e:
+        # 样本末尾截断在多字节字符中间不算解码失败
+        if e.reason == "unexpected end of data" and e.start >= len(sample) - 3:
+            return "utf-8"
+    import chardet
+    return chardet.detect(sample).get("encoding") or "utf-8"
+
+
+def iter_mmap_lines(buf: mmap.mmap, encoding: str) -> Iterator[str]:
+    """在内存映射上按 b"\\n" 切行并逐行解码（保留行尾换行符），只对当前行做一次拷贝"""
+    start = 0
+    length = len(buf)
+    if encoding == "utf-8-sig":
+        start = len(codecs.BOM_UTF8)
+        encoding = "utf-8"
+    while start < length:
+        end = buf.find(b"\n", start)
+        if end < 0:
+            end = length - 1
+        yield buf[start:end + 1].decode(encoding, errors="replace")
+        start = end + 1
+
+
+def iter_file_lines(path: str) -> Iterator[str]:
+    """逐行读取本地报表文件：ASCII 兼容编码走 mmap，UTF-16/32 走文本流"""
+    if os.path.getsize(path) == 0:
+        return
+    with open(path, "rb") as fd:
+        encoding = detect_encoding(fd.read(ENCODING_SAMPLE_BYTES))
+    if encoding.lower().startswith(_TEXT_STREAM_ENCODINGS):
+        with open(path, "r", encoding=encoding, errors="replace", newline="") as fd:
+            yield from fd
+        return
+    with open(path, "rb") as fd, mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        yield from iter_mmap_lines(buf, encoding)
+
+
+def resolve_local_report(url: str) -> str:
+    """
+    校验请求传入的本地报表路径：未配置 REPORT_LOCAL_DIR 时拒绝所有本地路径，
+    否则解析符号链接与 ".." 后必须位于该目录下（相对路径相对该目录），返回解析后的路径
+    """
+    directory = os.getenv("REPORT_LOCAL_DIR", "")
+    if not directory:
+        raise PermissionError("不允许读取服务器本地文件，请通过 report_key 或 http/https URL 传入报表")
+    root = os.path.realpath(directory)
+    path = os.path.realpath(os.path.join(root, url))
+    if os.path.commonpath([root, path]) != root:
+        raise PermissionError(f"本地报表必须位于报表目录下: {url}")
+    if not os.path.isfile(path):
+        raise FileNotFoundError(f"本地文件不存在: {url}")
+    return path
+
+
+def get_report_storage() -> S3SyncStorage:
+    """报表所在的对象存储（端点与桶名取环境变量）"""
+    return S3SyncStorage(
+        endpoint_url=os.getenv("COZE_BUCKET_ENDPOINT_URL"),
+        access_key="",
+        secret_key="",
+        bucket_name=os.getenv("COZE_BUCKET_NAME", ""),
+    )
+
+
+@contextmanager
+def open_report_lines(
+    report_text: str = "",
+    report_file: Optional[File] = None,
+    report_key: str = "",
+) -> Iterator[Iterator[str]]:
+    """
+    打开报表并返回行迭代器，优先级：report_key > report_file > report_text
+    - report_key: 从对象存储流式下载到临时文件
+    - report_file: URL 流式下载到临时文件；本地路径只允许 REPORT_LOCAL_DIR 下的文件（见 resolve_local_report）
+    退出上下文时删除临时文件
+    """
+    if not report_key and report_file is None:
+        yield iter_lines(report_text)
+        return
+
+    tmp_path = None
+    try:
+        if report_key:
+            fd, tmp_path = tempfile.mkstemp(prefix="report_", dir=FileOps.DOWNLOAD_DIR)
+            os.close(fd)
+            path = get_report_storage().download_file(file_key=report_key, local_path=tmp_path)
+        elif report_file.is_remote:
+            tmp_path = FileOps.save_to_local(report_file, f"report_{os.urandom(8).hex()}")
+            path = tmp_path
+        else:
+            path = resolve_local_report(report_file.url)
+        yield iter_file_lines(path)
+    finally:
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
@@ -0,0 +1,186 @@
+"""
+关键词列式表
+以 struct-of-arrays 形式存放报表中的搜索词数据，避免每行一个 dict 的内存开销
+"""
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from pydantic import GetCoreSchemaHandler, GetJsonSchemaHandler
+from pydantic.json_schema import JsonSchemaValue
+from pydantic_core import core_schema
+
+# 必选列及其类型
+REQUIRED_COLUMNS: Dict[str, Any] = {
+    "search_term": object,
+    "clicks": np.int64,
+    "spend": np.float64,
+    "orders": np.int64,
+}
+
+# 可选列：仅当报表中存在对应字段时才有值（如亚马逊搜索词报告中的展示量、销售额、广告活动、广告组），
+# reason 为筛选出的否定词附带的否定原因，match_type 为最终否定词的匹配方式（phrase 词组否定 / exact 精确否定）
+OPTIONAL_COLUMNS: Dict[str, Any] = {
+    "impressions": np.int64,
+    "sales": np.float64,
+    "campaign": object,
+    "ad_group": object,
+    "reason": object,
+    "match_type": object,
+}
+
+ALL_COLUMNS: Dict[str, Any] = {**REQUIRED_COLUMNS, **OPTIONAL_COLUMNS}
+
+
+class KeywordTable:
+    """
+    关键词列式表：每一列是一个 NumPy 数组，行号一一对应
+    - search_term / campaign / ad_group / reason / match_type: object 数组（保留 Python str，避免定长 Unicode 的内存浪费）
+    - clicks / orders / impressions: int64
+    - spend / sales: float64
+    可选列为 None 表示报表中没有该字段
+
+    可直接作为 pydantic 状态字段类型：校验时 KeywordTable 实例原样透传（不逐行校验和拷贝），
+    List[Dict] 会转换为列式表；model_dump / JSON 序列化时输出 List[Dict]。
+    检查点序列化走 _asdict()：数值列按 NumPy 数组二进制存储，文本列按字符串列表存储
+    """
+
+    __slots__ = tuple(ALL_COLUMNS)
+
+    def __init__(
+        self,
+        search_term: np.ndarray,
+        clicks: np.ndarray,
+        spend: np.ndarray,
+        orders: np.ndarray,
+        impressions: Optional[np.ndarray] = None,
+        sales: Optional[np.ndarray] = None,
+        campaign: Optional[np.ndarray] = None,
+        ad_group: Optional[np.ndarray] = None,
+        reason: Optional[np.ndarray] = None,
+        match_type: Optional[np.ndarray] = None,
+    ):
+        self.search_term = _as_column(search_term, object)
+        self.clicks = clicks
+        self.spend = spend
+        self.orders = orders
+        self.impressions = impressions
+        self.sales = sales
+        self.campaign = _as_column(campaign, object)
+        self.ad_group = _as_column(ad_group, object)
+        self.reason = _as_column(reason, object)
+        self.match_type = _as_column(match_type, object)
+
+    @classmethod
+    def empty(cls) -> "KeywordTable":
+        return cls(**{name: np.empty(0, dtype=dtype) for name, dtype in REQUIRED_COLUMNS.items()})
+
+    @classmethod
+    def from_records(cls, records: List[Dict[str, Any]]) -> "KeywordTable":
+        """从 List[Dict] 构建（兼容旧的行式数据）"""
+        n = len(records)
+        if n == 0:
+            return cls.empty()
+        columns: Dict[str, np.ndarray] = {}
+        for name, dtype in ALL_COLUMNS.items():
+            if name not in REQUIRED_COLUMNS and any(name not in r for r in records):
+                continue
+            if dtype is object:
+                columns[name] = np.array([str(r.get(name, "")) for r in records], dtype=object)
+            else:
+                cast = int if dtype is np.int64 else float
+                columns[name] = np.fromiter((cast(r.get(name, 0)) for r in records), dtype=dtype, count=n)
+        return cls(**columns)
+
+    @classmethod
+    def concat(cls, tables: List["KeywordTable"]) -> "KeywordTable":
+        """
+        按行拼接多个表
+        可选列只要有一个表存在就保留，其余表对应位置填默认值（数值 0、文本 ""）
+        """
+        tables = [t for t in tables if len(t)]
+        if not tables:
+            return cls.empty()
+        if len(tables) == 1:
+            return tables[0]
+        columns: Dict[str, np.ndarray] = {}
+        for name, dtype in ALL_COLUMNS.items():
+            parts = [getattr(t, name) for t in tables]
+            if all(p is None for p in parts):
+                continue
+            columns[name] = np.concatenate([
+                p if p is not None else _default_column(dtype, len(t))
+                for p, t in zip(parts, tables)
+            ])
+        return cls(**columns)
+
+    @classmethod
+    def _validate(cls, value: Any) -> "KeywordTable":
+        if isinstance(value, cls):
+            return value
+        if isinstance(value, list):
+            return cls.from_records(value)
+        if isinstance(value, dict):
+            return cls(**value)
+        raise ValueError(f"无法转换为 KeywordTable: {type(value).__name__}")
+
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source: Any, handler: GetCoreSchemaHandler) -> core_schema.CoreSchema:
+        return core_schema.no_info_plain_validator_function(
+            cls._validate,
+            serialization=core_schema.plain_serializer_function_ser_schema(
+                lambda table: table.to_records(), when_used="always"
+            ),
+        )
+
+    @classmethod
+    def __get_pydantic_json_schema__(cls, schema: core_schema.CoreSchema, handler: GetJsonSchemaHandler) -> JsonSchemaValue:
+        return {"type": "array", "items": {"type": "object"}}
+
+    def __len__(self) -> int:
+        return len(self.search_term)
+
+    def __repr__(self) -> str:
+        return f"KeywordTable(rows={len(self)}, columns={list(self.columns())})"
+
+    def _asdict(self) -> Dict[str, Any]:
+        """检查点序列化：数值列保持 NumPy 数组（二进制），文本列转为字符串列表"""
+        return {
+            name: col.tolist() if col.dtype == object else col
+            for name, col in self.columns().items()
+        }
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """返回所有存在的列"""
+        return {name: getattr(self, name) for name in ALL_COLUMNS if getattr(self, name) is not None}
+
+    def with_column(self, name: str, values: np.ndarray) -> "KeywordTable":
+        """返回增加（或替换）一列后的新表，其余列共享同一数组"""
+        return KeywordTable(**{**self.columns(), name: values})
+
+    def take(self, index: np.ndarray) -> "KeywordTable":
+        """按布尔掩码或整数下标取子表"""
+        return KeywordTable(**{name: col[index] for name, col in self.columns().items()})
+
+    def to_records(self, extra: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """转换为 List[Dict]，仅在需要行式数据的边界调用"""
+        extra = extra or {}
+        columns = self.columns()
+        names = list(columns)
+        return [
+            {**dict(zip(names, values)), **extra}
+            for values in zip(*(col.tolist() for col in columns.values()))
+        ]
+
+
+def _as_column(values: Any, dtype: Any) -> Optional[np.ndarray]:
+    """文本列统一为 object 数组（检查点恢复时为 list）"""
+    if values is None or isinstance(values, np.ndarray):
+        return values
+    return np.array(values, dtype=dtype)
+
+
+def _default_column(dtype: Any, size: int) -> np.ndarray:
+    """缺失列的默认值：数值为 0，文本为空字符串"""
+    if dtype is object:
+        return np.full(size, "", dtype=object)
+    return np.zeros(size, dtype=dtype)
@@ -0,0 +1,147 @@
+"""
+搜索词哈希索引与推荐词交叉校验
+每次运行对报表搜索词与否定词各建一次哈希索引，每个推荐词只做常数次（词组否定为词数平方次）查表，不随报表规模线性增长：
+- 否定冲突：按亚马逊的匹配方式判断推荐词是否会被否定词拦住，按策略标记或剔除
+  - 精确否定（match_type 为 exact 或未标注）：推荐词与否定词的词干序列相同（只差单复数等词形，词序与虚词须一致）
+  - 词组否定（match_type 为 phrase）：否定词的词干序列按顺序、连续地出现在推荐词中（"case for" 不匹配 "for case"）
+- 报表表现：与推荐词签名相同的报表搜索词，汇总其点击、花费、订单等指标附在推荐词上
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.report.aggregate import normalize_term
+from utils.report.cluster import signature_tokens, stem_token
+from utils.report.table import KeywordTable
+
+# 推荐词与否定词冲突时的处理：flag 保留并标注冲突，drop 剔除
+CONFLICT_ACTIONS = ("flag", "drop")
+DEFAULT_CONFLICT_ACTION = "flag"
+# 报表表现中汇总的指标列（报表中存在时）
+PERFORMANCE_COLUMNS = ("impressions", "clicks", "spend", "orders", "sales")
+
+
+class TermIndex:
+    """搜索词签名索引：signatures 为签名 -> 搜索词编号"""
+
+    def __init__(self, terms: List[str], stems: Optional[Dict[str, str]] = None):
+        self.stems: Dict[str, str] = stems if stems is not None else {}
+        self.signatures: Dict[str, List[int]] = {}
+        for i, term in enumerate(terms):
+            self.signatures.setdefault(self.signature(term), []).append(i)
+
+    def signature(self, term: str) -> str:
+        return " ".join(signature_tokens(term, self.stems))
+
+    def equal(self, term: str) -> List[int]:
+        """签名与 term 相同的搜索词编号"""
+        return self.signatures.get(self.signature(term), [])
+
+
+class NegativeIndex:
+    """否定词索引：精确否定与词组否定都按词干序列哈希"""
+
+    def __init__(self, negatives: KeywordTable, stems: Dict[str, str]):
+        self.stems = stems
+        match_types = negatives.match_type if negatives.match_type is not None else np.full(len(negatives), "exact", dtype=object)
+        self.match_types = match_types
+        self.exact: Dict[Tuple[str, ...], List[int]] = {}
+        self.phrases: Dict[Tuple[str, ...], List[int]] = {}
+        self.max_phrase = 0
+        for i, (term, match_type) in enumerate(zip(negatives.search_term.tolist(), match_types.tolist())):
+            sequence = self.sequence(term)
+            if not sequence:
+                continue
+            if match_type == "phrase":
+                self.phrases.setdefault(sequence, []).append(i)
+                self.max_phrase = max(self.max_phrase, len(sequence))
+            else:
+                self.exact.setdefault(sequence, []).append(i)
+
+    def sequence(self, term: str) -> Tuple[str, ...]:
+        """词干序列（保留虚词与词序）"""
+        stems = []
+        for token in normalize_term(term).split():
+            stem = self.stems.get(token)
+            if stem is None:
+                stem = self.stems[token] = stem_token(token)
+            stems.append(stem)
+        return tuple(stems)
+
+    def match(self, keyword: str) -> List[int]:
+        """会拦住 keyword 的否定词编号（升序）"""
+        sequence = self.sequence(keyword)
+        hits = set(self.exact.get(sequence, []))
+        if self.phrases:
+            for size in range(1, min(self.max_phrase, len(sequence)) + 1):
+                for start in range(len(sequence) - size + 1):
+                    hits.update(self.phrases.get(sequence[start:start + size], []))
+        return sorted(hits)
+
+
+def _performance(report: KeywordTable, ids: List[int]) -> Dict[str, Any]:
+    """汇总若干报表行的指标"""
+    perf: Dict[str, Any] = {"search_terms": [report.search_term[i] for i in ids]}
+    for name in PERFORMANCE_COLUMNS:
+        values = getattr(report, name)
+        if values is not None:
+            perf[name] = values[ids].sum().item()
+    clicks, orders = perf["clicks"], perf["orders"]
+    perf["cvr"] = round(orders / clicks, 4) if clicks else 0.0
+    perf["cpc"] = round(perf["spend"] / clicks, 2) if clicks else 0.0
+    if "sales" in perf:
+        perf["acos"] = round(perf["spend"] / perf["sales"], 4) if perf["sales"] else None
+    return perf
+
+
+def cross_check(
+    recommendations: List[Dict[str, Any]],
+    negatives: KeywordTable,
+    report: Optional[KeywordTable] = None,
+    action: str = DEFAULT_CONFLICT_ACTION,
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    用否定词与报表搜索词校验推荐词，返回 (校验后的推荐词, 统计)
+    冲突的推荐词附带 conflict（"negated"）与 negated_by（[{"search_term", "match_type", "reason"}]），action 为 drop 时剔除；
+    报表中已有的推荐词附带 report_performance
+    """
+    if action not in CONFLICT_ACTIONS:
+        raise ValueError(f"未知的推荐词冲突处理方式: {action}，可选: {CONFLICT_ACTIONS}")
+    report = report if report is not None else KeywordTable.empty()
+    stems: Dict[str, str] = {}
+    report_index = TermIndex(report.search_term.tolist(), stems)
+    negative_index = NegativeIndex(negatives, stems)
+    reasons = negatives.reason if negatives.reason is not None else np.full(len(negatives), "", dtype=object)
+
+    checked: List[Dict[str, Any]] = []
+    negated = in_report = 0
+    for item in recommendations:
+        item = dict(item)
+        keyword = item.get("keyword", "")
+        negative_ids = negative_index.match(keyword)
+        if negative_ids:
+            negated += 1
+            if action == "drop":
+                continue
+            item["conflict"] = "negated"
+            item["negated_by"] = [
+                {
+                    "search_term": negatives.search_term[i],
+                    "match_type": negative_index.match_types[i] or "exact",
+                    "reason": reasons[i] or "",
+                }
+                for i in negative_ids
+            ]
+        report_ids = report_index.equal(keyword)
+        if report_ids:
+            in_report += 1
+            item["report_performance"] = _performance(report, report_ids)
+        checked.append(item)
+
+    stats = {
+        "recommendations": len(recommendations),
+        "negated": negated,
+        "in_report": in_report,
+        "dropped": len(recommendations) - len(checked),
+    }
+    return checked, stats
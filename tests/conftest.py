@@ -0,0 +1,9 @@
+"""测试公共配置：把 src 目录加入 Python 路径"""
+import os
+import sys
+
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+app_dir = os.path.join(project_dir, "src")
+if app_dir not in sys.path:
+    sys.path.insert(0, app_dir)
+os.environ.setdefault("COZE_WORKSPACE_PATH", project_dir)
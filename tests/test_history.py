@@ -0,0 +1,59 @@
+"""搜索词历史索引测试"""
+import numpy as np
+
+from utils.report import history as history_module
+from utils.report.history import KeywordHistory, get_keyword_history
+from utils.report.table import KeywordTable
+
+
+def _table(rows):
+    return KeywordTable.from_records([
+        {"search_term": term, "clicks": clicks, "spend": spend, "orders": orders} for term, clicks, spend, orders in rows
+    ])
+
+
+def test_ingest_accumulates_and_skips_repeated_reports():
+    history = KeywordHistory()
+    report = _table([("Yoga Mat", 10, 5.0, 1), ("yoga mat thick " + "x" * 200, 4, 2.0, 0)])
+    assert history.ingest(report)
+    assert not history.ingest(report)
+    assert history.ingest(_table([("yoga  mat", 6, 1.0, 2), ("blanket", 1, 0.5, 0)]))
+    found = history.lookup(["yoga mat", "YOGA MAT THICK " + "X" * 200, "missing"])
+    assert found["clicks"].tolist() == [16, 4, 0]
+    assert found["orders"].tolist() == [3, 0, 0]
+    assert np.allclose(found["spend"], [6.0, 2.0, 0.0])
+    assert history.keys.dtype == np.uint64
+
+
+def test_max_rows_keeps_most_clicked_terms():
+    history = KeywordHistory(max_rows=2)
+    history.ingest(_table([("a", 1, 1.0, 0), ("b", 9, 1.0, 0), ("c", 5, 1.0, 0)]))
+    assert len(history) == 2
+    assert history.lookup(["a", "b", "c"])["clicks"].tolist() == [0, 9, 5]
+
+
+def test_anonymous_runs_have_no_history(monkeypatch):
+    monkeypatch.setattr(history_module, "_histories", history_module.OrderedDict())
+    assert get_keyword_history("", "") is None
+    assert get_keyword_history("", "B000TEST") is None
+    assert get_keyword_history("shop", "B000TEST") is get_keyword_history("shop", "B000TEST")
+    assert get_keyword_history("shop", "B000TEST") is not get_keyword_history("other", "B000TEST")
+
+
+def test_histories_are_evicted_least_recently_used(monkeypatch):
+    monkeypatch.setattr(history_module, "_histories", history_module.OrderedDict())
+    monkeypatch.setenv("KEYWORD_HISTORY_BACKEND", "memory")
+    monkeypatch.setenv("KEYWORD_HISTORY_MAX_ENTRIES", "2")
+    monkeypatch.setenv("KEYWORD_HISTORY_MAX_ROWS", "3")
+    first = get_keyword_history("s1")
+    first.ingest(_table([("a", 1, 1.0, 0), ("b", 1, 1.0, 0)]))
+    get_keyword_history("s2").ingest(_table([("c", 1, 1.0, 0)]))
+    get_keyword_history("s1")
+    # 条目数超限：淘汰最久未用的 s2
+    get_keyword_history("s3")
+    assert list(history_module._histories) == [("s1", ""), ("s3", "")]
+    # 总行数超限（s1 两行 + s3 两行）：再次取用时淘汰最久未用的 s1
+    get_keyword_history("s3").ingest(_table([("d", 1, 1.0, 0), ("e", 1, 1.0, 0)]))
+    get_keyword_history("s4")
+    assert ("s1", "") not in history_module._histories
+    assert get_keyword_history("s1") is not first
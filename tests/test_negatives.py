@@ -0,0 +1,61 @@
+"""否定词去重与词组合并测试"""
+from utils.report.negatives import collapse_phrases, dedupe_negatives
+from utils.report.table import KeywordTable
+
+
+def _negatives(rows):
+    table = KeywordTable.from_records([
+        {"search_term": term, "clicks": clicks, "spend": 1.0, "orders": 0, "reason": "高点击无转化"} for term, clicks in rows
+    ])
+    return dedupe_negatives(table)
+
+
+def _phrases(table):
+    rows = table.to_records()
+    return {row["search_term"]: row for row in rows if row["match_type"] == "phrase"}
+
+
+def test_dedupe_keeps_first_row_per_normalized_term():
+    table, terms = dedupe_negatives(KeywordTable.from_records([
+        {"search_term": "Yoga Mat", "clicks": 3, "reason": "统计"},
+        {"search_term": "yoga  mat", "clicks": 9, "reason": "语义"},
+        {"search_term": "blanket", "clicks": 1, "reason": "语义"},
+    ]))
+    assert table.search_term.tolist() == ["Yoga Mat", "blanket"]
+    assert table.reason.tolist() == ["统计", "语义"]
+    assert terms == ["yoga mat", "blanket"]
+
+
+def test_function_word_phrases_are_not_negated():
+    table, terms = _negatives([("mat for cat", 1), ("toy for dog", 1), ("bed for bird", 1)])
+    collapsed, stats = collapse_phrases(table, terms, [], min_cover=3)
+    assert stats == {"phrases": 0, "phrase_covered": 0}
+    assert collapsed.match_type.tolist() == ["exact"] * 3
+
+
+def test_phrases_in_converting_terms_are_not_negated():
+    table, terms = _negatives([("cat toy red", 1), ("cat toy blue", 1), ("cat toy green", 1)])
+    collapsed, stats = collapse_phrases(table, terms, ["cat toy"], min_cover=3)
+    # "cat" / "toy" / "cat toy" 都出现在有转化的搜索词中
+    assert stats["phrases"] == 0
+    assert len(collapsed) == 3
+
+    collapsed, stats = collapse_phrases(table, terms, ["dog toy"], min_cover=3)
+    assert list(_phrases(collapsed)) == ["cat"]
+    assert stats == {"phrases": 1, "phrase_covered": 3}
+
+
+def test_overlapping_phrases_count_each_negative_once():
+    # 先选中覆盖更多的 "cheap"；"free" 只计入 "cheap" 未覆盖的 3 个否定词
+    table, terms = _negatives([
+        ("cheap free a", 10), ("cheap free b", 20), ("cheap free c", 30),
+        ("cheap d", 40), ("cheap h", 5), ("cheap i", 5), ("cheap j", 5),
+        ("free e", 1), ("free f", 2), ("free g", 3),
+    ])
+    collapsed, stats = collapse_phrases(table, terms, [], min_cover=3)
+    phrases = _phrases(collapsed)
+    assert stats == {"phrases": 2, "phrase_covered": 10}
+    assert sorted(phrases) == ["cheap", "free"]
+    assert phrases["cheap"]["clicks"] == 115 and "覆盖 7 个否定词" in phrases["cheap"]["reason"]
+    assert phrases["free"]["clicks"] == 6 and "覆盖 3 个否定词" in phrases["free"]["reason"]
+    assert sum(row["clicks"] for row in collapsed.to_records()) == 121
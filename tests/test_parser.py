@@ -0,0 +1,69 @@
+"""报表文本列式解析测试：与原逐行解析（data_preprocess_node 的原实现）结果一致"""
+import random
+from typing import Any, Dict, List
+
+import pytest
+
+from utils.report.parser import parse_report_columnar
+
+
+def legacy_parse(text: str) -> List[Dict[str, Any]]:
+    """原逐行解析实现"""
+    data: List[Dict[str, Any]] = []
+    for line in text.strip().split("\n"):
+        line = line.strip()
+        if not line:
+            continue
+        parts = line.split()
+        if len(parts) >= 4:
+            try:
+                data.append({
+                    "search_term": " ".join(parts[:-3]),
+                    "clicks": int(parts[-3]),
+                    "spend": float(parts[-2]),
+                    "orders": int(parts[-1]),
+                })
+            except (ValueError, IndexError):
+                continue
+    return data
+
+
+def _records(text: str, **kwargs) -> List[Dict[str, Any]]:
+    table = parse_report_columnar(text, **kwargs)
+    return [
+        {"search_term": term, "clicks": clicks, "spend": spend, "orders": orders}
+        for term, clicks, spend, orders in zip(
+            table.search_term.tolist(), table.clicks.tolist(), table.spend.tolist(), table.orders.tolist()
+        )
+    ]
+
+
+def _random_report(rows: int, seed: int) -> str:
+    rnd = random.Random(seed)
+    words = ["wireless", "earbuds", "for", "kids", "蓝牙", "耳机", "café"]
+    values = ["12", "0", "-3", "+7", "1_000", "1.5", "3e2", "n/a", "", "٣", "007", "inf", "nan", "2.50", ".5"]
+    separators = [" ", "  ", "\t", "　", " \t "]
+    lines = []
+    for _ in range(rows):
+        fields = [rnd.choice(words) for _ in range(rnd.randint(0, 4))] + [rnd.choice(values) for _ in range(3)]
+        lines.append(rnd.choice(["", " ", "\t"]) + rnd.choice(separators).join(f for f in fields if f) + rnd.choice(["", " ", "\r"]))
+    return "\n".join(lines)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_legacy_parser_on_dirty_reports(seed):
+    text = _random_report(2000, seed)
+    # 按 repr 比较，花费为 nan 的行也要一致
+    expected = repr(legacy_parse(text))
+    assert repr(_records(text)) == expected
+    # 小块切分时块边界不影响结果
+    assert repr(_records(text, block_chars=97)) == expected
+
+
+def test_edge_cases():
+    text = "\n\n  yoga mat 10 5.00 1  \nshort 1 2\n  \nbad clicks x 1.0 0\nfloat clicks 1.5 1.0 0\n3.5mm jack 2 1.25 0"
+    assert _records(text) == legacy_parse(text) == [
+        {"search_term": "yoga mat", "clicks": 10, "spend": 5.0, "orders": 1},
+        {"search_term": "3.5mm jack", "clicks": 2, "spend": 1.25, "orders": 0},
+    ]
+    assert _records("") == legacy_parse("") == []
@@ -0,0 +1,69 @@
+"""统计筛选规则引擎测试"""
+import numpy as np
+import pytest
+
+from utils.report.rules import RuleError, apply_rules, compile_rules, resolve_rule_set
+from utils.report.table import KeywordTable
+
+
+def _table():
+    return KeywordTable.from_records([
+        {"search_term": "a", "clicks": 20, "spend": 8.0, "orders": 0},
+        {"search_term": "b", "clicks": 3, "spend": 15.0, "orders": 0},
+        {"search_term": "c", "clicks": 0, "spend": 0.0, "orders": 0},
+        {"search_term": "d", "clicks": 30, "spend": 12.0, "orders": 2},
+    ])
+
+
+def test_first_matching_rule_wins():
+    rule_set = compile_rules(
+        [
+            {"when": "orders == 0 and clicks > 10", "reason": "高点击无转化"},
+            {"when": "orders == 0 and spend > avg_price / 2", "reason": "高花费无转化"},
+        ],
+        {"avg_price": 20.0},
+    )
+    assert apply_rules(_table(), rule_set).tolist() == ["高点击无转化", "高花费无转化", None, None]
+
+
+@pytest.mark.parametrize("expression", [
+    "__import__('os').system('true')",
+    "clicks.real > 1",
+    "clicks[0] > 1",
+    "clicks > 1 if orders else 2",
+    "lambda: 1",
+    "clicks ** 2 > 4",
+    "clicks in [1, 2]",
+    "'text' == clicks",
+    "True",
+    "clicks >",
+])
+def test_rejected_expressions(expression):
+    with pytest.raises(RuleError):
+        compile_rules([{"when": expression}])
+
+
+def test_unknown_name_is_reported():
+    with pytest.raises(RuleError):
+        apply_rules(_table(), compile_rules([{"when": "bogus > 1"}]))
+
+
+def test_constant_division_by_zero_is_a_rule_error():
+    with pytest.raises(RuleError):
+        compile_rules([{"when": "clicks > 1/0"}])
+    with pytest.raises(RuleError):
+        compile_rules([{"when": "clicks > 2 * (1 - 1) / 0 + 1"}])
+    with pytest.raises(RuleError):
+        resolve_rule_set({}, rules=[{"when": "spend > -3 / (2 - 2)"}])
+
+
+def test_constant_sub_expressions_are_folded():
+    rule_set = compile_rules([{"when": "clicks > 40 / 4 * 2 - 1"}])
+    assert apply_rules(_table(), rule_set).tolist() == ["clicks > 40 / 4 * 2 - 1", None, None, "clicks > 40 / 4 * 2 - 1"]
+
+
+def test_column_division_yields_inf_and_nan():
+    # c 行 0 / 0 为 nan，任何比较均不命中；参数为 0 时得 inf
+    rule_set = compile_rules([{"when": "spend / clicks > 0.3"}, {"when": "clicks > avg_price / zero"}], {"avg_price": 20.0, "zero": 0})
+    with np.errstate(all="raise"):
+        assert apply_rules(_table(), rule_set).tolist() == ["spend / clicks > 0.3", "spend / clicks > 0.3", None, "spend / clicks > 0.3"]
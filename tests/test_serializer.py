@@ -0,0 +1,25 @@
+"""检查点序列化测试"""
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from storage.memory.serializer import ZSTD_MIN_BYTES, get_checkpoint_serde
+
+pytest.importorskip("zstandard")
+
+
+def test_zstd_concurrent_round_trip():
+    """同一个序列化实例被多个线程同时使用（并行分支、并发运行）时压缩与解压结果正确"""
+    serde = get_checkpoint_serde("msgpack+zstd")
+
+    def round_trip(i: int) -> bool:
+        for j in range(200):
+            value = {"id": i, "step": j, "terms": [f"term {i} {j} {k}" for k in range(ZSTD_MIN_BYTES // 8)]}
+            type_, data = serde.dumps_typed(value)
+            assert type_.endswith("+zstd")
+            if serde.loads_typed((type_, data)) != value:
+                return False
+        return True
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        assert all(pool.map(round_trip, range(32)))
@@ -0,0 +1,58 @@
+"""转化率显著性测试：与精确二项分布及数值积分的 beta 后验对比"""
+from math import comb
+
+import numpy as np
+import pytest
+
+from utils.report import significance
+from utils.report.significance import _betainc_numpy, prob_below_baseline
+
+
+def exact_binomial(orders: int, clicks: int, baseline: float) -> float:
+    """1 - P(X <= orders)，X ~ Binomial(clicks, baseline)"""
+    cdf = sum(comb(clicks, k) * baseline ** k * (1 - baseline) ** (clicks - k) for k in range(orders + 1))
+    return 1.0 - cdf
+
+
+@pytest.fixture(params=["numpy", "default"])
+def betainc(request, monkeypatch):
+    """NumPy 实现与默认实现（安装了 scipy 时为 scipy）都要测"""
+    if request.param == "numpy":
+        monkeypatch.setattr(significance, "betainc", _betainc_numpy)
+
+
+@pytest.mark.parametrize("baseline", [0.02, 0.1, 0.35])
+def test_binomial_matches_exact_cdf(betainc, baseline):
+    pairs = [(0, 1), (0, 10), (1, 10), (2, 50), (0, 120), (5, 60), (9, 10), (10, 10), (14, 10), (3, 400)]
+    orders = np.array([o for o, _ in pairs])
+    clicks = np.array([c for _, c in pairs])
+    # 订单数不少于点击数时按截断处理，概率为 0
+    expected = [exact_binomial(o, c, baseline) if o < c else 0.0 for o, c in pairs]
+    result = prob_below_baseline(orders, clicks, baseline, method="binomial")
+    assert np.allclose(result, expected, rtol=1e-9, atol=1e-12)
+
+
+def test_bayes_matches_numeric_posterior(betainc):
+    baseline, strength = 0.1, 10.0
+    orders, clicks = np.array([0, 1, 3, 0]), np.array([0, 20, 15, 80])
+    grid = np.linspace(0, 1, 400_001)[1:-1]
+    expected = []
+    for o, c in zip(orders.tolist(), clicks.tolist()):
+        a, b = baseline * strength + o, (1 - baseline) * strength + c - o
+        density = np.exp((a - 1) * np.log(grid) + (b - 1) * np.log1p(-grid))
+        expected.append(density[grid < baseline].sum() / density.sum())
+    result = prob_below_baseline(orders, clicks, baseline, method="bayes", prior_strength=strength)
+    assert np.allclose(result, expected, atol=1e-4)
+    # 无点击时后验即先验，P(转化率 < 基线) 与数据无关
+    assert 0.0 < result[0] < 1.0
+
+
+def test_baseline_defaults_to_account_rate_and_rejects_degenerate():
+    orders, clicks = np.array([1, 0, 3]), np.array([10, 20, 10])
+    assert np.allclose(
+        prob_below_baseline(orders, clicks, method="binomial"),
+        prob_below_baseline(orders, clicks, 0.1, method="binomial"),
+    )
+    assert prob_below_baseline(np.zeros(3, dtype=int), clicks).tolist() == [0.0, 0.0, 0.0]
+    with pytest.raises(ValueError):
+        prob_below_baseline(orders, clicks, method="frequentist")
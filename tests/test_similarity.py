@@ -0,0 +1,34 @@
+"""语义判断本地预筛测试"""
+import numpy as np
+
+from utils.report.similarity import ngram_coverage, prefilter_stats, prefilter_terms, token_matched
+
+PRODUCT = "Wireless Earbuds, IPX7-Waterproof Sport Headphones for Running, Powered Charging Case"
+
+
+def test_token_matched_requires_whole_words_or_stems():
+    terms = ["wired earbuds", "earbud for running", "ipx7 waterproof headphones", "for the", "bus", "kids toy"]
+    # wired 的字符 n-gram 都在 "Wireless ... Powered" 中，但不是整词；earbud 与 earbuds 词干相同；虚词不参与判断
+    assert token_matched(PRODUCT, terms).tolist() == [False, True, True, False, False, False]
+
+
+def test_coverage_ignores_word_order():
+    assert ngram_coverage("wireless earbuds", ["earbuds wireless", "wireless earbuds", "kids toy"]).tolist() == [1.0, 1.0, 0.0]
+
+
+def test_prefilter_keeps_only_token_matched_high_coverage_terms():
+    terms = ["wired earbuds", "running earbuds wireless", "earbud for running", "kids toy"]
+    result = prefilter_terms(PRODUCT, terms, keep_threshold=0.9, reject_threshold=0.2)
+    assert result.similarity[0] >= 0.9
+    assert result.keep.tolist() == [False, True, False, False]
+    assert result.reject.tolist() == [False, False, False, True]
+    assert result.ambiguous.tolist() == [True, False, True, False]
+
+    stats = prefilter_stats(terms, result)
+    assert (stats["terms"], stats["auto_kept"], stats["auto_rejected"], stats["ambiguous"]) == (4, 1, 1, 2)
+
+
+def test_no_local_rejection_by_default():
+    result = prefilter_terms(PRODUCT, ["kids toy", "bus"], keep_threshold=0.9)
+    assert not result.reject.any()
+    assert np.array_equal(result.ambiguous, [True, True])
@@ -0,0 +1,49 @@
+"""报表来源测试"""
+import os
+
+import pytest
+
+from utils.file.file import File
+from utils.report.source import open_report_lines
+
+
+def _read(url: str) -> list:
+    with open_report_lines(report_file=File(url=url)) as lines:
+        return list(lines)
+
+
+@pytest.fixture
+def report_dir(tmp_path, monkeypatch):
+    directory = tmp_path / "reports"
+    directory.mkdir()
+    (directory / "report.txt").write_text("yoga mat 10 5.00 1\n", encoding="utf-8")
+    (tmp_path / "secret.txt").write_text("secret\n", encoding="utf-8")
+    monkeypatch.setenv("REPORT_LOCAL_DIR", str(directory))
+    return directory
+
+
+def test_local_paths_rejected_without_report_dir(tmp_path, monkeypatch):
+    monkeypatch.delenv("REPORT_LOCAL_DIR", raising=False)
+    path = tmp_path / "report.txt"
+    path.write_text("yoga mat 10 5.00 1\n", encoding="utf-8")
+    with pytest.raises(PermissionError):
+        _read(str(path))
+
+
+def test_local_paths_inside_report_dir(report_dir):
+    assert _read(str(report_dir / "report.txt")) == ["yoga mat 10 5.00 1\n"]
+    assert _read("report.txt") == ["yoga mat 10 5.00 1\n"]
+    with pytest.raises(FileNotFoundError):
+        _read("missing.txt")
+
+
+def test_local_paths_outside_report_dir(report_dir):
+    with pytest.raises(PermissionError):
+        _read(str(report_dir.parent / "secret.txt"))
+    with pytest.raises(PermissionError):
+        _read("../secret.txt")
+    with pytest.raises(PermissionError):
+        _read("/etc/passwd")
+    os.symlink(report_dir.parent / "secret.txt", report_dir / "link.txt")
+    with pytest.raises(PermissionError):
+        _read("link.txt")
@@ -0,0 +1,89 @@
+"""语义判断结果缓存测试"""
+from types import SimpleNamespace
+
+import pytest
+
+from storage.database import db
+from utils.llm import verdict_cache
+from utils.llm.verdict_cache import (
+    LRUVerdictCache,
+    PostgresVerdictCache,
+    Verdict,
+    VerdictCache,
+    VerdictLineParser,
+)
+
+BAD = Verdict(True, "不相关")
+GOOD = Verdict(False, "")
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """替换模块内的 time，time() 与 monotonic() 都返回 clock.now"""
+    fake = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(verdict_cache, "time", SimpleNamespace(time=lambda: fake.now, monotonic=lambda: fake.now))
+    return fake
+
+
+def test_lru_entries_expire_after_ttl(clock):
+    cache = LRUVerdictCache(max_size=10, ttl=60)
+    cache.put_many({"a": BAD})
+    cache.put_many({"b": GOOD}, expires_at=clock.now + 10)
+    assert cache.get_many(["a", "b", "c"]) == {"a": BAD, "b": GOOD}
+    clock.now += 10
+    assert cache.get_many(["a", "b"]) == {"a": BAD}
+    # 过期条目在查询时删除
+    assert len(cache) == 1
+    clock.now += 50
+    assert cache.get_many(["a"]) == {}
+    assert len(cache) == 0
+
+
+def test_lru_evicts_least_recently_used(clock):
+    cache = LRUVerdictCache(max_size=2, ttl=60)
+    cache.put_many({"a": BAD, "b": GOOD})
+    cache.get_many(["a"])
+    cache.put_many({"c": BAD})
+    assert cache.get_many(["a", "b", "c"]) == {"a": BAD, "c": BAD}
+    # 重复写入同一个键会刷新其位置与内容
+    cache.put_many({"a": GOOD})
+    cache.put_many({"d": GOOD})
+    assert cache.get_many(["a", "c", "d"]) == {"a": GOOD, "d": GOOD}
+
+
+def test_database_hits_backfill_memory_with_their_expiry(clock):
+    database = SimpleNamespace(get_many=lambda keys: {key: (clock.now + 5, BAD) for key in keys if key == "b"})
+    cache = VerdictCache(LRUVerdictCache(max_size=10, ttl=60), database)
+    cache.memory.put_many({"a": GOOD})
+    found, stats = cache.get_many(["a", "b", "c"])
+    assert found == {"a": GOOD, "b": BAD}
+    assert stats == {"memory_hits": 1, "db_hits": 1}
+    clock.now += 5
+    assert cache.memory.get_many(["a", "b"]) == {"a": GOOD}
+
+
+def test_database_retries_after_cooldown(clock, monkeypatch):
+    attempts = []
+
+    def unavailable():
+        attempts.append(clock.now)
+        raise ConnectionError("database down")
+
+    monkeypatch.setattr(db, "get_engine", unavailable)
+    cache = PostgresVerdictCache(retry_seconds=60)
+    assert cache.get_many(["a"]) == {}
+    cache.put_many([])
+    assert cache.get_many(["a"]) == {}
+    assert len(attempts) == 1
+    clock.now += 60
+    assert cache.get_many(["a"]) == {}
+    assert attempts == [1000.0, 1060.0]
+
+
+def test_line_parser_handles_lines_split_across_chunks():
+    parser = VerdictLineParser()
+    assert parser.feed("cheap ear") == []
+    assert parser.feed("buds | 价格词\n\nkids") == [("cheap earbuds", "价格词")]
+    assert parser.feed(" toy") == []
+    assert parser.close() == [("kids toy", verdict_cache.DEFAULT_REASON)]
+    assert parser.close() == []